@@ -36,7 +36,7 @@ from qtpy.QtWidgets import (
 from skimage.io import imsave
 from urllib3.connectionpool import xrange
 
-from psf_analysis_CFIM.bead_finder_CFIM import BeadFinder
+from psf_analysis_CFIM.bead_finder_CFIM import BeadFinder, BeadFinderCache
 from psf_analysis_CFIM.config.settings_widget import SettingsWidget
 from psf_analysis_CFIM.debug import global_vars
 from psf_analysis_CFIM.debug.debug import report_error_debug
@@ -46,7 +46,8 @@ from psf_analysis_CFIM.library_workarounds.RangeDict import RangeDict
 from psf_analysis_CFIM.mounting_medium_selector import MountingMediumSelector
 from psf_analysis_CFIM.points_dropdown import PointsDropdown
 from psf_analysis_CFIM.psf_analysis.analyzer import Analyzer
-from psf_analysis_CFIM.psf_analysis.image_analysis import analyze_image, filter_psf_beads_by_box
+from psf_analysis_CFIM.psf_analysis.image_analysis import filter_psf_beads_by_box
+from psf_analysis_CFIM.psf_analysis.image_qc import ImageQCService
 from psf_analysis_CFIM.psf_analysis.parameters import PSFAnalysisInputs
 from psf_analysis_CFIM.psf_analysis.psf import PSF, PSFRenderEngine
 from psf_analysis_CFIM.range_indicator_button import ToggleRangeIndicator
@@ -127,6 +128,8 @@ class PsfAnalysis(QWidget):
         self.settings_Widget = SettingsWidget(parent=self)
 
         self.bead_finder = None
+        self.bead_finder_cache = BeadFinderCache()
+        self.image_qc = ImageQCService()
 
         self.cancel_extraction = False
         layout = QVBoxLayout()
@@ -558,7 +561,9 @@ class PsfAnalysis(QWidget):
         print(f"Image layers len: {len(image_layers)}")
 
         self.bead_finder = BeadFinder(image_layers, self.get_scale(),bead_finder_settings=self.settings["bead_finder_settings"], bounding_box=(
-            self.psf_z_box_size.value(), self.psf_yx_box_size.value(), self.psf_yx_box_size.value()))
+            self.psf_z_box_size.value(), self.psf_yx_box_size.value(), self.psf_yx_box_size.value()),
+            cache=self.bead_finder_cache,
+            optics={"NA": self.na.value(), "RI_mounting_medium": self.mounting_medium.value()})
 
     def _layer_inserted(self, event):
         if isinstance(event.value, napari.layers.Image):
@@ -568,6 +573,8 @@ class PsfAnalysis(QWidget):
 
     def _layer_removed(self, event):
         if isinstance(event.value, napari.layers.Image):
+            self.bead_finder_cache.evict(event.value)
+            self.image_qc.evict(event.value)
             items = [self.cbox_img.itemText(i) for i in range(self.cbox_img.count())]
             self.cbox_img.removeItem(items.index(str(event.value)))
             self.changed_manually = False
@@ -616,15 +623,15 @@ class PsfAnalysis(QWidget):
                     date=analyzer.get_date(),
                     version=analyzer.get_version(),
                     dpi=analyzer.get_dpi(),
-                    top_left_message=f"Average PSF of {len(measurement_stack)} beads",
+                    top_left_message=f"Average PSF of {len(current_analyzer.get_raw_beads_filtered())} beads",
                     ellipsoid_color=current_analyzer.get_wavelength_color(),
                 )
 
                 figure_title = f"PSF Summary | {channel_wavelength}λ | {current_analyzer.get_wavelength_color()}"
 
-                # Combines the summary image from average bead with the summary image stack from the entire psf analysis.
-                averaged_summary_image_expanded = np.expand_dims(averaged_summary_image, axis=0)
-                combined_stack = np.concatenate((averaged_summary_image_expanded, measurement_stack), axis=0)
+                # Puts the summary image from average bead in front of the lazy summary image stack from the entire psf analysis.
+                measurement_stack.prepend(averaged_summary_image)
+                combined_stack = measurement_stack
                 self.display_measurement_stack(combined_stack, measurement_scale, name=figure_title, metadata={"wavelength": channel_wavelength})
 
                 self.summary_figs[channel_wavelength] = combined_stack
@@ -730,12 +737,16 @@ class PsfAnalysis(QWidget):
             ),
                 info_dict=analyzer_settings,
                 analyzer_settings=self.settings["analyzer_settings"],
+                checkpoint_folder=os.path.join(self.settings["output_folder"], "checkpoints"),
             )
 
             @thread_worker(progress={"total": bead_amount})
             def measure(current_image_layer=image_layer, current_analyzer=analyzer):
 
-                yield from current_analyzer
+                try:
+                    yield from current_analyzer
+                finally:
+                    current_analyzer.close()
 
                 self.results.append(current_analyzer.get_results())
                 measurement_stack, measurement_scale = current_analyzer.get_summary_figure_stack(
@@ -750,6 +761,8 @@ class PsfAnalysis(QWidget):
             worker.yielded.connect(_update_progress)
             worker.returned.connect(_on_done)
             worker.aborted.connect(_reset_state)
+            # Quitting doesn't close the generator, so stop the process pool on cancel here
+            worker.aborted.connect(analyzer.close)
             worker.errored.connect(_reset_state)
             worker.start()
 
@@ -968,30 +981,26 @@ class PsfAnalysis(QWidget):
         return groups
 
     def _validate_image(self):
-        try:
-            expected_z_spacing = 0
-            selection = self.image_manager.get_images()
-            for selected in selection:
-                wavelength = selected.metadata.get("EmissionWavelength", None)
-                self.error_widget.clear_channel(wavelength)
-
-
-                widget_settings = {
-                    "RI_mounting_medium": self.mounting_medium.value(),
-                    "Emission": selected.metadata.get("EmissionWavelength", None),
-                    "NA": selected.metadata.get("LensNA", None),
-                }
-                widget_settings.update(self.settings["image_analysis_settings"])
-                channel_expected_z_spacing = analyze_image(selected, widget_settings)
-                if channel_expected_z_spacing > expected_z_spacing:
-                    expected_z_spacing = channel_expected_z_spacing
-
-            if expected_z_spacing != 0:
-                self.psf_z_box_size.setValue(int(expected_z_spacing) * 3)
-
-        except Exception as e:
-            print("Error in image analysis: ", e)
-            raise e
+        """Start image QC of the selected channels; results arrive from a worker thread."""
+        selection = self.image_manager.get_images()
+        widget_settings = {}
+        for selected in selection:
+            wavelength = selected.metadata.get("EmissionWavelength", None)
+            self.error_widget.clear_channel(wavelength)
+
+            channel_settings = {
+                "RI_mounting_medium": self.mounting_medium.value(),
+                "Emission": selected.metadata.get("EmissionWavelength", None),
+                "NA": selected.metadata.get("LensNA", None),
+            }
+            channel_settings.update(self.settings["image_analysis_settings"])
+            widget_settings[id(selected)] = channel_settings
+
+        self.image_qc.validate(selection, widget_settings, on_done=self._on_image_validated)
+
+    def _on_image_validated(self, expected_z_spacing):
+        if expected_z_spacing:
+            self.psf_z_box_size.setValue(int(expected_z_spacing) * 3)
 
     def _setup_progressbar(self, max_points):
         self.progressbar.reset()
@@ -1106,15 +1115,8 @@ class PsfAnalysis(QWidget):
 
             if idx == 0:
                 show_info("Can't delete the average bead.")
-            elif idx == self.summary_figs[wavelength].shape[0] - 1:
-                self.summary_figs[wavelength] = self.summary_figs[wavelength][:-1]
             else:
-                self.summary_figs[wavelength] = np.concatenate(
-                    [
-                        self.summary_figs[wavelength][:idx],
-                        self.summary_figs[wavelength][idx + 1:],  # noqa: E203
-                    ]
-                )
+                self.summary_figs[wavelength].delete(idx)
             if len(self.summary_figs.get(wavelength, [])) <= 1:
                 self.viewer.layers.remove_selected()
             else:
@@ -1156,7 +1158,7 @@ class PsfAnalysis(QWidget):
             for i, row in psf_results.iterrows():
                 save_path = os.path.join(out_path, basename(row["PSF_path"]))
                 sanitized_path = sanitize(save_path)
-                figure = self.summary_figs[wavelength_id][i + 1] # +1 because the first one is the average
+                figure = self.summary_figs[wavelength_id][i + 1] # +1 because the first one is the average. Renders it if needed.
                 imsave(sanitized_path, figure)
 
             if self.temperature.text() != "":
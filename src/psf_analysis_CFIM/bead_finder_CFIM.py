@@ -1,14 +1,83 @@
-from typing import Tuple, List
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Optional
 
 import numpy as np
-from scipy.ndimage import median_filter
+from scipy.ndimage import gaussian_filter, median_filter
+from scipy.spatial import cKDTree
 from skimage.feature import peak_local_max
 
+from psf_analysis_CFIM.psf_analysis.image_analysis import get_expected_bead_yx_size, get_expected_bead_z_size
+
+
+class BeadFinderCache:
+    """
+    Per-layer intermediate products of bead finding, reused between runs.
+
+    Holds the median-filtered max projection of each layer and its local
+    maxima above the lowest threshold searched so far, brightest first.
+    Entries are keyed on the layer and the identity of its data, so
+    replacing the data of a layer invalidates its entry; napari layers also
+    drop their entry on their `data` event. In-memory data can be edited in
+    place without either, so entries also hold the shape, dtype and a
+    checksum of the max projection of the data, checked on every `get`.
+    Owners should `evict` layers they remove.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._signatures = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def get(self, layer) -> Optional[dict]:
+        entry = self._entries.get(id(layer))
+        if entry is None or entry[0] is not layer or entry[1] is not layer.data:
+            return None
+        signature = self._signature(layer.data)
+        self._signatures[id(layer)] = signature
+        return entry[3] if entry[2] == signature else None
+
+    def put(self, layer, value: dict):
+        signature = self._signatures.pop(id(layer), None) or self._signature(layer.data)
+        with self._lock:
+            self._entries[id(layer)] = (layer, layer.data, signature, value)
+            if id(layer) not in self._callbacks and hasattr(layer, "events"):
+                self._callbacks[id(layer)] = lambda event: self._drop(id(layer))
+                layer.events.data.connect(self._callbacks[id(layer)])
+
+    def evict(self, layer):
+        self._drop(id(layer))
+        with self._lock:
+            callback = self._callbacks.pop(id(layer), None)
+        if callback is not None:
+            layer.events.data.disconnect(callback)
+
+    def _drop(self, key: int):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._signatures.pop(key, None)
+
+    @staticmethod
+    def _signature(data) -> tuple:
+        """Shape, dtype and, for in-memory data, a checksum of its max projection."""
+        checksum = None
+        if isinstance(data, np.ndarray):
+            checksum = zlib.crc32(np.ascontiguousarray(np.max(data, axis=0)))
+        return data.shape, np.dtype(data.dtype), checksum
+
+    def __len__(self):
+        return len(self._entries)
+
 
 class BeadFinder:
-    def __init__(self, image_layers, scale: tuple, bounding_box: tuple | list[tuple], bead_finder_settings: dict):
+    def __init__(self, image_layers, scale: tuple, bounding_box: tuple | list[tuple], bead_finder_settings: dict,
+                 cache: BeadFinderCache = None, optics: dict = None):
 
         self.settings = bead_finder_settings
+        self.cache = cache
+        self.optics = optics or {}
         self._debug = bead_finder_settings.get("debug", False)
 
         if isinstance(bounding_box, list):
@@ -35,8 +104,19 @@ class BeadFinder:
         self.maxima_rel = bead_finder_settings.get("maxima_rel", 0.2)
         self.maxima_abs = bead_finder_settings.get("maxima_abs", 0)
 
+        self.chunked = bead_finder_settings.get("chunked", False)
+        self.tile_size = bead_finder_settings.get("tile_size", 1024)
+        self.z_slab_size = 32
+        self.min_peak_distance = 2
+
+        self.parallel_channels = bead_finder_settings.get("parallel_channels", False)
+
+        self.detector = bead_finder_settings.get("detector", "projection")
+        self.dog_sigma_ratio = 1.6
+
         self.passed_bead_count = [0, 0, 0]
         self.discarded_bead_count = [0, 0, 0]
+        self._count_lock = threading.Lock()
 
 
     """
@@ -61,14 +141,20 @@ class BeadFinder:
         channels_beads_dicts = []
 
 
-        for image_layer in self.images_list:
+        if self.parallel_channels and len(self.images_list) > 1:
+            # The filters and peak finding release the GIL, so channels overlap in threads.
+            with ThreadPoolExecutor(max_workers=len(self.images_list)) as executor:
+                channel_results = list(executor.map(
+                    lambda layer: self.find_beads_for_channel(layer.data, layer=layer), self.images_list))
+        else:
+            channel_results = [self.find_beads_for_channel(layer.data, layer=layer) for layer in self.images_list]
+
+        for image_layer, (beads, discarded_beads) in zip(self.images_list, channel_results):
             try:
                 wavelength = image_layer.metadata["EmissionWavelength"]
             except KeyError:
                 wavelength = None
 
-            beads, discarded_beads = self.find_beads_for_channel(image_layer.data)
-
             total_beads += beads
             total_discarded_beads += discarded_beads
 
@@ -92,24 +178,43 @@ class BeadFinder:
         #     print(f"Total: {green}{len(total_beads)}{endc} / {yellow}{len(total_discarded_beads)}{endc}")
         return channels_beads_dicts
 
-    def find_beads_for_channel(self, channel_image):
-        median_image = self._median_filter(self._max_projection(channel_image))
-
-        yx_beads, discarded_xy = self._maxima(median_image, channel_image)
-        zyx_beads, zyx_discarded_beads = self._find_bead_positions(channel_image, yx_beads)
+    def find_beads_for_channel(self, channel_image, layer=None):
+        z_positions = None
+        dog_sigmas = self._get_dog_sigmas(layer) if self.detector == "dog" else None
+        if dog_sigmas is not None:
+            yx_beads, discarded_xy = self._split_by_yx_border(self._dog_peaks(channel_image, dog_sigmas), channel_image)
+            z_positions = np.array([bead[0] for bead in yx_beads + discarded_xy], dtype=int)
+            yx_beads = [bead[1:] for bead in yx_beads]
+            discarded_xy = [bead[1:] for bead in discarded_xy]
+        elif self.cache is not None and layer is not None:
+            yx_beads, discarded_xy = self._split_by_yx_border(self._cached_peaks(channel_image, layer), channel_image)
+        elif self._use_tiles(channel_image):
+            median_image = self._tiled_median_max_projection(channel_image)
+            yx_beads, discarded_xy = self._split_by_yx_border(self._tiled_peaks(median_image), channel_image)
+        else:
+            median_image = self._median_filter(self._max_projection(channel_image))
+            yx_beads, discarded_xy = self._maxima(median_image, channel_image)
+
+        # Localize in- and out-of-border candidates in one go
+        if z_positions is None:
+            z_positions = self._z_positions(channel_image, yx_beads + discarded_xy)
+        zyx_beads, zyx_discarded_beads = self._find_bead_positions(
+            channel_image, yx_beads, z_positions=z_positions[:len(yx_beads)])
 
         beads, discarded_beads_by_neighbor_dist = self.filter_beads_by_neighbour_distance(zyx_beads, zyx_discarded_beads)
-        yx_discarded_beads, x = self._find_bead_positions(channel_image, discarded_xy, no_filter=True) # Convert discarded yx beads to zyx
+        yx_discarded_beads, x = self._find_bead_positions(
+            channel_image, discarded_xy, no_filter=True, z_positions=z_positions[len(yx_beads):]) # Convert discarded yx beads to zyx
 
         # Combine discarded beads TODO: Add lines to visualize discarded beads from neighbor distance
 
         if self._debug:
-            self.passed_bead_count[0] += len(yx_beads)
-            self.passed_bead_count[1] += len(zyx_beads)
-            self.passed_bead_count[2] += len(beads)
-            self.discarded_bead_count[0] += len(discarded_xy)
-            self.discarded_bead_count[1] += len(zyx_discarded_beads)
-            self.discarded_bead_count[2] += len(discarded_beads_by_neighbor_dist)
+            with self._count_lock:
+                self.passed_bead_count[0] += len(yx_beads)
+                self.passed_bead_count[1] += len(zyx_beads)
+                self.passed_bead_count[2] += len(beads)
+                self.discarded_bead_count[0] += len(discarded_xy)
+                self.discarded_bead_count[1] += len(zyx_discarded_beads)
+                self.discarded_bead_count[2] += len(discarded_beads_by_neighbor_dist)
 
         discarded_beads = zyx_discarded_beads + yx_discarded_beads + discarded_beads_by_neighbor_dist
         return beads, discarded_beads
@@ -117,6 +222,10 @@ class BeadFinder:
     def get_scale(self):
         return self.scale
 
+    def _use_tiles(self, image) -> bool:
+        """Lazy arrays (dask, zarr) are always read in tiles, NumPy arrays when chunked is set."""
+        return self.chunked or not isinstance(image, np.ndarray)
+
     def _max_projection(self, image=None):
         return np.max(image, axis=0)
 
@@ -128,23 +237,62 @@ class BeadFinder:
 
         yx_border = (self.bounding_box_px[1] / 2) + self.yx_border_padding
         image_size = channel_image.shape
-        xy_bead_positions = peak_local_max(image, min_distance=2, threshold_rel=self.maxima_rel, threshold_abs=self.maxima_abs, exclude_border=0)
-        xy_bead_positions = [(y, x) for (y, x) in xy_bead_positions]
-        in_border_xy_bead_positions = [bead for bead in xy_bead_positions if yx_border < bead[0] < image_size[1] - yx_border and yx_border < bead[1] < image_size[2] - yx_border]
+        xy_bead_positions = peak_local_max(image, min_distance=self.min_peak_distance, threshold_rel=self.maxima_rel, threshold_abs=self.maxima_abs, exclude_border=0)
+        return self._split_by_yx_border([(y, x) for (y, x) in xy_bead_positions], channel_image)
+
+    def _split_by_yx_border(self, xy_bead_positions, channel_image) -> (List[Tuple], List[Tuple]):
+        yx_border = (self.bounding_box_px[1] / 2) + self.yx_border_padding
+        image_size = channel_image.shape
+        in_border_xy_bead_positions = [bead for bead in xy_bead_positions if yx_border < bead[-2] < image_size[1] - yx_border and yx_border < bead[-1] < image_size[2] - yx_border]
         discarded_beads = [bead for bead in xy_bead_positions if bead not in in_border_xy_bead_positions]
 
         return in_border_xy_bead_positions, discarded_beads
 
-    def _find_bead_positions(self, image, xy_beads, no_filter=False):
+    def _get_dog_sigmas(self, layer) -> Optional[np.ndarray]:
+        """Gaussian (z, y, x) sigmas in pixels of a bead, from NA, emission and RI."""
+        metadata = getattr(layer, "metadata", None) or {}
+        emission = metadata.get("EmissionWavelength")
+        numeric_aparature = self.optics.get("NA")
+        reflective_index = self.optics.get("RI_mounting_medium")
+        if None in (emission, numeric_aparature, reflective_index):
+            print(f"Missing emission, NA or RI for the DoG detector, using the projection detector | "
+                  f"Emission: {emission} | NA: {numeric_aparature} | RI: {reflective_index}")
+            return None
+
+        fwhm = np.array([
+            get_expected_bead_z_size(float(reflective_index), float(emission), float(numeric_aparature)),
+            get_expected_bead_yx_size(float(emission), float(numeric_aparature)),
+            get_expected_bead_yx_size(float(emission), float(numeric_aparature)),
+        ])
+        return fwhm / (2 * np.sqrt(2 * np.log(2))) / np.array(self.scale)
+
+    def _dog_peaks(self, channel_image, sigmas) -> List[Tuple]:
+        """(z, y, x) maxima of the Difference of Gaussians at the expected bead size, brightest first."""
+        image = np.asarray(channel_image, dtype=np.float32)
+        dog = gaussian_filter(image, sigmas) - gaussian_filter(image, self.dog_sigma_ratio * sigmas)
+        footprint = np.ones(tuple(2 * int(np.ceil(sigma)) + 1 for sigma in sigmas), dtype=bool)
+        peaks = peak_local_max(dog, footprint=footprint, threshold_rel=self.maxima_rel,
+                               threshold_abs=self.maxima_abs, exclude_border=0)
+        return [(z, y, x) for (z, y, x) in peaks]
+
+    def _z_positions(self, image, xy_beads) -> np.ndarray:
+        """Index of the median-filtered z profile maximum for each (y, x) position.
+
+        All profiles are gathered into one (Z, N) array and filtered along z
+        in a single call, which equals filtering each 1D profile on its own.
+        """
+        if len(xy_beads) == 0:
+            return np.empty(0, dtype=int)
+        z_profiles = self._read_z_profiles(image, xy_beads)
+        return np.argmax(self._median_filter(z_profiles, size=(2, 1)), axis=0)
+
+    def _find_bead_positions(self, image, xy_beads, no_filter=False, z_positions=None):
         bead_pos = []
         discarded_beads = []
         z_border = self.bounding_box_px[0] / 2
-        for (y, x) in xy_beads:
-            z_profile = image[:, y, x]
-
-            z_profile_median = self._median_filter(z_profile, size=2)
-
-            z = np.argmax(z_profile_median)
+        if z_positions is None:
+            z_positions = self._z_positions(image, xy_beads)
+        for (y, x), z in zip(xy_beads, z_positions):
             if 0 + z_border < z < image.shape[0] - z_border or no_filter:
                 bead_pos.append((z, y, x))
             else:
@@ -152,30 +300,143 @@ class BeadFinder:
 
         return bead_pos, discarded_beads
 
+    def _read_z_profiles(self, image, xy_beads) -> np.ndarray:
+        """(Z, N) array of the z profiles through each (y, x) position.
+
+        In chunked mode the profiles are read tile by tile, each tile as one
+        block bounding its beads, so a lazy or memory-mapped image is read
+        once per tile instead of once per bead.
+        """
+        positions = np.array(xy_beads, dtype=int).reshape(-1, 2)
+        if not self._use_tiles(image):
+            return image[:, positions[:, 0], positions[:, 1]]
+
+        profiles = np.empty((image.shape[0], len(positions)), dtype=image.dtype)
+        tile_ids = positions // self.tile_size
+        for tile_id in np.unique(tile_ids, axis=0):
+            in_tile = np.flatnonzero(np.all(tile_ids == tile_id, axis=1))
+            low = positions[in_tile].min(axis=0)
+            high = positions[in_tile].max(axis=0) + 1
+            block = np.asarray(image[:, low[0]:high[0], low[1]:high[1]])
+            local = positions[in_tile] - low
+            profiles[:, in_tile] = block[:, local[:, 0], local[:, 1]]
+        return profiles
+
+    def _tiles(self, shape, halo):
+        """Yield (interior, halo) slice pairs covering a 2D shape in tiles."""
+        for y0 in range(0, shape[0], self.tile_size):
+            for x0 in range(0, shape[1], self.tile_size):
+                interior = (slice(y0, min(y0 + self.tile_size, shape[0])), slice(x0, min(x0 + self.tile_size, shape[1])))
+                with_halo = tuple(slice(max(s.start - halo, 0), min(s.stop + halo, size)) for s, size in zip(interior, shape))
+                yield interior, with_halo
+
+    def _tiled_median_max_projection(self, image, size=3) -> np.ndarray:
+        """Median-filtered max projection, read in tiles and z slabs.
+
+        Each tile is filtered with a halo of size // 2 pixels, which makes
+        the result identical to filtering the whole projection.
+        """
+        projection = np.empty(image.shape[1:], dtype=image.dtype)
+        for interior, (ys, xs) in self._tiles(image.shape[1:], halo=size // 2):
+            tile = None
+            for z0 in range(0, image.shape[0], self.z_slab_size):
+                slab = np.asarray(image[z0:z0 + self.z_slab_size, ys, xs]).max(axis=0)
+                tile = slab if tile is None else np.maximum(tile, slab)
+            filtered = self._median_filter(tile, size=size)
+            projection[interior] = filtered[interior[0].start - ys.start:interior[0].stop - ys.start,
+                                            interior[1].start - xs.start:interior[1].stop - xs.start]
+        return projection
+
+    def _cached_peaks(self, channel_image, layer) -> List[Tuple]:
+        """Peaks of a layer, reusing its cached projection and maxima.
+
+        A threshold only drops the dimmer maxima, so maxima found at a lower
+        threshold are filtered instead of searched again.
+        """
+        entry = self.cache.get(layer)
+        if entry is None:
+            if self._use_tiles(channel_image):
+                median_image = self._tiled_median_max_projection(channel_image)
+            else:
+                median_image = self._median_filter(self._max_projection(channel_image))
+            entry = {"median_image": median_image, "threshold": np.inf}
+
+        median_image = entry["median_image"]
+        threshold = max(self.maxima_abs, self.maxima_rel * median_image.max())
+        if threshold < entry["threshold"]:
+            if self._use_tiles(channel_image):
+                peaks = np.array(self._tiled_peaks(median_image, threshold=threshold), dtype=int).reshape(-1, 2)
+            else:
+                peaks = peak_local_max(median_image, min_distance=self.min_peak_distance,
+                                       threshold_abs=threshold, exclude_border=0)
+            entry = {
+                "median_image": median_image,
+                "threshold": threshold,
+                "peaks": peaks,
+                "intensities": median_image[peaks[:, 0], peaks[:, 1]],
+            }
+            self.cache.put(layer, entry)
+
+        return [(y, x) for (y, x) in entry["peaks"][entry["intensities"] > threshold]]
+
+    def _tiled_peaks(self, image, threshold=None) -> List[Tuple]:
+        """`peak_local_max` run tile by tile, ordered and thresholded like a single call.
+
+        The relative threshold is resolved against the maximum of the whole
+        image. Tiles are searched with a halo of twice the minimum peak
+        distance and only keep peaks in their interior. Peaks of neighbouring
+        tiles closer than the minimum distance are merged, keeping the
+        brightest, as `peak_local_max` does within an image.
+        """
+        if threshold is None:
+            threshold = max(self.maxima_abs, self.maxima_rel * image.max())
+        halo = 2 * self.min_peak_distance
+        peaks = []
+        for interior, (ys, xs) in self._tiles(image.shape, halo=halo):
+            tile_peaks = peak_local_max(image[ys, xs], min_distance=self.min_peak_distance,
+                                        threshold_abs=threshold, exclude_border=0)
+            tile_peaks += (ys.start, xs.start)
+            inside = ((interior[0].start <= tile_peaks[:, 0]) & (tile_peaks[:, 0] < interior[0].stop) &
+                      (interior[1].start <= tile_peaks[:, 1]) & (tile_peaks[:, 1] < interior[1].stop))
+            peaks.append(tile_peaks[inside])
+        peaks = np.concatenate(peaks) if peaks else np.empty((0, 2), dtype=int)
+
+        # Brightest first, ties in raster order like a single `peak_local_max` call.
+        peaks = peaks[np.lexsort((peaks[:, 1], peaks[:, 0], -image[peaks[:, 0], peaks[:, 1]]))]
+        keep = np.ones(len(peaks), dtype=bool)
+        for i, j in sorted(cKDTree(peaks).query_pairs(r=self.min_peak_distance, p=np.inf)):
+            if keep[i] and (peaks[i] // self.tile_size != peaks[j] // self.tile_size).any():
+                keep[j] = False
+        return [(y, x) for (y, x) in peaks[keep]]
+
     def filter_beads_by_neighbour_distance(self, beads, discarded_beads):
+        """Discard every bead with another bead inside its box (half_box in each direction)."""
         discarded_beads = []
         valid_beads = []
         half_box = self.bounding_box_px / 2.0
-
-        all_beads = beads + discarded_beads
-        for bead in beads:
-            is_valid = True
-            for neighbour in all_beads:
-                if bead == neighbour:
-                    continue
-                # Check if each coordinate of neighbour is within bead \+\/\- half_box
-                if (bead[0] - half_box[0] <= neighbour[0] <= bead[0] + half_box[0] and
-                        bead[1] - half_box[1] <= neighbour[1] <= bead[1] + half_box[1] and
-                        bead[2] - half_box[2] <= neighbour[2] <= bead[2] + half_box[2]):
-                    is_valid = False
-                    break
-            if is_valid:
-                valid_beads.append(bead)
-            else:
+        if len(beads) == 0:
+            return valid_beads, discarded_beads
+
+        # Scaled by half_box, the box turns into a Chebyshev ball of radius 1. The tree only
+        # proposes candidate pairs; the box test itself runs on the unscaled coordinates.
+        positions = np.array(beads, dtype=np.float64)
+        tree = cKDTree(positions / half_box)
+        pairs = tree.query_pairs(r=1 + 1e-9, p=np.inf, output_type="ndarray")
+
+        crowded = np.zeros(len(beads), dtype=bool)
+        for bead_index, neighbour_index in ((pairs[:, 0], pairs[:, 1]), (pairs[:, 1], pairs[:, 0])):
+            bead, neighbour = positions[bead_index], positions[neighbour_index]
+            in_box = np.all((bead - half_box <= neighbour) & (neighbour <= bead + half_box), axis=1)
+            in_box &= np.any(bead != neighbour, axis=1)
+            crowded[bead_index[in_box]] = True
+
+        for bead, is_crowded in zip(beads, crowded):
+            if is_crowded:
                 discarded_beads.append(bead)
+            else:
+                valid_beads.append(bead)
         return valid_beads, discarded_beads
 
-
     def set_settings(self, settings_dict):
         self.yx_border_padding = settings_dict['yx_border_padding']
         self.z_border_padding = settings_dict['z_border_padding']
@@ -0,0 +1,59 @@
+import os
+
+import yaml
+from napari.settings import get_settings
+from pydantic import ValidationError
+
+from psf_analysis_CFIM.config.settings_model import PSFAnalysisPluginSettings
+
+SETTINGS_FILE_NAME = "psf_analysis_CFIM_settings.yaml"
+
+
+def get_settings_folder_path() -> str:
+    """
+        The settings file lives next to the napari settings.
+    """
+    return os.path.dirname(os.path.abspath(get_settings().config_path))
+
+
+def deep_merge(defaults: dict, user_data: dict) -> dict:
+    """
+    Recursively merge user_data into defaults without overwriting existing keys.
+    """
+    result = defaults.copy()
+    for key, value in user_data.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = deep_merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+def migrate_settings_if_needed(data: dict) -> tuple[dict, bool]:
+    version = data.get("version", "0.0")
+    newest_version = PSFAnalysisPluginSettings.__version__
+    if version == newest_version:
+        return data, False
+
+    print(f"[*] Detected settings version {version}, upgrading to {newest_version}")
+
+    defaults = PSFAnalysisPluginSettings().dict()
+    merged = deep_merge(defaults, data)
+    merged["version"] = newest_version
+
+    return merged, True
+
+
+def read_plugin_settings() -> dict:
+    """
+        Reads the settings file without creating a widget, for code running outside of it (e.g. readers).
+        Falls back to the defaults if the file is missing or invalid.
+    """
+    settings_file_path = os.path.join(get_settings_folder_path(), SETTINGS_FILE_NAME)
+    try:
+        with open(settings_file_path, "r") as file:
+            raw_data = yaml.safe_load(file)
+        updated_data, _ = migrate_settings_if_needed(raw_data)
+        return PSFAnalysisPluginSettings(**updated_data).model_dump()
+    except (OSError, AttributeError, yaml.YAMLError, ValidationError) as e:
+        print(f"[!] Failed to read settings, using defaults: {e}")
+        return PSFAnalysisPluginSettings().model_dump()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, conint, confloat, conlist
-from typing import List
+from typing import List, Literal
 import os
 
 def get_default_output_folder() -> str:
@@ -10,16 +10,38 @@ class BeadFinderSettings(BaseModel):
     debug: bool = False
     maxima_rel: float = 0.2
     maxima_abs: float = 0
+    chunked: bool = False
+    tile_size: conint(gt=0) = 1024
+    parallel_channels: bool = False
+    detector: Literal["projection", "dog"] = "projection"
 
 class RenderSettings(BaseModel):
     covariance_ellipsoid: bool = False
     coordinate_annotation: bool = False
 
+class FitSettings(BaseModel):
+    zyx_parameterization: Literal["covariance", "precision"] = "covariance"
+    zyx_warm_start: bool = False
+    zyx_warm_start_bounds: bool = False
+    quality_gates: bool = False
+    support_mask: bool = False
+    support_sigma: confloat(gt=0) = 3.0
+    support_background_stride: conint(gt=0) = 8
+
 class PSFSettings(BaseModel):
     render_settings: RenderSettings = RenderSettings()
+    fit_settings: FitSettings = FitSettings()
 
 class AnalyzerSettings(BaseModel):
     psf_settings: PSFSettings = PSFSettings()
+    analysis_mode: Literal["sequential", "batched", "moments", "parallel"] = "sequential"
+    batch_size: conint(gt=0) = 32
+    workers: conint(gt=0) = 4
+    figure_memory_budget_mb: conint(ge=0) = 256
+    average_registration: bool = False
+    checkpoint: bool = False
+    resume: bool = False
+    extended_results: bool = False
     debug: bool = False
 
 class IntensitySettings(BaseModel):
@@ -44,6 +66,10 @@ class UISettings(BaseModel):
     box_size_z: conint(gt=0) = 2500
     ri_mounting_medium: confloat(gt=0.9, lt=2) = 1.4
 
+class ReaderSettings(BaseModel):
+    lazy: bool = False
+    roi: bool = False
+
 class PSFAnalysisPluginSettings(BaseModel):
     __version__: str = "1.7.10"
 
@@ -55,4 +81,5 @@ class PSFAnalysisPluginSettings(BaseModel):
     image_analysis_settings: ImageAnalysisSettings = ImageAnalysisSettings()
     analyzer_settings: AnalyzerSettings = AnalyzerSettings()
     bead_finder_settings: BeadFinderSettings = BeadFinderSettings()
+    reader_settings: ReaderSettings = ReaderSettings()
 
@@ -7,8 +7,11 @@ import yaml
 from pydantic import BaseModel, ValidationError
 from qtpy.QtWidgets import QGroupBox, QWidget, QVBoxLayout, QPushButton
 
-from napari.settings import get_settings
-
+from psf_analysis_CFIM.config.io import (
+    SETTINGS_FILE_NAME,
+    get_settings_folder_path,
+    migrate_settings_if_needed,
+)
 from psf_analysis_CFIM.config.settings_model import PSFAnalysisPluginSettings
 
 class SettingsWidget(QWidget):
@@ -22,7 +25,7 @@ class SettingsWidget(QWidget):
 
         if debug: print(f"Debug | Settings folder path: {self.settings_folder_path}")
 
-        self.settings_name = "psf_analysis_CFIM_settings.yaml"
+        self.settings_name = SETTINGS_FILE_NAME
 
         self.settings_file_path = os.path.join(self.settings_folder_path, self.settings_name)
 
@@ -32,9 +35,7 @@ class SettingsWidget(QWidget):
             self._make_settings_file()
 
     def _init_settings_file_path(self):
-        napari_settings_path = get_settings().config_path
-        if self.debug: print(f"Debug | Napari settings path: {napari_settings_path}")
-        self.settings_folder_path = os.path.dirname(os.path.abspath(napari_settings_path))
+        self.settings_folder_path = get_settings_folder_path()
 
 
     def init_ui(self):
@@ -123,34 +124,6 @@ class SettingsWidget(QWidget):
             yaml.dump(self.settings.model_dump(), file, sort_keys=False)
 
 
-def deep_merge(defaults: dict, user_data: dict) -> dict:
-    """
-    Recursively merge user_data into defaults without overwriting existing keys.
-    """
-    result = defaults.copy()
-    for key, value in user_data.items():
-        if isinstance(value, dict) and isinstance(result.get(key), dict):
-            result[key] = deep_merge(result[key], value)
-        else:
-            result[key] = value
-    return result
-
-def migrate_settings_if_needed(data: dict) -> tuple[dict, bool]:
-    version = data.get("version", "0.0")
-    newest_version = PSFAnalysisPluginSettings.__version__
-    if version == newest_version:
-        return data, False
-
-    print(f"[*] Detected settings version {version}, upgrading to {newest_version}")
-
-    defaults = PSFAnalysisPluginSettings().dict()
-    merged = deep_merge(defaults, data)
-    merged["version"] = newest_version
-
-    return merged, True
-
-
-
 if __name__ == "__main__":
     print("Local | Running settings widget")
     widget = SettingsWidget()
@@ -3,7 +3,9 @@ import os
 from napari.utils.notifications import show_warning
 import importlib.util
 
+from psf_analysis_CFIM.config.io import read_plugin_settings
 from psf_analysis_CFIM.czi_reader.czi_metadata_processor import extract_key_metadata
+from psf_analysis_CFIM.czi_reader.czi_roi_reader import CziROIReader
 import numpy as np
 
 # Fail fast at import time if `bfio` is present; `bfio` is known to
@@ -42,13 +44,18 @@ def truncate_filename(filename, max_chars, split_before_max=True):
     return "".join(result)
 
 # TODO: Add to settings, Trunked filename length, split_before_max
-def read_czi(path):
+def read_czi(path, lazy=None, roi=None):
     """
         Loads a .czi file and return the data in a proper callable format.
         Made because I could not get a direct reader to work with napari.
 
         Parameters:
             path: str -> Path to the .czi file.
+            lazy: bool -> Return dask arrays that decode one z plane (subblock) at a time when accessed,
+                          instead of decoding every channel up front. Read from reader_settings if None.
+            roi: bool -> Return arrays that only decode the indexed region, so bead crops of mosaic files only
+                         read the tiles under them (see CziROIReader). Takes precedence over lazy. Read from
+                         reader_settings if None.
 
         Returns:
             callable -> A callable that returns a list of tuples with the data, metadata and layer type.
@@ -81,7 +88,14 @@ def read_czi(path):
             print(f"Failed to import `aicsimageio.readers.CziReader`: {e}", file=sys.stderr)
         raise
 
-    reader = CziReader(path)
+    if lazy is None or roi is None:
+        reader_settings = read_plugin_settings()["reader_settings"]
+        lazy = reader_settings["lazy"] if lazy is None else lazy
+        roi = reader_settings["roi"] if roi is None else roi
+
+    # One dask chunk per z plane, which matches the subblocks of non-mosaic acquisitions
+    reader = CziReader(path, chunk_dims=["Y", "X"]) if lazy or roi else CziReader(path)
+    roi_reader = CziROIReader(path) if roi else None
     file_name = os.path.basename(path)
     channels = reader.dims.C
     try:
@@ -96,7 +110,12 @@ def read_czi(path):
     layer_data_list = []
     for channel in range(channels):
 
-        data = reader.get_image_data("ZYX", T=0, C=channel)
+        if roi_reader is not None:
+            data = roi_reader.get_channel(channel)
+        elif lazy:
+            data = reader.get_image_dask_data("ZYX", T=0, C=channel)
+        else:
+            data = reader.get_image_data("ZYX", T=0, C=channel)
 
         metadata = metadata_list[channel]
 
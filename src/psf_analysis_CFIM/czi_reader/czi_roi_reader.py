@@ -0,0 +1,138 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class CziROIReader:
+    """
+    Region reads of a .czi file, built on `aicspylibczi`.
+
+    Mosaic files are read with `read_mosaic` by region, which only decodes
+    the subblocks (tiles) that intersect it. Other files hold one subblock
+    per plane, so there a region read decodes the whole plane and crops it.
+    Coordinates are pixels (z, y, x), with the origin at the corner of the
+    mosaic bounding box.
+    """
+
+    def __init__(self, path: str):
+        from aicspylibczi import CziFile
+
+        self._czi = CziFile(path)
+        self._dims = {dim: end - start for dim, (start, end) in self._czi.get_dims_shape()[0].items()}
+        self._mosaic = self._czi.is_mosaic()
+
+        z_size = self._dims.get("Z", 1)
+        if self._mosaic:
+            bounding_box = self._czi.get_mosaic_bounding_box()
+            self._origin = (bounding_box.y, bounding_box.x)
+            self.shape = (z_size, bounding_box.h, bounding_box.w)
+        else:
+            self._origin = (0, 0)
+            self.shape = (z_size, self._dims["Y"], self._dims["X"])
+
+    @property
+    def channels(self) -> int:
+        return self._dims.get("C", 1)
+
+    def get_channel(self, channel: int) -> "CziROIArray":
+        """Array-like (Z, Y, X) view of a channel, decoded on indexing."""
+        return CziROIArray(self, channel)
+
+    def read_region(self, channel: int, z_slice: slice, y_slice: slice, x_slice: slice) -> np.ndarray:
+        """Decode a (z, y, x) box of a channel; slices are in bounds and have no step."""
+        box_shape = tuple(s.stop - s.start for s in (z_slice, y_slice, x_slice))
+        if 0 in box_shape:
+            # Empty boxes still take the dtype of the image
+            dtype = self._read_plane(channel, 0, slice(0, 1), slice(0, 1)).dtype
+            return np.empty(box_shape, dtype=dtype)
+        return np.stack([self._read_plane(channel, z, y_slice, x_slice) for z in range(z_slice.start, z_slice.stop)])
+
+    def _read_plane(self, channel: int, z: int, y_slice: slice, x_slice: slice) -> np.ndarray:
+        kwargs = {dim: index for dim, index in (("C", channel), ("Z", z), ("T", 0)) if dim in self._dims}
+        if self._mosaic:
+            data = self._czi.read_mosaic(
+                region=(
+                    self._origin[1] + x_slice.start,
+                    self._origin[0] + y_slice.start,
+                    x_slice.stop - x_slice.start,
+                    y_slice.stop - y_slice.start,
+                ),
+                scale_factor=1.0,
+                **kwargs,
+            )
+            return data.reshape(data.shape[-2:])
+
+        if "S" in self._dims:
+            kwargs["S"] = 0
+        data, _ = self._czi.read_image(**kwargs)
+        return data.reshape(data.shape[-2:])[y_slice, x_slice]
+
+
+class CziROIArray:
+    """
+    Array-like (Z, Y, X) channel of a `CziROIReader`.
+
+    Integer and slice indexing only decodes the indexed box, so bead crops
+    (`BeadExtractor`) and tiled reads (`BeadFinder`, image QC) of a mosaic
+    touch only the tiles under them. `np.asarray` reads the whole channel.
+    """
+
+    ndim = 3
+
+    def __init__(self, reader: CziROIReader, channel: int):
+        self._reader = reader
+        self._channel = channel
+        self.shape: Tuple[int, int, int] = reader.shape
+        self._dtype = None
+
+    @property
+    def dtype(self) -> np.dtype:
+        if self._dtype is None:
+            self._dtype = self[0, 0:1, 0:1].dtype
+        return self._dtype
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :, :]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if Ellipsis in key:
+            position = key.index(Ellipsis)
+            key = key[:position] + (slice(None),) * (self.ndim - len(key) + 1) + key[position + 1:]
+        if len(key) > self.ndim:
+            raise IndexError(f"Too many indices for a {self.ndim}D array: {key}")
+        key = key + (slice(None),) * (self.ndim - len(key))
+
+        box, steps, squeezed = [], [], []
+        for axis, (index, size) in enumerate(zip(key, self.shape)):
+            if isinstance(index, (int, np.integer)):
+                if not -size <= index < size:
+                    raise IndexError(f"Index {index} is out of bounds for axis {axis} with size {size}")
+                index = int(index) % size
+                box.append(slice(index, index + 1))
+                steps.append(slice(None))
+                squeezed.append(axis)
+            elif isinstance(index, slice):
+                indices = range(*index.indices(size))
+                if len(indices) == 0:
+                    box.append(slice(0, 0))
+                    steps.append(slice(None))
+                    continue
+                low, high = min(indices), max(indices) + 1
+                box.append(slice(low, high))
+                stop = indices.stop - low
+                steps.append(slice(indices.start - low, stop if stop >= 0 else None, indices.step))
+            else:
+                raise IndexError(f"Only integers and slices can index a CziROIArray, got {type(index).__name__}")
+
+        data = self._reader.read_region(self._channel, *box)[tuple(steps)]
+        return data.squeeze(axis=tuple(squeezed)) if squeezed else data
@@ -1,4 +1,8 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import get_context
 from os.path import join
 from typing import Optional, Tuple
 
@@ -6,17 +10,139 @@ import numpy as np
 import pandas as pd
 from botocore.model import InvalidShapeError
 from numpy._typing import ArrayLike
+from pydantic import ValidationError
 
 from psf_analysis_CFIM.debug.debug import report_error_debug
 from psf_analysis_CFIM.error_widget.error_display_widget import report_error
+from psf_analysis_CFIM.psf_analysis.bead_averager import BeadAverager
+from psf_analysis_CFIM.psf_analysis.checkpoint import AnalysisCheckpoint
 from psf_analysis_CFIM.psf_analysis.extract.BeadExtractor import BeadExtractor
+from psf_analysis_CFIM.psf_analysis.fit.batched_fitter import BatchedZYXFitter
+from psf_analysis_CFIM.psf_analysis.fit.moment_estimator import MomentEstimator
+from psf_analysis_CFIM.psf_analysis.figure_stack import SummaryFigureStack
 from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.parallel import analyze_bead
 from psf_analysis_CFIM.psf_analysis.parameters import PSFAnalysisInputs
-from psf_analysis_CFIM.psf_analysis.psf import PSF
+from psf_analysis_CFIM.psf_analysis.psf import PSF, PSFRenderEngine
+from psf_analysis_CFIM.psf_analysis.records import PSFRecord
+from psf_analysis_CFIM.psf_analysis.results_store import ResultsStore
+
+
+# Columns of the result table in order, with the record field each one is
+# read from. Columns without a field are filled in by `Analyzer._add`. The Z
+# and YX centers are stored in image coordinates, the ZYX ones in crop
+# coordinates. The extended columns are only added with the
+# `extended_results` setting, so the default table keeps its schema. Moment
+# estimates always get the AnalysisMode column, which marks them.
+_RESULT_COLUMNS = [
+    ("ImageName", None),
+    ("Date", None),
+    ("Microscope", None),
+    ("Magnification", None),
+    ("NA", None),
+    ("Emission", None),
+    ("Excitation", None),
+    ("AiryUnit", None),
+    ("Amplitude_1D_Z", "z_amp"),
+    ("Amplitude_2D_XY", "yx_amp"),
+    ("Amplitude_3D_XYZ", "zyx_amp"),
+    ("Background_1D_Z", "z_bg"),
+    ("Background_2D_XY", "yx_bg"),
+    ("Background_3D_XYZ", "zyx_bg"),
+    ("Z_1D", "z_mu"),
+    ("X_2D", "x_mu"),
+    ("Y_2D", "y_mu"),
+    ("X_3D", "zyx_x_mu"),
+    ("Y_3D", "zyx_y_mu"),
+    ("Z_3D", "zyx_z_mu"),
+    ("FWHM_1D_Z", "z_fwhm"),
+    ("FWHM_2D_X", "x_fwhm"),
+    ("FWHM_2D_Y", "y_fwhm"),
+    ("FWHM_3D_Z", "zyx_z_fwhm"),
+    ("FWHM_3D_Y", "zyx_y_fwhm"),
+    ("FWHM_3D_X", "zyx_x_fwhm"),
+    ("FWHM_PA1_2D", "yx_pc1_fwhm"),
+    ("FWHM_PA2_2D", "yx_pc2_fwhm"),
+    ("FWHM_PA1_3D", "zyx_pc1_fwhm"),
+    ("FWHM_PA2_3D", "zyx_pc2_fwhm"),
+    ("FWHM_PA3_3D", "zyx_pc3_fwhm"),
+    ("SignalToBG_1D_Z", None),
+    ("SignalToBG_2D_XY", None),
+    ("SignalToBG_3D_XYZ", None),
+    ("xy_pixelsize", None),
+    ("z_spacing", None),
+    ("cov_xx_3D", "zyx_cxx"),
+    ("cov_xy_3D", "zyx_cyx"),
+    ("cov_xz_3D", "zyx_czx"),
+    ("cov_yy_3D", "zyx_cyy"),
+    ("cov_yz_3D", "zyx_czy"),
+    ("cov_zz_3D", "zyx_czz"),
+    ("cov_xx_2D", "yx_cxx"),
+    ("cov_xy_2D", "yx_cyx"),
+    ("cov_yy_2D", "yx_cyy"),
+    ("sde_amp_1D_Z", "z_amp_sde"),
+    ("sde_amp_2D_XY", "yx_amp_sde"),
+    ("sde_amp_3D_XYZ", "zyx_amp_sde"),
+    ("sde_background_1D_Z", "z_bg_sde"),
+    ("sde_background_2D_XY", "yx_bg_sde"),
+    ("sde_background_3D_XYZ", "zyx_bg_sde"),
+    ("sde_Z_1D", "z_mu_sde"),
+    ("sde_X_2D", "x_mu_sde"),
+    ("sde_Y_2D", "y_mu_sde"),
+    ("sde_X_3D", "zyx_x_mu_sde"),
+    ("sde_Y_3D", "zyx_y_mu_sde"),
+    ("sde_Z_3D", "zyx_z_mu_sde"),
+    ("sde_cov_xx_3D", "zyx_cxx_sde"),
+    ("sde_cov_xy_3D", "zyx_cyx_sde"),
+    ("sde_cov_xz_3D", "zyx_czx_sde"),
+    ("sde_cov_yy_3D", "zyx_cyy_sde"),
+    ("sde_cov_yz_3D", "zyx_czy_sde"),
+    ("sde_cov_zz_3D", "zyx_czz_sde"),
+    ("sde_cov_xx_2D", "yx_cxx_sde"),
+    ("sde_cov_xy_2D", "yx_cyx_sde"),
+    ("sde_cov_yy_2D", "yx_cyy_sde"),
+    ("z_pos", "z_mu"),
+    ("y_pos", "y_mu"),
+    ("x_pos", "x_mu"),
+    ("version", None),
+    ("PSF_path", None),
+]
+_EXTENDED_COLUMNS = [
+    ("AnalysisMode", None),
+    *[
+        (f"{column}_{suffix}", prefix + field)
+        for prefix, suffix in (("z_", "1D_Z"), ("yx_", "2D_XY"), ("zyx_", "3D_XYZ"))
+        for field, column in (
+            ("nfev", "nfev"),
+            ("fit_time", "fit_time"),
+            ("cost", "fit_cost"),
+            ("status", "fit_status"),
+            ("retries", "fit_retries"),
+        )
+    ],
+]
+_OBJECT_COLUMNS = (
+    "ImageName",
+    "Date",
+    "Microscope",
+    "Magnification",
+    "Emission",
+    "Excitation",
+    "AiryUnit",
+    "version",
+    "AnalysisMode",
+    "PSF_path",
+)
 
 
 class Analyzer:
-    def __init__(self, parameters: PSFAnalysisInputs, analyzer_settings: dict, info_dict=None):
+    def __init__(
+        self,
+        parameters: PSFAnalysisInputs,
+        analyzer_settings: dict,
+        info_dict=None,
+        checkpoint_folder: Optional[str] = None,
+    ):
         if info_dict is None:
             info_dict = {"wavelength_color": "black",
                         "wavelength": "",
@@ -40,14 +166,57 @@ class Analyzer:
 
 
         self._extractor_points_diff = len(self._parameters.point_data) - len(self._beads)
-        self._results = None
+        self._columns = _RESULT_COLUMNS
+        if self._settings.get("extended_results", False):
+            self._columns = _RESULT_COLUMNS + _EXTENDED_COLUMNS
+        elif self._settings.get("analysis_mode") == "moments":
+            self._columns = _RESULT_COLUMNS + [("AnalysisMode", None)]
+        self._results = ResultsStore(
+            capacity=len(self._beads),
+            columns=[column for column, _ in self._columns],
+            object_columns=_OBJECT_COLUMNS,
+        )
         self._result_figures = {}
+        self._averager = BeadAverager(
+            shape=tuple(int(margin) for margin in self._bead_margins),
+            spacing=self._parameters.spacing,
+            register=self._settings.get("average_registration", False),
+        )
         self._index = 0
 
+        self._analysis_mode = self._settings.get("analysis_mode", "sequential")
+        self._batch_size = self._settings.get("batch_size", 32)
+        self._batched_zyx_records = {}
+        self._moment_records = None
+        self._workers = self._settings.get("workers", 4)
+        self._executor = None
+        self._parallel_queue = None
+        self._parallel_results = {}
+
+        self._checkpoint = None
+        self._checkpointed = {}
+        if checkpoint_folder is not None and self._settings.get("checkpoint", False):
+            self._checkpoint = AnalysisCheckpoint(
+                folder=checkpoint_folder,
+                image_name=self._parameters.name,
+                settings={
+                    "psf_settings": self._settings.get("psf_settings"),
+                    "analysis_mode": self._analysis_mode,
+                    "spacing": self._parameters.spacing,
+                    "patch_size": self._parameters.patch_size,
+                },
+            )
+            if self._settings.get("resume", False):
+                self._checkpointed = self._checkpoint.load()
+            else:
+                self._checkpoint.clear()
+
         self._debug = self._settings.get("debug")
 
         if self._debug:
             print(f"Debug | Analyzer for {self._wavelength} with {len(self._beads)} beads")
+            if self._checkpointed:
+                print(f"Debug | Resuming with {len(self._checkpointed)} checkpointed beads")
 
     def __iter__(self):
         return self
@@ -59,38 +228,136 @@ class Analyzer:
         if self._index < len(self._beads):
             bead = self._beads[self._index]
             try:
-                if bead.data.shape != (int(self._bead_margins[0]), int(self._bead_margins[1]), int(self._bead_margins[2])):
-                    raise InvalidShapeError(f"Discarding bead with invalid shape: {bead.data.shape}")
-                if 0 in bead.data.shape:
+                if not self._has_valid_shape(bead):
                     raise InvalidShapeError(f"Discarding bead with invalid shape: {bead.data.shape}")
-                psf = PSF(image=bead, psf_settings=self._settings["psf_settings"])
-                psf.analyze()
-                if psf.error:
-                    raise InvalidShapeError(f"Discarding bead due to analyze error: {self._index}")
-                results = psf.get_summary_dict()
-                extended_results = self._extend_result_table(bead, results)
-                self._add(
-                    extended_results,
-                    psf.get_summary_image(
-                        date=self._parameters.date,
-                        version=self._parameters.version,
-                        dpi=self._parameters.dpi,
-                        ellipsoid_color=self._wavelength_color,
-                        centroid= (extended_results["z_mu"], extended_results["y_mu"], extended_results["x_mu"]),
-                    ),
-                )
+                if self._is_checkpointed(self._index):
+                    psf_record = self._checkpointed[tuple(bead.offset)]
+                    if psf_record is None:
+                        raise InvalidShapeError(f"Discarding bead discarded before resuming: {self._index}")
+                    psf = PSF(image=bead, psf_settings=self._settings["psf_settings"])
+                    psf.psf_record = psf_record
+                elif self._analysis_mode == "moments":
+                    psf_record = self._get_moment_record(self._index)
+                    if psf_record is None:
+                        raise InvalidShapeError(f"Discarding bead without signal: {self._index}")
+                    psf = PSF(image=bead, psf_settings=self._settings["psf_settings"])
+                    psf.psf_record = psf_record
+                elif self._analysis_mode == "parallel":
+                    psf_record = self._get_parallel_record(self._index)
+                    if psf_record is None:
+                        raise InvalidShapeError(f"Discarding bead due to analyze error: {self._index}")
+                    psf = PSF(image=bead, psf_settings=self._settings["psf_settings"])
+                    psf.psf_record = psf_record
+                else:
+                    zyx_fit_record = None
+                    if self._analysis_mode == "batched":
+                        zyx_fit_record = self._get_batched_zyx_record(self._index)
+                        if zyx_fit_record is None:
+                            raise InvalidShapeError(f"Discarding bead due to batched fit error: {self._index}")
+                    psf = PSF(image=bead, psf_settings=self._settings["psf_settings"])
+                    psf.analyze(zyx_fit_record=zyx_fit_record)
+                    if psf.error:
+                        raise InvalidShapeError(f"Discarding bead due to analyze error: {self._index}")
+                self._add(bead, psf)
+                self._write_checkpoint(bead, psf.get_record())
             except InvalidShapeError as e:
                 self._invalid_beads_index.append(self._index)
+                self._write_checkpoint(bead, None)
                 # min_cord, max_cord = bead.get_box()
                 report_error("", bead.get_middle_coordinates())
 
             self._index += 1
             return self._index + self._extractor_points_diff, self._wavelength_color
         else:
+            self.close()
+            if self._checkpoint is not None:
+                self._checkpoint.clear()
             if self._debug:
                 print(f"Analyzer {self._wavelength}| Finished analyzing {len(self._beads)} beads")
             raise StopIteration()
 
+    def _has_valid_shape(self, bead: Calibrated3DImage) -> bool:
+        expected_shape = tuple(int(margin) for margin in self._bead_margins)
+        return bead.data.shape == expected_shape and 0 not in bead.data.shape
+
+    def _is_checkpointed(self, index: int) -> bool:
+        return tuple(self._beads[index].offset) in self._checkpointed
+
+    def _write_checkpoint(self, bead: Calibrated3DImage, psf_record: Optional[PSFRecord]):
+        """Log a finished bead, unless it was read from the checkpoint."""
+        if self._checkpoint is not None and tuple(bead.offset) not in self._checkpointed:
+            self._checkpoint.append(bead.offset, psf_record)
+
+    def _get_batched_zyx_record(self, index: int):
+        """Return the ZYX record of a bead, fitting the next batch of beads if needed."""
+        if index not in self._batched_zyx_records:
+            batch_indices = [
+                i for i in range(index, min(index + self._batch_size, len(self._beads)))
+                if self._has_valid_shape(self._beads[i]) and not self._is_checkpointed(i)
+            ]
+            records = BatchedZYXFitter(images=[self._beads[i] for i in batch_indices]).fit()
+            self._batched_zyx_records.update(zip(batch_indices, records))
+
+        return self._batched_zyx_records.pop(index)
+
+    def _get_moment_record(self, index: int):
+        """Return the moment estimate of a bead, estimating all beads on first use."""
+        if self._moment_records is None:
+            valid_indices = [
+                i for i, bead in enumerate(self._beads)
+                if self._has_valid_shape(bead) and not self._is_checkpointed(i)
+            ]
+            self._moment_records = {}
+            if valid_indices:
+                records = MomentEstimator(images=[self._beads[i] for i in valid_indices]).estimate()
+                self._moment_records.update(zip(valid_indices, records))
+
+        return self._moment_records.pop(index)
+
+    def _get_parallel_record(self, index: int):
+        """
+        Return the PSF record of a bead, fitted in the process pool.
+
+        Beads are submitted in order, keeping at most two per worker in
+        flight, so a cancelled analysis leaves little work behind.
+        """
+        if self._parallel_queue is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=get_context("spawn"),
+            )
+            self._parallel_queue = [
+                i for i, bead in enumerate(self._beads)
+                if self._has_valid_shape(bead) and not self._is_checkpointed(i)
+            ]
+            self._parallel_queue.reverse()
+
+        while self._parallel_queue and len(self._parallel_results) < 2 * self._workers:
+            i = self._parallel_queue.pop()
+            bead = self._beads[i]
+            self._parallel_results[i] = self._executor.submit(
+                analyze_bead,
+                bead.data,
+                bead.spacing,
+                bead.offset,
+                self._settings["psf_settings"],
+            )
+
+        try:
+            return self._parallel_results.pop(index).result()
+        except BrokenProcessPool:
+            raise
+        except (RuntimeError, TypeError, ValidationError) as e:  # The errors PSF.analyze treats as a failed fit
+            raise InvalidShapeError(f"Discarding bead due to worker error: {index} | {e}") from e
+
+    def close(self):
+        """Stop the process pool of the parallel mode, dropping beads not yet fitted."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._parallel_queue = []
+            self._parallel_results = {}
+
     def get_date(self):
         """Return the date of the image."""
         return self._parameters.date
@@ -114,8 +381,9 @@ class Analyzer:
     def get_centroids(self):
         """Return the centroids of the beads."""
         centroids = []
-        for i in range(len(self._results["x_mu"])):
-            centroids.append((int(self._results["z_mu"][i]), int(self._results["y_mu"][i]), int(self._results["x_mu"][i])))
+        z_mu, y_mu, x_mu = (self._results.column(c) for c in ("Z_1D", "Y_2D", "X_2D"))
+        for i in range(len(self._results)):
+            centroids.append((int(z_mu[i]), int(y_mu[i]), int(x_mu[i])))
         return centroids
 
 
@@ -129,49 +397,66 @@ class Analyzer:
         return beads
 
     def get_averaged_bead(self):
-        """Average the raw bead data before analysis."""
-        filtered_beads = [bead.data for bead in self.get_raw_beads_filtered()]
-        try:
-            averaged_bead_data = np.mean(filtered_beads, axis=0).astype(np.uint16)
-            averaged_bead = Calibrated3DImage(data=averaged_bead_data, spacing=self._parameters.spacing)
-            return averaged_bead
-        except (ValueError, AttributeError) as e:
-            print(f"Error getting average bead of {len(filtered_beads)} beads: {e}")
+        """Average of the raw data of the analyzed beads, accumulated while analyzing."""
+        averaged_bead = self._averager.get_average()
+        if averaged_bead is None:
+            print(f"Error getting average bead: no beads of {len(self._beads)} were analyzed")
             if self._debug:
-                report_error_debug(filtered_beads, "3d_array")
-
-
-
-    def _extend_result_table(self, bead, results):
-        extended_results = results.copy()
-        extended_results["z_mu"] += bead.offset[0] * self._parameters.spacing[0]
-        extended_results["y_mu"] += bead.offset[1] * self._parameters.spacing[1]
-        extended_results["x_mu"] += bead.offset[2] * self._parameters.spacing[2]
-        extended_results["image_name"] = self._parameters.name
-        extended_results["date"] = self._parameters.date
-        extended_results["microscope"] = self._parameters.microscope
-        extended_results["mag"] = self._parameters.magnification
-        extended_results["NA"] = self._parameters.na
-        extended_results["yx_spacing"] = self._parameters.spacing[1]
-        extended_results["z_spacing"] = self._parameters.spacing[0]
-        extended_results["version"] = self._parameters.version
-        return extended_results
-
-    def _add(self, result: dict, summary_fig: ArrayLike):
-        if self._results is None:
-            self._results = {}
-            for key in result.keys():
-                self._results[key] = [result[key]]
-            self._results["PSF_path"] = []
-        else:
-            for key in result.keys():
-                self._results[key].append(result[key])
+                report_error_debug([bead.data for bead in self._beads], "3d_array")
+        return averaged_bead
+
+
 
-        centroid = np.round([result["x_mu"], result["y_mu"], result["z_mu"]], 1)
-        bead_name = "{}_Bead_X{}_Y{}_Z{}".format(result["image_name"], *centroid)
+    def _add(self, bead: Calibrated3DImage, psf: PSF):
+        """Write the results of a bead into the result table and queue its summary figure."""
+        record = psf.get_record()
+        self._averager.add(
+            bead.data,
+            center=(record.zyx_fit.zyx_z_mu, record.zyx_fit.zyx_y_mu, record.zyx_fit.zyx_x_mu),
+        )
+        values = {**vars(record.z_fit), **vars(record.yx_fit), **vars(record.zyx_fit)}
+        values["z_mu"] += bead.offset[0] * self._parameters.spacing[0]
+        values["y_mu"] += bead.offset[1] * self._parameters.spacing[1]
+        values["x_mu"] += bead.offset[2] * self._parameters.spacing[2]
+
+        centroid = np.round([values["x_mu"], values["y_mu"], values["z_mu"]], 1)
+        bead_name = "{}_Bead_X{}_Y{}_Z{}".format(self._parameters.name, *centroid)
         unique_bead_name = self._make_unique(bead_name)
-        self._result_figures[unique_bead_name] = summary_fig
-        self._results["PSF_path"].append(join(unique_bead_name + ".png"))
+
+        row = {column: values[field] for column, field in self._columns if field is not None}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            row["SignalToBG_1D_Z"] = np.divide(values["z_amp"], values["z_bg"])
+            row["SignalToBG_2D_XY"] = np.divide(values["yx_amp"], values["yx_bg"])
+            row["SignalToBG_3D_XYZ"] = np.divide(values["zyx_amp"], values["zyx_bg"])
+        row.update(
+            {
+                "ImageName": self._parameters.name,
+                "Date": self._parameters.date,
+                "Microscope": self._parameters.microscope,
+                "Magnification": self._parameters.magnification,
+                "NA": self._parameters.na,
+                "Emission": self._wavelength,
+                "Excitation": self._excitation,
+                "AiryUnit": self._airy_unit,
+                "xy_pixelsize": self._parameters.spacing[1],
+                "z_spacing": self._parameters.spacing[0],
+                "version": self._parameters.version,
+                "PSF_path": join(unique_bead_name + ".png"),
+            }
+        )
+        if ("AnalysisMode", None) in self._columns:
+            row["AnalysisMode"] = "moments" if self._analysis_mode == "moments" else "fit"
+        self._results.add_row(row)
+
+        # Figures are rendered lazily, when shown or saved.
+        self._result_figures[unique_bead_name] = partial(
+            psf.get_summary_image,
+            date=self._parameters.date,
+            version=self._parameters.version,
+            dpi=self._parameters.dpi,
+            ellipsoid_color=self._wavelength_color,
+            centroid=(values["z_mu"], values["y_mu"], values["x_mu"]),
+        )
 
     def _make_unique(self, name: str):
         count = 1
@@ -182,20 +467,16 @@ class Analyzer:
         return unique_name
 
     def get_results(self) -> Optional[pd.DataFrame]:
-        """Create result table from dict.
-
-        Parameters
-        ----------
-        results :
-            Result dict obtained from `analyze_bead`
+        """Create result table from the results store.
 
         Returns
         -------
         result_table
-            Result table with "nice" column names
+            Result table with "nice" column names, sharing the numeric columns
+            with the store
         """
-        if self._results is not None:
-            return self._build_dataframe()
+        if len(self._results) > 0:
+            return self._results.to_dataframe()
         else:
             return None
 
@@ -203,9 +484,12 @@ class Analyzer:
         self,
         bead_img_scale: Tuple[float, float, float],
         bead_img_shape: Tuple[int, int, int],
-    ) -> Optional[Tuple[ArrayLike, ArrayLike]]:
+    ) -> Optional[Tuple[SummaryFigureStack, ArrayLike]]:
         """
-        Create a (N, Y, X, 3) stack of all summary figures.
+        Create a lazy (N, Y, X, 3) stack of all summary figures.
+
+        Figures are only rendered when the stack is indexed, see
+        `SummaryFigureStack`.
 
         Parameters
         ----------
@@ -237,92 +521,11 @@ class Analyzer:
         )
         return measurement_scale
 
-    def _build_figure_stack(self):
-        measurement_stack = np.stack(
-            [self._result_figures[k] for k in self._result_figures.keys()]
-        )
-        return measurement_stack
-
-    def  _build_dataframe(self):
-        return pd.DataFrame(
-            {
-                "ImageName": self._results["image_name"],
-                "Date": self._results["date"],
-                "Microscope": self._results["microscope"],
-                "Magnification": self._results["mag"],
-                "NA": self._results["NA"],
-                "Emission": self._wavelength,
-                "Excitation": self._excitation,
-                "AiryUnit": self._airy_unit,
-                "Amplitude_1D_Z": self._results["z_amp"],
-                "Amplitude_2D_XY": self._results["yx_amp"],
-                "Amplitude_3D_XYZ": self._results["zyx_amp"],
-                "Background_1D_Z": self._results["z_bg"],
-                "Background_2D_XY": self._results["yx_bg"],
-                "Background_3D_XYZ": self._results["zyx_bg"],
-                "Z_1D": self._results["z_mu"],
-                "X_2D": self._results["x_mu"],
-                "Y_2D": self._results["y_mu"],
-                "X_3D": self._results["zyx_x_mu"],
-                "Y_3D": self._results["zyx_y_mu"],
-                "Z_3D": self._results["zyx_z_mu"],
-                "FWHM_1D_Z": self._results["z_fwhm"],
-                "FWHM_2D_X": self._results["x_fwhm"],
-                "FWHM_2D_Y": self._results["y_fwhm"],
-                "FWHM_3D_Z": self._results["zyx_z_fwhm"],
-                "FWHM_3D_Y": self._results["zyx_y_fwhm"],
-                "FWHM_3D_X": self._results["zyx_x_fwhm"],
-                "FWHM_PA1_2D": self._results["yx_pc1_fwhm"],
-                "FWHM_PA2_2D": self._results["yx_pc2_fwhm"],
-                "FWHM_PA1_3D": self._results["zyx_pc1_fwhm"],
-                "FWHM_PA2_3D": self._results["zyx_pc2_fwhm"],
-                "FWHM_PA3_3D": self._results["zyx_pc3_fwhm"],
-                "SignalToBG_1D_Z": (
-                    np.array(self._results["z_amp"]) / np.array(self._results["z_bg"])
-                ).tolist(),
-                "SignalToBG_2D_XY": (
-                    np.array(self._results["yx_amp"]) / np.array(self._results["yx_bg"])
-                ).tolist(),
-                "SignalToBG_3D_XYZ": (
-                    np.array(self._results["zyx_amp"])
-                    / np.array(self._results["zyx_bg"])
-                ).tolist(),
-                "xy_pixelsize": self._results["yx_spacing"],# Changed these two from XYspacing and Zspacing
-                "z_spacing": self._results["z_spacing"],
-                "cov_xx_3D": self._results["zyx_cxx"],
-                "cov_xy_3D": self._results["zyx_cyx"],
-                "cov_xz_3D": self._results["zyx_czx"],
-                "cov_yy_3D": self._results["zyx_cyy"],
-                "cov_yz_3D": self._results["zyx_czy"],
-                "cov_zz_3D": self._results["zyx_czz"],
-                "cov_xx_2D": self._results["yx_cxx"],
-                "cov_xy_2D": self._results["yx_cyx"],
-                "cov_yy_2D": self._results["yx_cyy"],
-                "sde_amp_1D_Z": self._results["z_amp_sde"],
-                "sde_amp_2D_XY": self._results["yx_amp_sde"],
-                "sde_amp_3D_XYZ": self._results["zyx_amp_sde"],
-                "sde_background_1D_Z": self._results["z_bg_sde"],
-                "sde_background_2D_XY": self._results["yx_bg_sde"],
-                "sde_background_3D_XYZ": self._results["zyx_bg_sde"],
-                "sde_Z_1D": self._results["z_mu_sde"],
-                "sde_X_2D": self._results["x_mu_sde"],
-                "sde_Y_2D": self._results["y_mu_sde"],
-                "sde_X_3D": self._results["zyx_x_mu_sde"],
-                "sde_Y_3D": self._results["zyx_y_mu_sde"],
-                "sde_Z_3D": self._results["zyx_z_mu_sde"],
-                "sde_cov_xx_3D": self._results["zyx_cxx_sde"],
-                "sde_cov_xy_3D": self._results["zyx_cyx_sde"],
-                "sde_cov_xz_3D": self._results["zyx_czx_sde"],
-                "sde_cov_yy_3D": self._results["zyx_cyy_sde"],
-                "sde_cov_yz_3D": self._results["zyx_czx_sde"],
-                "sde_cov_zz_3D": self._results["zyx_czz_sde"],
-                "sde_cov_xx_2D": self._results["yx_cxx_sde"],
-                "sde_cov_xy_2D": self._results["yx_cyx_sde"],
-                "sde_cov_yy_2D": self._results["yx_cyy_sde"],
-                "z_pos": self._results["z_mu"],
-                "y_pos": self._results["y_mu"],
-                "x_pos": self._results["x_mu"],
-                "version": self._results["version"],
-                "PSF_path": self._results["PSF_path"],
-            }
+    def _build_figure_stack(self) -> SummaryFigureStack:
+        width, height = PSFRenderEngine.figure_size
+        dpi = self._parameters.dpi
+        return SummaryFigureStack(
+            figure_shape=(int(round(height * dpi)), int(round(width * dpi)), 3),
+            figures=list(self._result_figures.values()),
+            memory_budget=self._settings.get("figure_memory_budget_mb", 256) * 1024**2,
         )
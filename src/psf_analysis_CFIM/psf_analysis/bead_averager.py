@@ -0,0 +1,111 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy._typing import ArrayLike
+from scipy import fft
+
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+
+
+class BeadAverager:
+    """
+    Running average of equally shaped bead crops.
+
+    Crops are added to a float64 sum as they come in, so memory doesn't grow
+    with the number of beads. With `register` enabled, every crop is first
+    shifted so that its fitted center lands on the crop center (the voxel the
+    extractor put the intensity peak on). The shifts are applied in Fourier
+    space, on batches of `batch_size` crops at a time.
+
+    Shifts are meant to fix sub-pixel offsets; a crop whose fitted center is
+    more than `max_shift` pixels off is added unshifted, since a Fourier
+    shift wraps the crop around its borders.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, int, int],
+        spacing: Tuple[float, float, float],
+        register: bool = False,
+        batch_size: int = 16,
+        max_shift: float = 1.0,
+    ):
+        self.shape = tuple(int(s) for s in shape)
+        self.spacing = tuple(spacing)
+        self.register = register
+        self.batch_size = batch_size
+        self.max_shift = max_shift
+        self._sum = np.zeros(self.shape, dtype=np.float64)
+        self._count = 0
+        self._pending_crops: List[ArrayLike] = []
+        self._pending_shifts: List[ArrayLike] = []
+        self._phase_axes = None
+
+    def __len__(self) -> int:
+        return self._count + len(self._pending_crops)
+
+    def add(self, data: ArrayLike, center: Optional[Tuple[float, float, float]] = None):
+        """
+        Add one crop.
+
+        Parameters
+        ----------
+        data :
+            Bead crop of the averager's shape
+        center :
+            Fitted (z, y, x) bead center in crop coordinates, in units of the
+            spacing. Only used when registering.
+        """
+        if data.shape != self.shape:
+            raise ValueError(f"Bead of shape {data.shape} doesn't match average of shape {self.shape}.")
+
+        shift = None
+        if self.register and center is not None:
+            shift = np.array(self.shape) // 2 - np.asarray(center) / np.asarray(self.spacing)
+            if not np.all(np.isfinite(shift)) or np.any(np.abs(shift) > self.max_shift):
+                shift = None
+
+        if shift is None:
+            self._sum += data
+            self._count += 1
+            return
+
+        self._pending_crops.append(data)
+        self._pending_shifts.append(shift)
+        if len(self._pending_crops) >= self.batch_size:
+            self._flush()
+
+    def get_average(self) -> Optional[Calibrated3DImage]:
+        """Average of all added crops, or None if nothing was added."""
+        self._flush()
+        if self._count == 0:
+            return None
+        average = np.clip(self._sum / self._count, 0, np.iinfo(np.uint16).max)
+        return Calibrated3DImage(data=average.astype(np.uint16), spacing=self.spacing)
+
+    def _flush(self):
+        if len(self._pending_crops) == 0:
+            return
+        crops = np.stack(self._pending_crops).astype(np.float64)
+        shifts = np.stack(self._pending_shifts)
+
+        spectrum = fft.rfftn(crops, axes=(1, 2, 3))
+        spectrum *= self._get_phase(shifts)
+        self._sum += fft.irfftn(spectrum, s=self.shape, axes=(1, 2, 3)).sum(axis=0)
+
+        self._count += len(crops)
+        self._pending_crops.clear()
+        self._pending_shifts.clear()
+
+    def _get_phase(self, shifts: ArrayLike) -> ArrayLike:
+        """exp(-2 pi i k . shift) for a stack of (z, y, x) shifts."""
+        if self._phase_axes is None:
+            z, y, x = self.shape
+            self._phase_axes = (
+                fft.fftfreq(z)[:, np.newaxis, np.newaxis],
+                fft.fftfreq(y)[np.newaxis, :, np.newaxis],
+                fft.rfftfreq(x)[np.newaxis, np.newaxis, :],
+            )
+        kz, ky, kx = self._phase_axes
+        shifts = shifts[:, :, np.newaxis, np.newaxis, np.newaxis]
+        return np.exp(-2j * np.pi * (kz * shifts[:, 0] + ky * shifts[:, 1] + kx * shifts[:, 2]))
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.records import (
+    PSFRecord,
+    YXFitRecord,
+    ZFitRecord,
+    ZYXFitRecord,
+)
+
+
+def settings_hash(settings: dict) -> str:
+    """Short, stable hash of everything that changes the result of a bead."""
+    encoded = json.dumps(settings, sort_keys=True, default=_to_builtin)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:12]
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+
+class AnalysisCheckpoint:
+    """
+    Append-only log of the finished beads of one image.
+
+    Every finished bead is written as one JSON line holding its offset and its
+    PSF record, or null if the bead was discarded. Lines are flushed to disk
+    before the next bead starts, so a crash loses at most the bead in
+    progress. The file name is made of the image name and the settings hash;
+    a run with other settings starts a new file instead of reusing results.
+    A run that doesn't resume clears the file first, and a finished run
+    removes it.
+    """
+
+    def __init__(self, folder: str, image_name: str, settings: dict):
+        safe_name = re.sub(r"[^\w.-]", "_", image_name)
+        self.path = os.path.join(folder, f"{safe_name}_{settings_hash(settings)}.jsonl")
+        self.image_name = image_name
+
+    def load(self) -> Dict[Tuple[int, ...], Optional[PSFRecord]]:
+        """Read the finished beads, keyed by bead offset."""
+        finished = {}
+        if not os.path.exists(self.path):
+            return finished
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:  # Torn line of an interrupted write.
+                    continue
+                record = entry["record"]
+                finished[tuple(entry["offset"])] = None if record is None else self._to_record(record)
+        return finished
+
+    def clear(self):
+        """Remove the log, if any."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def append(self, offset: Tuple[int, ...], psf_record: Optional[PSFRecord]):
+        """Write one finished bead and flush it to disk."""
+        entry = {
+            "image_name": self.image_name,
+            "offset": [int(o) for o in offset],
+            "record": None if psf_record is None else {
+                "z_fit": vars(psf_record.z_fit),
+                "yx_fit": vars(psf_record.yx_fit),
+                "zyx_fit": vars(psf_record.zyx_fit),
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry, default=_to_builtin) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def _to_record(record: dict) -> PSFRecord:
+        # Records were validated when they were created; moment estimates
+        # hold NaN uncertainties, which validation would reject.
+        return PSFRecord.model_construct(
+            z_fit=ZFitRecord.model_construct(**record["z_fit"]),
+            yx_fit=YXFitRecord.model_construct(**record["yx_fit"]),
+            zyx_fit=ZYXFitRecord.model_construct(**record["zyx_fit"]),
+        )
@@ -69,7 +69,8 @@ class BeadExtractor:
 
     def _extract_rough_crop(self, point: Tuple[int, int, int]):
         z_slice, y_slice, x_slice = self._create_slices(point)
-        return self._image.data[z_slice, y_slice, x_slice]
+        # Lazy images (dask) are only read here, one crop at a time
+        return np.asarray(self._image.data[z_slice, y_slice, x_slice])
 
     def _find_closest_peak(self, point: Tuple[int, int, int]) -> Tuple[int, int, int]:
         crop = self._extract_rough_crop(point)
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from numpy._typing import ArrayLike
+from PIL import Image
+
+FigureSource = Union[ArrayLike, Callable[[], ArrayLike]]
+
+# Decoded figures kept around, so napari can re-slice the current figure quickly.
+_DECODED_CACHE_SIZE = 2
+
+
+class _FigureEntry:
+    """One figure of the stack: its source and where its PNG is kept once rendered."""
+
+    def __init__(self, source: FigureSource):
+        self.source = source
+        self.png: Optional[bytes] = None
+        self.path: Optional[str] = None
+
+    def is_stored(self) -> bool:
+        return self.png is not None or self.path is not None
+
+
+class SummaryFigureStack:
+    """
+    Lazy (N, Y, X, 3) stack of summary figures with a bounded memory use.
+
+    Every entry is either a rendered figure or a callable which renders it.
+    Figures are rendered on first access and then stored PNG compressed. Up to
+    `memory_budget` bytes of PNGs stay in memory; beyond that they are spilled
+    to a temporary directory, which is removed with the stack. Only the last
+    few decoded figures are kept as arrays. The stack implements enough of the
+    array interface (`shape`, `dtype`, `ndim` and `__getitem__`) for napari
+    to display it without ever materializing it.
+    """
+
+    dtype = np.dtype(np.uint8)
+    ndim = 4
+
+    def __init__(
+        self,
+        figure_shape: Tuple[int, int, int],
+        figures: List[FigureSource] = None,
+        memory_budget: int = 256 * 1024**2,
+    ):
+        self._figure_shape = tuple(figure_shape)
+        self._entries: List[_FigureEntry] = [_FigureEntry(f) for f in (figures or [])]
+        self._memory_budget = memory_budget
+        self._memory_used = 0
+        self._decoded: "OrderedDict[_FigureEntry, ArrayLike]" = OrderedDict()
+        self._spill_dir: Optional[str] = None
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return (len(self._entries), *self._figure_shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def memory_used(self) -> int:
+        """Bytes of PNG data held in memory."""
+        return self._memory_used
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        first, rest = key[0], key[1:]
+        if isinstance(first, (int, np.integer)):
+            return self._get_figure(int(first))[rest]
+        if first is Ellipsis:
+            first, rest = slice(None), key
+
+        indices = np.arange(len(self))[first]
+        figures = [self._get_figure(i) for i in np.atleast_1d(indices)]
+        stack = np.stack(figures) if figures else np.empty((0, *self._figure_shape), dtype=self.dtype)
+        return stack[(slice(None), *rest)]
+
+    def __array__(self, dtype=None, copy=None):
+        stack = self[:]
+        return stack if dtype is None else stack.astype(dtype)
+
+    def _get_figure(self, index: int) -> ArrayLike:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Figure index {index} out of range for {len(self)} figures")
+
+        entry = self._entries[index]
+        if entry in self._decoded:
+            self._decoded.move_to_end(entry)
+            return self._decoded[entry]
+
+        if entry.is_stored():
+            figure = self._load(entry)
+        else:
+            figure = np.asarray(entry.source() if callable(entry.source) else entry.source, dtype=self.dtype)
+            self._store(entry, figure)
+            entry.source = None  # Drop the renderer, and with it the bead and fit it holds on to.
+
+        self._decoded[entry] = figure
+        if len(self._decoded) > _DECODED_CACHE_SIZE:
+            self._decoded.popitem(last=False)
+        return figure
+
+    def _store(self, entry: _FigureEntry, figure: ArrayLike) -> None:
+        buffer = BytesIO()
+        Image.fromarray(figure).save(buffer, format="PNG", compress_level=1)
+        png = buffer.getvalue()
+
+        if self._memory_used + len(png) <= self._memory_budget:
+            entry.png = png
+            self._memory_used += len(png)
+            return
+
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="psf_summary_figures_")
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, ignore_errors=True)
+        file_descriptor, entry.path = tempfile.mkstemp(suffix=".png", dir=self._spill_dir)
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(png)
+
+    def _load(self, entry: _FigureEntry) -> ArrayLike:
+        source = BytesIO(entry.png) if entry.png is not None else entry.path
+        with Image.open(source) as image:
+            return np.asarray(image.convert("RGB"))
+
+    def render_all(self) -> None:
+        """Render and store every figure which hasn't been rendered yet."""
+        for index in range(len(self)):
+            if not self._entries[index].is_stored():
+                self._get_figure(index)
+
+    def prepend(self, figure: FigureSource) -> None:
+        """Insert a figure in front of the stack, e.g. the averaged PSF."""
+        self._entries.insert(0, _FigureEntry(figure))
+
+    def delete(self, index: int) -> None:
+        """Remove a figure from the stack."""
+        entry = self._entries.pop(index)
+        self._decoded.pop(entry, None)
+        if entry.png is not None:
+            self._memory_used -= len(entry.png)
+        if entry.path is not None:
+            os.remove(entry.path)
@@ -0,0 +1,232 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy._typing import ArrayLike
+from pydantic import ValidationError
+
+from psf_analysis_CFIM.psf_analysis.fit.fit_3d import (
+    covariance_from_precision_cholesky,
+    precision_cholesky_from_covariance,
+)
+from psf_analysis_CFIM.psf_analysis.fit.fitter import ZYXFitter
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.records import ZYXFitRecord
+from psf_analysis_CFIM.psf_analysis.sample import ZYXSample
+
+# (row, column) of each free Cholesky entry, in parameter order.
+_CHOLESKY_ROWS = np.array([0, 1, 2, 1, 2, 2])
+_CHOLESKY_COLS = np.array([0, 0, 0, 1, 1, 2])
+
+
+class BatchedZYXFitter:
+    """
+    Fit 3D Gaussians to a stack of equally shaped bead crops at once.
+
+    All beads share one coordinate grid, so the crops are stacked into an
+    (N, Z, Y, X) array and fitted with a vectorized Levenberg–Marquardt
+    solver. Every bead keeps its own damping factor and convergence flag;
+    converged beads are dropped from the active set. The model is the
+    precision-matrix form of `evaluate_3d_gaussian_precision`, and results are
+    converted back to covariance entries, so the records match `ZYXFitter`.
+
+    The fit telemetry means the same as in `ZYXFitter`. `status` uses the
+    `curve_fit` exit codes: 1 when the cost stopped decreasing, 2 when the
+    step fell below `xtol`, 5 when `max_iterations` was reached and 0 when
+    the normal equations are singular at the solution. `fit_time` is the
+    batch time, split across beads by their function evaluations.
+    """
+
+    images: List[Calibrated3DImage] = None
+    max_iterations: int = 200
+    ftol: float = 1.49012e-08
+    xtol: float = 1.49012e-08
+    _coords: ArrayLike = None
+    _data: ArrayLike = None
+
+    def __init__(
+        self,
+        images: List[Calibrated3DImage],
+        max_iterations: int = 200,
+        ftol: float = 1.49012e-08,
+        xtol: float = 1.49012e-08,
+    ):
+        if len(images) == 0:
+            raise ValueError("Need at least one image to fit.")
+        shape = images[0].data.shape
+        if any(image.data.shape != shape for image in images):
+            raise ValueError("All images of a batch must have the same shape.")
+
+        self.images = images
+        self.max_iterations = max_iterations
+        self.ftol = ftol
+        self.xtol = xtol
+        self._coords = ZYXSample(image=images[0]).get_ravelled_coordinates()
+        self._data = np.stack([image.data.ravel() for image in images]).astype(np.float64)
+
+    def fit(self) -> List[Optional[ZYXFitRecord]]:
+        """
+        Fit all beads of the batch.
+
+        Returns
+        -------
+        One record per image, or None where the fit did not converge or
+        produced invalid parameters.
+        """
+        start = time.perf_counter()
+        params = self._estimate_initial_parameters()
+        params, status, evaluations = self._levenberg_marquardt(params)
+        jtj, _, cost = self._normal_equations(params, np.arange(len(self.images)))
+        fit_times = (time.perf_counter() - start) * evaluations / evaluations.sum()
+
+        degrees_of_freedom = max(self._data.shape[1] - params.shape[1], 1)
+        records = []
+        for i in range(len(self.images)):
+            if status[i] == 5 or not np.all(np.isfinite(params[i])):
+                records.append(None)
+                continue
+            if np.linalg.matrix_rank(jtj[i]) < jtj.shape[1]:
+                status[i] = 0
+            param_covariance = np.linalg.pinv(jtj[i]) * cost[i] / degrees_of_freedom
+            telemetry = {
+                "nfev": int(evaluations[i]),
+                "fit_time": float(fit_times[i]),
+                "cost": float(cost[i]),
+                "status": int(status[i]),
+                "retries": 0,
+            }
+            records.append(self._create_record(params[i], param_covariance, telemetry))
+
+        return records
+
+    def _create_record(
+        self, params: ArrayLike, param_covariance: ArrayLike, telemetry: dict = None
+    ) -> Optional[ZYXFitRecord]:
+        covariance_params, cholesky_transform = covariance_from_precision_cholesky(*params[5:])
+        transform = np.eye(11)
+        transform[5:, 5:] = cholesky_transform
+        optimal_params = np.concatenate([params[:5], covariance_params])
+
+        if np.any(optimal_params[2:5] < 0):
+            print(f"Negative mu found: {optimal_params[2:5]}")
+            return None
+        try:
+            return ZYXFitter.create_record(
+                optimal_params, transform @ param_covariance @ transform.T, telemetry
+            )
+        except (ValueError, TypeError, ValidationError, RuntimeError):
+            return None
+
+    def _estimate_initial_parameters(self) -> ArrayLike:
+        """Moment based start values, matching `ZYXEstimator` for every bead."""
+        background = np.median(self._data, axis=1).astype(np.uint16).astype(np.float64)
+        amplitude = self._data.max(axis=1) - background
+
+        weights = self._data
+        total = weights.sum(axis=1)
+        centroid = weights @ self._coords / total[:, np.newaxis]
+        centered = self._coords[np.newaxis] - centroid[:, np.newaxis]
+        variances = np.einsum("nm,nmi->ni", weights, centered**2) / (total[:, np.newaxis] - 1)
+
+        params = np.zeros((len(self.images), 11))
+        params[:, 0] = background
+        params[:, 1] = amplitude
+        params[:, 2:5] = centroid
+        for i, variance in enumerate(variances):
+            params[i, 5:] = precision_cholesky_from_covariance(
+                variance[0], 0, 0, variance[1], 0, variance[2]
+            )
+        return params
+
+    def _levenberg_marquardt(self, params: ArrayLike) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+        n_beads = params.shape[0]
+        params = params.copy()
+        damping = np.full(n_beads, 1e-3)
+        status = np.full(n_beads, 5)
+        evaluations = np.ones(n_beads, dtype=int)
+        active = np.arange(n_beads)
+
+        jtj, jtr, cost = self._normal_equations(params, active)
+        for _ in range(self.max_iterations):
+            if active.size == 0:
+                break
+
+            step = self._solve_damped(jtj, jtr, damping[active])
+            trial = params[active] + step
+            trial_cost = self._cost(trial, active)
+            evaluations[active] += 1
+
+            accepted = np.isfinite(trial_cost) & (trial_cost < cost)
+            relative_reduction = np.where(accepted, (cost - trial_cost) / np.maximum(cost, 1e-300), 0)
+            small_step = np.all(
+                np.abs(step) <= self.xtol * (np.abs(params[active]) + self.xtol), axis=1
+            )
+
+            params[active[accepted]] = trial[accepted]
+            damping[active[accepted]] /= 10
+            damping[active[~accepted]] *= 10
+
+            # Stationary when even a heavily damped step can't lower the cost.
+            finished = (accepted & (relative_reduction <= self.ftol)) | small_step
+            finished |= damping[active] > 1e16
+            status[active[finished]] = np.where(small_step[finished], 2, 1)
+
+            keep = ~finished
+            updated = accepted & keep
+            kept_jtj, kept_jtr, kept_cost = jtj[keep], jtr[keep], cost[keep]
+            if np.any(updated):
+                new_jtj, new_jtr, new_cost = self._normal_equations(params, active[updated])
+                refresh = updated[keep]
+                kept_jtj[refresh] = new_jtj
+                kept_jtr[refresh] = new_jtr
+                kept_cost[refresh] = new_cost
+            active = active[keep]
+            jtj, jtr, cost = kept_jtj, kept_jtr, kept_cost
+
+        return params, status, evaluations
+
+    @staticmethod
+    def _solve_damped(jtj: ArrayLike, jtr: ArrayLike, damping: ArrayLike) -> ArrayLike:
+        diagonal = np.diagonal(jtj, axis1=1, axis2=2)
+        diagonal = np.maximum(diagonal, np.finfo(float).eps * diagonal.max(axis=1, keepdims=True))
+        damped = jtj.copy()
+        idx = np.arange(jtj.shape[1])
+        damped[:, idx, idx] += damping[:, np.newaxis] * diagonal
+        try:
+            return np.linalg.solve(damped, jtr[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            return np.einsum("npq,nq->np", np.linalg.pinv(damped), jtr)
+
+    def _evaluate(self, params: ArrayLike) -> Tuple[ArrayLike, ...]:
+        cholesky = np.zeros((params.shape[0], 3, 3))
+        cholesky[:, _CHOLESKY_ROWS, _CHOLESKY_COLS] = params[:, 5:]
+        centered = self._coords[np.newaxis] - params[:, np.newaxis, 2:5]
+        projected = centered @ cholesky
+        gauss = np.exp(-0.5 * np.sum(projected**2, axis=2))
+        model = params[:, 1:2] * gauss + params[:, 0:1]
+        return model, gauss, centered, projected, cholesky
+
+    def _cost(self, params: ArrayLike, beads: ArrayLike) -> ArrayLike:
+        model = self._evaluate(params)[0]
+        return np.sum((self._data[beads] - model) ** 2, axis=1)
+
+    def _normal_equations(self, params: ArrayLike, beads: ArrayLike) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+        """J^T J, J^T r and the squared residual sum for the selected beads."""
+        bead_params = params[beads]
+        model, gauss, centered, projected, cholesky = self._evaluate(bead_params)
+        residuals = self._data[beads] - model
+        amp_gauss = bead_params[:, 1:2] * gauss
+
+        # Parameter-major layout keeps the products below contiguous.
+        jacobian = np.empty((model.shape[0], 11, model.shape[1]))
+        jacobian[:, 0] = 1.0
+        jacobian[:, 1] = gauss
+        mu_gradient = projected @ cholesky.transpose(0, 2, 1)
+        for axis in range(3):
+            jacobian[:, 2 + axis] = amp_gauss * mu_gradient[..., axis]
+        for column, (row, col) in enumerate(zip(_CHOLESKY_ROWS, _CHOLESKY_COLS), start=5):
+            jacobian[:, column] = -amp_gauss * centered[..., row] * projected[..., col]
+
+        jtj = jacobian @ jacobian.transpose(0, 2, 1)
+        jtr = (jacobian @ residuals[..., np.newaxis])[..., 0]
+        return jtj, jtr, np.sum(residuals**2, axis=1)
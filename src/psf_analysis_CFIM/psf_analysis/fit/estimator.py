@@ -3,16 +3,35 @@ from typing import Tuple
 import numpy as np
 
 from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
-from psf_analysis_CFIM.psf_analysis.sample import Sample, YXSample, ZSample, ZYXSample
+from psf_analysis_CFIM.psf_analysis.sample import (
+    Sample,
+    YXSample,
+    ZSample,
+    ZYXSample,
+    get_coordinate_grid,
+)
 from psf_analysis_CFIM.psf_analysis.utils import compute_cov_matrix
 from skimage.measure import centroid
 
 
-class Estimator:
+class BeadStatistics:
+    """
+    Statistics of a 3D bead crop, shared by the Z, YX and ZYX estimators.
+
+    The background median, the maximum and the intensity weighted centroid and
+    covariance of the crop are each computed once on first use. Centroid and
+    covariance come out of the same pass over the cached coordinate grid.
+    The signal moments are the same moments of the background subtracted crop,
+    which aren't widened by the background.
+    """
+
     image: Calibrated3DImage = None
-    sample: Sample = None
     _background: np.uint16 = None
-    _amplitude: np.uint16 = None
+    _maximum: np.uint16 = None
+    _centroid: Tuple[float, float, float] = None
+    _covariance: np.ndarray = None
+    _signal_centroid: Tuple[float, float, float] = None
+    _signal_covariance: np.ndarray = None
 
     def __init__(self, image: Calibrated3DImage):
         self.image = image
@@ -23,6 +42,69 @@ class Estimator:
 
         return self._background
 
+    def get_maximum(self) -> np.uint16:
+        if self._maximum is None:
+            self._maximum = self.image.data.max()
+
+        return self._maximum
+
+    def get_centroid(self) -> Tuple[float, float, float]:
+        if self._centroid is None:
+            self._compute_moments()
+
+        return self._centroid
+
+    def get_covariance(self) -> np.ndarray:
+        if self._covariance is None:
+            self._compute_moments()
+
+        return self._covariance
+
+    def get_signal_centroid(self) -> Tuple[float, float, float]:
+        if self._signal_centroid is None:
+            self._compute_signal_moments()
+
+        return self._signal_centroid
+
+    def get_signal_sigmas(self) -> Tuple[float, float, float]:
+        if self._signal_covariance is None:
+            self._compute_signal_moments()
+
+        return tuple(np.sqrt(np.abs(np.diag(self._signal_covariance))))
+
+    def _compute_moments(self) -> None:
+        mean, self._covariance = self._weighted_moments(self.image.data.ravel().astype(np.float64))
+        self._centroid = tuple(mean)
+
+    def _compute_signal_moments(self) -> None:
+        weights = np.clip(self.image.data.ravel().astype(np.float64) - self.get_background(), 0, None)
+        mean, self._signal_covariance = self._weighted_moments(weights)
+        self._signal_centroid = tuple(mean)
+
+    def _weighted_moments(self, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        coordinates = get_coordinate_grid(self.image.data.shape, self.image.spacing)
+        total = weights.sum()
+
+        mean = weights @ coordinates / total
+        centered = coordinates - mean
+        # Frequency weighted and unbiased, same as `compute_cov_matrix`.
+        covariance = (centered * weights[:, np.newaxis]).T @ centered / (total - 1)
+        return mean, covariance
+
+
+class Estimator:
+    image: Calibrated3DImage = None
+    sample: Sample = None
+    statistics: BeadStatistics = None
+    _amplitude: np.uint16 = None
+
+    def __init__(self, image: Calibrated3DImage, statistics: BeadStatistics = None):
+        self.image = image
+        self.statistics = statistics if statistics is not None else BeadStatistics(image)
+
+    def get_background(self) -> np.uint16:
+        return self.statistics.get_background()
+
     def get_amplitude(self) -> np.uint16:
         if self._amplitude is None:
             self._amplitude = self.sample.image.data.max() - self.get_background()
@@ -35,8 +117,10 @@ class ZEstimator(Estimator):
     _centroid: float = None
     _sigma: float = None
 
-    def __init__(self, image: Calibrated3DImage, z_sample: ZSample):
-        super().__init__(image=image)
+    def __init__(
+        self, image: Calibrated3DImage, z_sample: ZSample, statistics: BeadStatistics = None
+    ):
+        super().__init__(image=image, statistics=statistics)
         self.sample = z_sample
 
     def get_centroid(self) -> float:
@@ -71,8 +155,10 @@ class YXEstimator(Estimator):
     _centroid: Tuple[float, float] = None
     _sigmas: Tuple[float, float] = None
 
-    def __init__(self, image: Calibrated3DImage, yx_sample: YXSample):
-        super().__init__(image=image)
+    def __init__(
+        self, image: Calibrated3DImage, yx_sample: YXSample, statistics: BeadStatistics = None
+    ):
+        super().__init__(image=image, statistics=statistics)
         self.sample = yx_sample
 
     def get_centroid(self) -> Tuple[float, float]:
@@ -106,19 +192,21 @@ class ZYXEstimator(Estimator):
     _centroid: Tuple[float, float, float] = None
     _sigmas: Tuple[float, float, float] = None
 
-    def __init__(self, image: Calibrated3DImage, zyx_sample: ZYXSample):
-        super().__init__(image=image)
+    def __init__(
+        self, image: Calibrated3DImage, zyx_sample: ZYXSample, statistics: BeadStatistics = None
+    ):
+        super().__init__(image=image, statistics=statistics)
         self.sample = zyx_sample
 
+    def get_amplitude(self) -> np.uint16:
+        if self._amplitude is None:
+            self._amplitude = self.statistics.get_maximum() - self.get_background()
+
+        return self._amplitude
+
     def get_centroid(self) -> Tuple[float, float, float]:
         if self._centroid is None:
-            abs_cords = self.sample.image.get_corner_coordinates()
-            uncalibrated_centroid = (centroid(self.sample.image.data))
-            self._centroid = (
-                uncalibrated_centroid[0] * self.sample.image.spacing[0],
-                uncalibrated_centroid[1] * self.sample.image.spacing[1],
-                uncalibrated_centroid[2] * self.sample.image.spacing[2],
-            )
+            self._centroid = self.statistics.get_centroid()
 
         return self._centroid
 
@@ -136,9 +224,7 @@ class ZYXEstimator(Estimator):
 
     def get_sigmas(self) -> Tuple[float, float, float]:
         if self._sigmas is None:
-            cov_matrix = compute_cov_matrix(
-                img_data=self.sample.image.data, spacing=self.sample.image.spacing
-            )
+            cov_matrix = self.statistics.get_covariance()
             self._sigmas = (
                 np.abs(np.sqrt(cov_matrix[0, 0])),
                 np.abs(np.sqrt(cov_matrix[1, 1])),
@@ -54,3 +54,43 @@ def evaluate_1d_gaussian(
         Sampled values
     """
     return parameterized_1d_gaussian(bg=bg, amp=amp, mu=mu, sigma=sigma)(x)
+
+
+def evaluate_1d_gaussian_jacobian(
+    x: ArrayLike, bg: float, amp: float, mu: float, sigma: float
+) -> ArrayLike:
+    """Jacobian of the 1D Gaussian.
+
+    Closed-form partial derivatives of `evaluate_1d_gaussian` with respect
+    to its parameters, evaluated at positions `x`. Matches the `jac`
+    signature expected by `scipy.optimize.curve_fit`.
+
+    Parameters
+    ----------
+    x :
+        Positions where the Jacobian is evaluated.
+    bg :
+        Background value
+    amp :
+        Gaussian amplitude
+    mu :
+        Gaussian center
+    sigma :
+        Gaussian standard deviation
+
+    Returns
+    -------
+    ArrayLike
+        Jacobian of shape (len(x), 4) in parameter order (bg, amp, mu, sigma)
+    """
+    x = np.asarray(x, dtype=float)
+    diff = x - mu
+    gauss = np.exp(-(diff**2) / (2 * sigma**2))
+    amp_gauss = amp * gauss
+
+    jacobian = np.empty((x.shape[0], 4))
+    jacobian[:, 0] = 1.0
+    jacobian[:, 1] = gauss
+    jacobian[:, 2] = amp_gauss * diff / sigma**2
+    jacobian[:, 3] = amp_gauss * diff**2 / sigma**3
+    return jacobian
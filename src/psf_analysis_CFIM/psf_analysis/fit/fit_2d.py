@@ -86,3 +86,62 @@ def evaluate_2d_gaussian(
     return parameterized_2d_gaussian(
         bg=bg, amp=amp, mu_y=mu_y, mu_x=mu_x, cyy=cyy, cyx=cyx, cxx=cxx
     )(x)
+
+
+def evaluate_2d_gaussian_jacobian(
+    x: ArrayLike,
+    bg: float,
+    amp: float,
+    mu_y: float,
+    mu_x: float,
+    cyy: float,
+    cyx: float,
+    cxx: float,
+) -> ArrayLike:
+    """Jacobian of the 2D Gaussian.
+
+    Closed-form partial derivatives of `evaluate_2d_gaussian` with respect
+    to its parameters, evaluated at positions `x`. Matches the `jac`
+    signature expected by `scipy.optimize.curve_fit`.
+
+    Parameters
+    ----------
+    x :
+        Positions where the Jacobian is evaluated.
+    bg :
+        Background value
+    amp :
+        Gaussian amplitude
+    mu_y :
+        Center along y-axis
+    mu_x :
+        Center along x-axis
+    cyy :
+        Covariance matrix entry cyy.
+    cyx :
+        Covariance matrix entry cyx.
+    cxx :
+        Covariance matrix entry cxx.
+
+    Returns
+    -------
+    ArrayLike
+        Jacobian of shape (len(x), 7) in the parameter order of
+        `evaluate_2d_gaussian`
+    """
+    cov_inv = np.linalg.inv(np.array([[cyy, cyx], [cyx, cxx]]))
+    diff = x - np.array([mu_y, mu_x])
+    # Rows of `weighted` are cov_inv @ (x - mu) for every sample.
+    weighted = diff @ cov_inv
+    gauss = np.exp(-0.5 * np.einsum("ij,ij->i", diff, weighted))
+    amp_gauss = amp * gauss
+
+    jacobian = np.empty((diff.shape[0], 7))
+    jacobian[:, 0] = 1.0
+    jacobian[:, 1] = gauss
+    jacobian[:, 2] = amp_gauss * weighted[:, 0]
+    jacobian[:, 3] = amp_gauss * weighted[:, 1]
+    jacobian[:, 4] = 0.5 * amp_gauss * weighted[:, 0] ** 2
+    jacobian[:, 5] = amp_gauss * weighted[:, 0] * weighted[:, 1]
+    jacobian[:, 6] = 0.5 * amp_gauss * weighted[:, 1] ** 2
+    return jacobian
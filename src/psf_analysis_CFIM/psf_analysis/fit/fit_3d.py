@@ -1,4 +1,4 @@
-from typing import Callable
+from typing import Callable, Tuple
 
 import numpy as np
 from napari.types import ArrayLike
@@ -132,3 +132,323 @@ def evaluate_3d_gaussian(
         cyx=cyx,
         cxx=cxx,
     )(x)
+
+
+def evaluate_3d_gaussian_jacobian(
+    x: ArrayLike,
+    bg: float,
+    amp: float,
+    mu_z: float,
+    mu_y: float,
+    mu_x: float,
+    czz: float,
+    czy: float,
+    czx: float,
+    cyy: float,
+    cyx: float,
+    cxx: float,
+) -> ArrayLike:
+    """Jacobian of the 3D Gaussian.
+
+    Closed-form partial derivatives of `evaluate_3d_gaussian` with respect
+    to its parameters, evaluated at positions `x`. Matches the `jac`
+    signature expected by `scipy.optimize.curve_fit`.
+
+    Parameters
+    ----------
+    x :
+        Positions where the Jacobian is evaluated.
+    bg :
+        Background value
+    amp :
+        Gaussian amplitude
+    mu_z :
+        Center along z-axis
+    mu_y :
+        Center along y-axis
+    mu_x :
+        Center along x-axis
+    czz :
+        Covariance matrix entry czz.
+    czy :
+        Covariance matrix entry czy.
+    czx :
+        Covariance matrix entry czx.
+    cyy :
+        Covariance matrix entry cyy.
+    cyx :
+        Covariance matrix entry cyx.
+    cxx :
+        Covariance matrix entry cxx.
+
+    Returns
+    -------
+    ArrayLike
+        Jacobian of shape (len(x), 11) in the parameter order of
+        `evaluate_3d_gaussian`
+    """
+    cov_inv = np.linalg.inv(
+        np.array([[czz, czy, czx], [czy, cyy, cyx], [czx, cyx, cxx]])
+    )
+    diff = x - np.array([mu_z, mu_y, mu_x])
+    # Rows of `weighted` are cov_inv @ (x - mu) for every sample.
+    weighted = diff @ cov_inv
+    gauss = np.exp(-0.5 * np.einsum("ij,ij->i", diff, weighted))
+    amp_gauss = amp * gauss
+
+    jacobian = np.empty((diff.shape[0], 11))
+    jacobian[:, 0] = 1.0
+    jacobian[:, 1] = gauss
+    jacobian[:, 2:5] = amp_gauss[:, np.newaxis] * weighted
+    # d/dC_ij of the exponent is 0.5 * w_i * w_j, doubled for the
+    # off-diagonal entries which appear twice in the symmetric matrix.
+    jacobian[:, 5] = 0.5 * amp_gauss * weighted[:, 0] ** 2
+    jacobian[:, 6] = amp_gauss * weighted[:, 0] * weighted[:, 1]
+    jacobian[:, 7] = amp_gauss * weighted[:, 0] * weighted[:, 2]
+    jacobian[:, 8] = 0.5 * amp_gauss * weighted[:, 1] ** 2
+    jacobian[:, 9] = amp_gauss * weighted[:, 1] * weighted[:, 2]
+    jacobian[:, 10] = 0.5 * amp_gauss * weighted[:, 2] ** 2
+    return jacobian
+
+
+# (row, column) of each free Cholesky entry, in parameter order.
+_CHOLESKY_INDICES = ((0, 0), (1, 0), (2, 0), (1, 1), (2, 1), (2, 2))
+# (row, column) of each free covariance entry, in `zyx_c**` order.
+_COVARIANCE_INDICES = ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))
+
+
+def _cholesky_matrix(
+    lzz: float, lyz: float, lxz: float, lyy: float, lxy: float, lxx: float
+) -> ArrayLike:
+    return np.array([[lzz, 0.0, 0.0], [lyz, lyy, 0.0], [lxz, lxy, lxx]])
+
+
+def parameterized_3d_gaussian_precision(
+    bg: float,
+    amp: float,
+    mu_z: float,
+    mu_y: float,
+    mu_x: float,
+    lzz: float,
+    lyz: float,
+    lxz: float,
+    lyy: float,
+    lxy: float,
+    lxx: float,
+) -> Callable:
+    """Parameterized 3D Gaussian in precision-matrix form.
+
+    The inverse covariance (precision) matrix is given by its lower
+    triangular Cholesky factor `L`, with `P = L @ L.T`. This avoids a matrix
+    inversion per evaluation and keeps `P` positive-definite for any
+    non-zero diagonal.
+
+    Parameters
+    ----------
+    bg :
+        Background
+    amp :
+        Amplitude
+    mu_z :
+        Center along z-axis
+    mu_y :
+        Center along y-axis
+    mu_x :
+        Center along x-axis
+    lzz :
+        Cholesky factor entry lzz.
+    lyz :
+        Cholesky factor entry lyz.
+    lxz :
+        Cholesky factor entry lxz.
+    lyy :
+        Cholesky factor entry lyy.
+    lxy :
+        Cholesky factor entry lxy.
+    lxx :
+        Cholesky factor entry lxx.
+
+    Returns
+    -------
+    Callable
+        Parameterized 3D Gaussian
+    """
+    cholesky = _cholesky_matrix(lzz, lyz, lxz, lyy, lxy, lxx)
+
+    def _gauss_3d(coords: ArrayLike):
+        centered = coords - np.array([mu_z, mu_y, mu_x])
+        projected = centered @ cholesky
+        exponent = -0.5 * np.einsum("ij,ij->i", projected, projected)
+
+        return amp * np.exp(exponent) + bg
+
+    return _gauss_3d
+
+
+def evaluate_3d_gaussian_precision(
+    x: ArrayLike,
+    bg: float,
+    amp: float,
+    mu_z: float,
+    mu_y: float,
+    mu_x: float,
+    lzz: float,
+    lyz: float,
+    lxz: float,
+    lyy: float,
+    lxy: float,
+    lxx: float,
+) -> ArrayLike:
+    """Sample 3D Gaussian in precision-matrix form.
+
+    Evaluate a 3D Gaussian, parameterized by the Cholesky factor of its
+    precision matrix, at positions `x`.
+
+    Parameters
+    ----------
+    x :
+        Positions where the Gaussian function is evaluated.
+    bg :
+        Background value
+    amp :
+        Gaussian amplitude
+    mu_z :
+        Center along z-axis
+    mu_y :
+        Center along y-axis
+    mu_x :
+        Center along x-axis
+    lzz, lyz, lxz, lyy, lxy, lxx :
+        Entries of the lower triangular Cholesky factor of the precision
+        matrix.
+
+    Returns
+    -------
+    ArrayLike
+        Sampled values
+    """
+    return parameterized_3d_gaussian_precision(
+        bg=bg,
+        amp=amp,
+        mu_z=mu_z,
+        mu_y=mu_y,
+        mu_x=mu_x,
+        lzz=lzz,
+        lyz=lyz,
+        lxz=lxz,
+        lyy=lyy,
+        lxy=lxy,
+        lxx=lxx,
+    )(x)
+
+
+def evaluate_3d_gaussian_precision_jacobian(
+    x: ArrayLike,
+    bg: float,
+    amp: float,
+    mu_z: float,
+    mu_y: float,
+    mu_x: float,
+    lzz: float,
+    lyz: float,
+    lxz: float,
+    lyy: float,
+    lxy: float,
+    lxx: float,
+) -> ArrayLike:
+    """Jacobian of the 3D Gaussian in precision-matrix form.
+
+    Parameters
+    ----------
+    x :
+        Positions where the Jacobian is evaluated.
+    bg :
+        Background value
+    amp :
+        Gaussian amplitude
+    mu_z :
+        Center along z-axis
+    mu_y :
+        Center along y-axis
+    mu_x :
+        Center along x-axis
+    lzz, lyz, lxz, lyy, lxy, lxx :
+        Entries of the lower triangular Cholesky factor of the precision
+        matrix.
+
+    Returns
+    -------
+    ArrayLike
+        Jacobian of shape (len(x), 11) in the parameter order of
+        `evaluate_3d_gaussian_precision`
+    """
+    cholesky = _cholesky_matrix(lzz, lyz, lxz, lyy, lxy, lxx)
+    centered = x - np.array([mu_z, mu_y, mu_x])
+    projected = centered @ cholesky
+    gauss = np.exp(-0.5 * np.einsum("ij,ij->i", projected, projected))
+    amp_gauss = amp * gauss
+
+    jacobian = np.empty((centered.shape[0], 11))
+    jacobian[:, 0] = 1.0
+    jacobian[:, 1] = gauss
+    jacobian[:, 2:5] = amp_gauss[:, np.newaxis] * (projected @ cholesky.T)
+    for column, (row, col) in enumerate(_CHOLESKY_INDICES, start=5):
+        jacobian[:, column] = -amp_gauss * centered[:, row] * projected[:, col]
+    return jacobian
+
+
+def precision_cholesky_from_covariance(
+    czz: float, czy: float, czx: float, cyy: float, cyx: float, cxx: float
+) -> Tuple[float, float, float, float, float, float]:
+    """Cholesky factor of the precision matrix for a covariance matrix.
+
+    Parameters
+    ----------
+    czz, czy, czx, cyy, cyx, cxx :
+        Covariance matrix entries.
+
+    Returns
+    -------
+    Tuple
+        Cholesky entries (lzz, lyz, lxz, lyy, lxy, lxx)
+    """
+    covariance = np.array([[czz, czy, czx], [czy, cyy, cyx], [czx, cyx, cxx]])
+    cholesky = np.linalg.cholesky(np.linalg.inv(covariance))
+    return tuple(float(cholesky[row, col]) for row, col in _CHOLESKY_INDICES)
+
+
+def covariance_from_precision_cholesky(
+    lzz: float, lyz: float, lxz: float, lyy: float, lxy: float, lxx: float
+) -> Tuple[ArrayLike, ArrayLike]:
+    """Convert Cholesky entries of the precision matrix to covariance entries.
+
+    Parameters
+    ----------
+    lzz, lyz, lxz, lyy, lxy, lxx :
+        Entries of the lower triangular Cholesky factor of the precision
+        matrix.
+
+    Returns
+    -------
+    covariance_params:
+        Covariance entries (czz, czy, czx, cyy, cyx, cxx)
+    transform:
+        (6, 6) Jacobian of the covariance entries with respect to the
+        Cholesky entries, used to propagate fit errors.
+    """
+    cholesky = _cholesky_matrix(lzz, lyz, lxz, lyy, lxy, lxx)
+    covariance = np.linalg.inv(cholesky @ cholesky.T)
+    covariance_params = np.array(
+        [covariance[row, col] for row, col in _COVARIANCE_INDICES]
+    )
+
+    # dC = -C dP C with dP = dL L^T + L dL^T for every free entry of L.
+    transform = np.empty((6, 6))
+    for column, (row, col) in enumerate(_CHOLESKY_INDICES):
+        unit = np.zeros((3, 3))
+        unit[row, col] = 1.0
+        d_precision = unit @ cholesky.T + cholesky @ unit.T
+        d_covariance = -covariance @ d_precision @ covariance
+        transform[:, column] = [d_covariance[r, c] for r, c in _COVARIANCE_INDICES]
+
+    return covariance_params, transform
@@ -1,3 +1,4 @@
+import time
 import traceback
 from typing import Tuple
 
@@ -7,13 +8,27 @@ from numpy._typing import ArrayLike
 from pydantic import ValidationError
 
 from psf_analysis_CFIM.psf_analysis.fit.estimator import (
+    BeadStatistics,
     YXEstimator,
     ZEstimator,
     ZYXEstimator,
 )
-from psf_analysis_CFIM.psf_analysis.fit.fit_1d import evaluate_1d_gaussian
-from psf_analysis_CFIM.psf_analysis.fit.fit_2d import evaluate_2d_gaussian
-from psf_analysis_CFIM.psf_analysis.fit.fit_3d import evaluate_3d_gaussian
+from psf_analysis_CFIM.psf_analysis.fit.fit_1d import (
+    evaluate_1d_gaussian,
+    evaluate_1d_gaussian_jacobian,
+)
+from psf_analysis_CFIM.psf_analysis.fit.fit_2d import (
+    evaluate_2d_gaussian,
+    evaluate_2d_gaussian_jacobian,
+)
+from psf_analysis_CFIM.psf_analysis.fit.fit_3d import (
+    covariance_from_precision_cholesky,
+    evaluate_3d_gaussian,
+    evaluate_3d_gaussian_jacobian,
+    evaluate_3d_gaussian_precision,
+    evaluate_3d_gaussian_precision_jacobian,
+    precision_cholesky_from_covariance,
+)
 from psf_analysis_CFIM.psf_analysis.image import (
     Calibrated1DImage,
     Calibrated2DImage,
@@ -24,10 +39,70 @@ from psf_analysis_CFIM.psf_analysis.records import (
     ZFitRecord,
     ZYXFitRecord,
 )
-from psf_analysis_CFIM.psf_analysis.sample import YXSample, ZSample, ZYXSample
+from psf_analysis_CFIM.psf_analysis.sample import (
+    Sample,
+    YXSample,
+    ZSample,
+    ZYXSample,
+    get_support_mask,
+)
 from psf_analysis_CFIM.psf_analysis.utils import fwhm
 from scipy.optimize import curve_fit
 
+# Below this many points per parameter a support mask falls back to the whole sample.
+_MIN_SUPPORT_POINTS_PER_PARAMETER = 10
+
+
+def _curve_fit_with_telemetry(*args, **kwargs) -> Tuple[ArrayLike, ArrayLike, dict]:
+    """
+    `curve_fit` which also reports how the fit went.
+
+    Returns
+    -------
+    Optimal parameters, their covariance and a dict with the number of
+    function evaluations (`nfev`), the wall time in seconds (`fit_time`), the
+    final sum of squared residuals (`cost`) and the solver exit status
+    (`status`, 1 to 4 is success).
+    """
+    start = time.perf_counter()
+    optimal_params, covariance, info, _, status = curve_fit(*args, full_output=True, **kwargs)
+    telemetry = {
+        "nfev": int(info["nfev"]),
+        "fit_time": time.perf_counter() - start,
+        "cost": float(np.sum(info["fvec"] ** 2)),
+        "status": int(status),
+        "retries": 0,
+    }
+    return optimal_params, covariance, telemetry
+
+
+def _prefixed(telemetry: dict, prefix: str) -> dict:
+    if telemetry is None:
+        return {}
+    return {f"{prefix}{key}": value for key, value in telemetry.items()}
+
+
+def _get_support_data(
+    sample: Sample,
+    centroid: Tuple[float, ...],
+    sigmas: Tuple[float, ...],
+    support_sigma: float,
+    background_stride: int,
+    n_parameters: int,
+) -> Tuple[ArrayLike, ArrayLike]:
+    """Coordinates and values of `sample` to fit, restricted to the signal support."""
+    coordinates = sample.get_ravelled_coordinates()
+    data = sample.image.data.ravel()
+    if support_sigma is None:
+        return coordinates, data
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = get_support_mask(coordinates, centroid, sigmas, support_sigma, background_stride)
+    if np.count_nonzero(mask) < _MIN_SUPPORT_POINTS_PER_PARAMETER * n_parameters:
+        return coordinates, data
+    return coordinates[mask], data[mask]
+
+
 class ZFitter:
     """
     Fit a 1D Gaussian to the Z pixel column centered in the YX plane.
@@ -35,11 +110,14 @@ class ZFitter:
 
     image: Calibrated3DImage
     _estimator: ZEstimator
+    _telemetry: dict = None
     _debug: bool = False
 
-    def __init__(self, image: Calibrated3DImage):
+    def __init__(self, image: Calibrated3DImage, statistics: BeadStatistics = None):
         self.image = image
-        self._estimator = ZEstimator(image=self.image, z_sample=self._get_z_sample())
+        self._estimator = ZEstimator(
+            image=self.image, z_sample=self._get_z_sample(), statistics=statistics
+        )
 
     def _get_z_sample(self) -> ZSample:
         shape = self.image.data.shape
@@ -60,17 +138,18 @@ class ZFitter:
                 ]
         try:
 
-            fit = curve_fit(
+            optimal_params, covariance, self._telemetry = _curve_fit_with_telemetry(
                 evaluate_1d_gaussian,
                 xdata=self._estimator.sample.get_ravelled_coordinates(),
                 ydata=self._estimator.sample.image.data,
                 p0=point_params,
+                jac=evaluate_1d_gaussian_jacobian,
             )
         except (RuntimeError, TypeError) as e:
             print(f"Error fitting gaussian with Z: {e}")
             raise e
         else:
-            return fit
+            return optimal_params, covariance
 
     def fit(self) -> ZFitRecord:
         """
@@ -93,16 +172,37 @@ class ZFitter:
             z_amp_sde=error[1],
             z_mu_sde=error[2],
             z_sigma_sde=error[3],
+            **_prefixed(self._telemetry, "z_"),
         )
 
 
 class YXFitter:
+    """
+    Fit a 2D Gaussian to the YX plane centered in Z.
+
+    With `support_sigma` only pixels within that many signal sigmas of the
+    signal centroid, plus every `background_stride`-th pixel, are fitted.
+    """
+
     image: Calibrated3DImage
     _estimator: YXEstimator
-
-    def __init__(self, image: Calibrated3DImage):
+    _support_sigma: float = None
+    _background_stride: int = 8
+    _telemetry: dict = None
+
+    def __init__(
+        self,
+        image: Calibrated3DImage,
+        statistics: BeadStatistics = None,
+        support_sigma: float = None,
+        background_stride: int = 8,
+    ):
         self.image = image
-        self._estimator = YXEstimator(image=self.image, yx_sample=self._get_yx_sample())
+        self._support_sigma = support_sigma
+        self._background_stride = background_stride
+        self._estimator = YXEstimator(
+            image=self.image, yx_sample=self._get_yx_sample(), statistics=statistics
+        )
 
     def _get_yx_sample(self) -> YXSample:
         shape = self.image.data.shape
@@ -125,12 +225,22 @@ class YXFitter:
                     0,
                     self._estimator.get_sigmas()[1] ** 2,
                 ]
-            return curve_fit(
+            xdata, ydata = _get_support_data(
+                self._estimator.sample,
+                self._estimator.statistics.get_signal_centroid()[1:],
+                self._estimator.statistics.get_signal_sigmas()[1:],
+                self._support_sigma,
+                self._background_stride,
+                n_parameters=len(point_args),
+            )
+            optimal_params, covariance, self._telemetry = _curve_fit_with_telemetry(
                 evaluate_2d_gaussian,
-                xdata=self._estimator.sample.get_ravelled_coordinates(),
-                ydata=self._estimator.sample.image.data.ravel(),
+                xdata=xdata,
+                ydata=ydata,
                 p0=point_args,
+                jac=evaluate_2d_gaussian_jacobian,
             )
+            return optimal_params, covariance
         except RuntimeError as e:
             print(f"Error fitting gaussian with YX: {e}")
             raise e
@@ -171,25 +281,67 @@ class YXFitter:
             yx_cyy_sde=error[4],
             yx_cyx_sde=error[5],
             yx_cxx_sde=error[5],
+            **_prefixed(self._telemetry, "yx_"),
         )
 
 
 class ZYXFitter:
+    """
+    Fit a 3D Gaussian to the whole bead crop.
+
+    With `parameterization="precision"` the model is fitted on the Cholesky
+    factor of the inverse covariance, which needs no matrix inversion per
+    evaluation and can't become indefinite. The result is converted back to
+    covariance entries, so the returned record is the same for both.
+
+    `initial_parameters` and `bounds` (covariance form, see
+    `zyx_initial_parameters_from_records`) replace the moment based start
+    values. If that warm-started fit fails, it is retried from the estimate.
+
+    With `support_sigma` only voxels within that many signal sigmas of the
+    signal centroid, plus every `background_stride`-th voxel, are fitted.
+    """
+
     image: Calibrated3DImage = None
     _estimator: ZYXEstimator
+    _parameterization: str = "covariance"
+    _initial_parameters: ArrayLike = None
+    _bounds: Tuple[ArrayLike, ArrayLike] = None
+    _support_sigma: float = None
+    _background_stride: int = 8
+    _fit_data: Tuple[ArrayLike, ArrayLike] = None
+    _telemetry: dict = None
     _debug: bool = True
 
-    def __init__(self, image: Calibrated3DImage):
+    def __init__(
+        self,
+        image: Calibrated3DImage,
+        parameterization: str = "covariance",
+        initial_parameters: ArrayLike = None,
+        bounds: Tuple[ArrayLike, ArrayLike] = None,
+        statistics: BeadStatistics = None,
+        support_sigma: float = None,
+        background_stride: int = 8,
+    ):
+        if parameterization not in ("covariance", "precision"):
+            raise ValueError(f"Unknown ZYX parameterization: {parameterization}")
         self.image = image
+        self._parameterization = parameterization
+        self._initial_parameters = initial_parameters
+        self._bounds = bounds
+        self._support_sigma = support_sigma
+        self._background_stride = background_stride
+        self._fit_data = None
         self._estimator = ZYXEstimator(
             image=self.image,
             zyx_sample=ZYXSample(
                 image=self.image,
             ),
+            statistics=statistics,
         )
 
-    def _fit_gaussian(self) -> Tuple[ArrayLike, ArrayLike]:
-        curve_fit_params = [
+    def _get_initial_parameters(self) -> list:
+        return [
             self._estimator.get_background(),
             self._estimator.get_amplitude(),
             *self._estimator.get_centroid(),
@@ -200,14 +352,52 @@ class ZYXFitter:
             0,
             self._estimator.get_sigmas()[2] ** 2,
         ]
-        try:
-            optimal_params, covariance = curve_fit(
-                evaluate_3d_gaussian,
-                xdata=self._estimator.sample.get_ravelled_coordinates(),
-                ydata=self._estimator.sample.image.data.ravel(),
-                p0= curve_fit_params
 
+    def _get_fit_data(self) -> Tuple[ArrayLike, ArrayLike]:
+        if self._fit_data is None:
+            self._fit_data = _get_support_data(
+                self._estimator.sample,
+                self._estimator.statistics.get_signal_centroid(),
+                self._estimator.statistics.get_signal_sigmas(),
+                self._support_sigma,
+                self._background_stride,
+                n_parameters=11,
             )
+
+        return self._fit_data
+
+    def _fit_gaussian(self) -> Tuple[ArrayLike, ArrayLike]:
+        start = time.perf_counter()
+        retries = 0
+        if self._initial_parameters is not None:
+            try:
+                fit = self._fit_from(self._initial_parameters, self._bounds)
+            except (RuntimeError, ValueError) as e:
+                print(f"Warm-started fit failed, retrying from estimate: {e}")
+                retries += 1
+            else:
+                return fit
+        fit = self._fit_from(self._get_initial_parameters(), None)
+        self._telemetry["fit_time"] = time.perf_counter() - start
+        self._telemetry["retries"] = retries
+        return fit
+
+    def _fit_from(self, curve_fit_params, bounds) -> Tuple[ArrayLike, ArrayLike]:
+        if bounds is not None:
+            curve_fit_params = np.clip(curve_fit_params, *bounds)
+        try:
+            if self._parameterization == "precision":
+                optimal_params, covariance = self._fit_precision_gaussian(curve_fit_params, bounds)
+            else:
+                xdata, ydata = self._get_fit_data()
+                optimal_params, covariance, self._telemetry = _curve_fit_with_telemetry(
+                    evaluate_3d_gaussian,
+                    xdata=xdata,
+                    ydata=ydata,
+                    p0= curve_fit_params,
+                    jac=evaluate_3d_gaussian_jacobian,
+                    bounds=bounds if bounds is not None else (-np.inf, np.inf),
+                )
             if optimal_params[2] < 0 or optimal_params[3] < 0 or optimal_params[4] < 0:
                 print(f"Negative mu found: {optimal_params[2:5]}")
                 raise RuntimeError("Negative mu")
@@ -217,12 +407,68 @@ class ZYXFitter:
 
         return optimal_params, covariance
 
+    def _fit_precision_gaussian(self, curve_fit_params, bounds=None) -> Tuple[ArrayLike, ArrayLike]:
+        try:
+            cholesky_params = precision_cholesky_from_covariance(*curve_fit_params[5:])
+        except np.linalg.LinAlgError as e:
+            raise RuntimeError(f"Initial covariance is not positive-definite: {e}")
+        precision_params = [*curve_fit_params[:5], *cholesky_params]
+        if bounds is not None:
+            # Covariance bounds don't map onto the Cholesky entries, only the
+            # background, amplitude and centroid bounds are kept.
+            unbounded = np.full(6, np.inf)
+            bounds = (
+                np.concatenate([bounds[0][:5], -unbounded]),
+                np.concatenate([bounds[1][:5], unbounded]),
+            )
+        xdata, ydata = self._get_fit_data()
+        optimal_precision_params, precision_covariance, self._telemetry = _curve_fit_with_telemetry(
+            evaluate_3d_gaussian_precision,
+            xdata=xdata,
+            ydata=ydata,
+            p0=precision_params,
+            jac=evaluate_3d_gaussian_precision_jacobian,
+            bounds=bounds if bounds is not None else (-np.inf, np.inf),
+        )
+
+        covariance_params, cholesky_transform = covariance_from_precision_cholesky(
+            *optimal_precision_params[5:]
+        )
+        transform = np.eye(11)
+        transform[5:, 5:] = cholesky_transform
+
+        optimal_params = np.concatenate([optimal_precision_params[:5], covariance_params])
+        return optimal_params, transform @ precision_covariance @ transform.T
+
     def fit(self) -> ZYXFitRecord:
         try:
             optimal_parameters, covariance = self._fit_gaussian()
         except RuntimeError as e:
             raise e
-        principal_components = self._get_principal_components(optimal_parameters)
+        try:
+            return self.create_record(optimal_parameters, covariance, self._telemetry)
+        except (ValueError, TypeError, ValidationError) as e:
+            print(f"Error creating record: from image with shape {self.image.data.shape}")
+            raise e
+
+    @classmethod
+    def create_record(
+        cls, optimal_parameters: ArrayLike, covariance: ArrayLike, telemetry: dict = None
+    ) -> ZYXFitRecord:
+        """
+        Build the record for fitted covariance-form parameters.
+
+        Parameters
+        ----------
+        optimal_parameters : the 11 parameters of `evaluate_3d_gaussian`
+        covariance : (11, 11) covariance of the parameters
+        telemetry : optional fit telemetry, see `_curve_fit_with_telemetry`
+
+        Returns
+        -------
+        Fitted parameters and standard error
+        """
+        principal_components = cls._get_principal_components(optimal_parameters)
         error = np.abs(np.sqrt(np.diag(covariance)))
         try:
             if any(optimal_parameters) < 0:
@@ -257,10 +503,11 @@ class ZYXFitter:
                 zyx_cyy_sde=error[8],
                 zyx_cyx_sde=error[9],
                 zyx_cxx_sde=error[10],
+                **_prefixed(telemetry, "zyx_"),
 
             )
         except (ValueError, TypeError, ValidationError) as e:
-            print(f"Error creating record: from image with shape {self.image.data.shape}")
+            print(f"Error creating record from parameters: {optimal_parameters}")
             raise e
         else:
             return record
@@ -269,8 +516,9 @@ class ZYXFitter:
         # plot_correlation_matrix(correlation_matrix)
 
 
+    @staticmethod
     def _get_principal_components(
-        self, optimal_params: ArrayLike
+        optimal_params: ArrayLike
     ) -> Tuple[float, float, float]:
         zyx_cov_matrix = np.array(
             [
@@ -281,3 +529,78 @@ class ZYXFitter:
         )
         pc = np.sort(np.abs(np.sqrt(np.linalg.eigvals(zyx_cov_matrix))))[::-1]
         return tuple(pc)
+
+
+def zyx_initial_parameters_from_records(
+    z_fit_record: ZFitRecord, yx_fit_record: YXFitRecord
+) -> list:
+    """
+    Start values for `ZYXFitter` taken from the converged 1D and 2D fits.
+
+    The Z profile and the YX plane both run through the crop center, so their
+    larger amplitude is the closest to the 3D peak. The cross terms between Z
+    and YX are started at zero.
+
+    Returns
+    -------
+    The 11 parameters of `evaluate_3d_gaussian`
+    """
+    return [
+        yx_fit_record.yx_bg,
+        max(z_fit_record.z_amp, yx_fit_record.yx_amp),
+        z_fit_record.z_mu,
+        yx_fit_record.y_mu,
+        yx_fit_record.x_mu,
+        z_fit_record.z_sigma**2,
+        0,
+        0,
+        yx_fit_record.yx_cyy,
+        yx_fit_record.yx_cyx,
+        yx_fit_record.yx_cxx,
+    ]
+
+
+def zyx_bounds_from_records(
+    image: Calibrated3DImage, z_fit_record: ZFitRecord, yx_fit_record: YXFitRecord
+) -> Tuple[ArrayLike, ArrayLike]:
+    """
+    Bounds for `ZYXFitter` around the converged 1D and 2D fits.
+
+    Background and amplitude are kept non-negative and the centroid within one
+    FWHM of the 1D/2D centers, clipped to the crop. Covariance entries are left
+    unbounded.
+    """
+    extent = (np.array(image.data.shape) - 1) * np.array(image.spacing)
+    mu = np.array([z_fit_record.z_mu, yx_fit_record.y_mu, yx_fit_record.x_mu])
+    fwhms = np.array([z_fit_record.z_fwhm, yx_fit_record.y_fwhm, yx_fit_record.x_fwhm])
+
+    lower = np.full(11, -np.inf)
+    upper = np.full(11, np.inf)
+    lower[:2] = 0
+    lower[2:5] = np.clip(mu - fwhms, 0, extent)
+    upper[2:5] = np.clip(mu + fwhms, 0, extent)
+    return lower, upper
+
+
+def passes_quality_gates(
+    image: Calibrated3DImage, z_fit_record: ZFitRecord, yx_fit_record: YXFitRecord
+) -> bool:
+    """
+    Check that the 1D and 2D fits describe a bead worth fitting in 3D.
+
+    The fits must have a positive amplitude, a center inside the crop, a FWHM
+    smaller than the crop and finite standard errors on the center.
+    """
+    extent = (np.array(image.data.shape) - 1) * np.array(image.spacing)
+    mu = np.array([z_fit_record.z_mu, yx_fit_record.y_mu, yx_fit_record.x_mu])
+    fwhms = np.array([z_fit_record.z_fwhm, yx_fit_record.y_fwhm, yx_fit_record.x_fwhm])
+    mu_sde = np.array([z_fit_record.z_mu_sde, yx_fit_record.y_mu_sde, yx_fit_record.x_mu_sde])
+
+    return bool(
+        z_fit_record.z_amp > 0
+        and yx_fit_record.yx_amp > 0
+        and np.all(mu >= 0)
+        and np.all(mu <= extent)
+        and np.all(fwhms < extent)
+        and np.all(np.isfinite(mu_sde))
+    )
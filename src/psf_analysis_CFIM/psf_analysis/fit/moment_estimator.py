@@ -0,0 +1,154 @@
+from typing import List, Optional
+
+import numpy as np
+from numpy._typing import ArrayLike
+
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.records import (
+    PSFRecord,
+    YXFitRecord,
+    ZFitRecord,
+    ZYXFitRecord,
+)
+from psf_analysis_CFIM.psf_analysis.utils import estimate_from_data_batch, fwhm
+
+
+class MomentEstimator:
+    """
+    Approximate PSF records from intensity moments, without any fitting.
+
+    Equally shaped bead crops are stacked and the background subtracted
+    centroid and covariance of the signal are computed for the center Z
+    column, the center YX plane and the whole crop of all beads at once, see
+    `estimate_from_data_batch`. Records take the same
+    fields as the fitted ones. Amplitude and background are the moment
+    estimates, and the standard errors are NaN. The records are built without
+    validation for that reason.
+    """
+
+    images: List[Calibrated3DImage] = None
+    _data: ArrayLike = None
+
+    def __init__(self, images: List[Calibrated3DImage]):
+        if len(images) == 0:
+            raise ValueError("Need at least one image to estimate.")
+        shape = images[0].data.shape
+        if any(image.data.shape != shape for image in images):
+            raise ValueError("All images of a batch must have the same shape.")
+
+        self.images = images
+        self._spacing = images[0].spacing
+        self._data = np.stack([image.data for image in images])
+
+    def estimate(self) -> List[Optional[PSFRecord]]:
+        """
+        Estimate all beads of the batch.
+
+        Returns
+        -------
+        One record per image, or None where the crop holds no signal above the
+        background.
+        """
+        _, size_y, size_x = self._data.shape[1:]
+        z_estimates = estimate_from_data_batch(
+            self._data[:, :, size_y // 2, size_x // 2], self._data, self._spacing[:1]
+        )
+        yx_estimates = estimate_from_data_batch(
+            self._data[:, self._data.shape[1] // 2], self._data, self._spacing[1:]
+        )
+        zyx_estimates = estimate_from_data_batch(self._data, self._data, self._spacing)
+
+        records = []
+        for i in range(len(self.images)):
+            estimates = [
+                (bg[i], amp[i], mu[i], cov[i])
+                for bg, amp, mu, cov in (z_estimates, yx_estimates, zyx_estimates)
+            ]
+            if not all(np.all(np.isfinite(mu)) and np.all(np.isfinite(cov)) for _, _, mu, cov in estimates):
+                records.append(None)
+                continue
+            records.append(
+                PSFRecord.model_construct(
+                    z_fit=self._create_z_record(*estimates[0]),
+                    yx_fit=self._create_yx_record(*estimates[1]),
+                    zyx_fit=self._create_zyx_record(*estimates[2]),
+                )
+            )
+
+        return records
+
+    @staticmethod
+    def _principal_fwhms(cov: ArrayLike) -> ArrayLike:
+        return fwhm(np.sqrt(np.abs(np.linalg.eigvalsh(cov)))[::-1])
+
+    @staticmethod
+    def _create_z_record(bg, amp, mu, cov) -> ZFitRecord:
+        return ZFitRecord.model_construct(
+            z_bg=float(bg),
+            z_amp=float(amp),
+            z_mu=float(mu[0]),
+            z_sigma=float(np.sqrt(cov[0, 0])),
+            z_fwhm=float(fwhm(np.sqrt(cov[0, 0]))),
+            z_bg_sde=np.nan,
+            z_amp_sde=np.nan,
+            z_mu_sde=np.nan,
+            z_sigma_sde=np.nan,
+        )
+
+    @classmethod
+    def _create_yx_record(cls, bg, amp, mu, cov) -> YXFitRecord:
+        principal_fwhms = cls._principal_fwhms(cov)
+        return YXFitRecord.model_construct(
+            yx_bg=float(bg),
+            yx_amp=float(amp),
+            y_mu=float(mu[0]),
+            x_mu=float(mu[1]),
+            yx_cyy=float(cov[0, 0]),
+            yx_cyx=float(cov[0, 1]),
+            yx_cxx=float(cov[1, 1]),
+            y_fwhm=float(fwhm(np.sqrt(cov[0, 0]))),
+            x_fwhm=float(fwhm(np.sqrt(cov[1, 1]))),
+            yx_pc1_fwhm=float(principal_fwhms[0]),
+            yx_pc2_fwhm=float(principal_fwhms[1]),
+            yx_bg_sde=np.nan,
+            yx_amp_sde=np.nan,
+            y_mu_sde=np.nan,
+            x_mu_sde=np.nan,
+            yx_cyy_sde=np.nan,
+            yx_cyx_sde=np.nan,
+            yx_cxx_sde=np.nan,
+        )
+
+    @classmethod
+    def _create_zyx_record(cls, bg, amp, mu, cov) -> ZYXFitRecord:
+        principal_fwhms = cls._principal_fwhms(cov)
+        return ZYXFitRecord.model_construct(
+            zyx_bg=float(bg),
+            zyx_amp=float(amp),
+            zyx_z_mu=float(mu[0]),
+            zyx_y_mu=float(mu[1]),
+            zyx_x_mu=float(mu[2]),
+            zyx_czz=float(cov[0, 0]),
+            zyx_czy=float(cov[0, 1]),
+            zyx_czx=float(cov[0, 2]),
+            zyx_cyy=float(cov[1, 1]),
+            zyx_cyx=float(cov[1, 2]),
+            zyx_cxx=float(cov[2, 2]),
+            zyx_z_fwhm=float(fwhm(np.sqrt(cov[0, 0]))),
+            zyx_y_fwhm=float(fwhm(np.sqrt(cov[1, 1]))),
+            zyx_x_fwhm=float(fwhm(np.sqrt(cov[2, 2]))),
+            zyx_pc1_fwhm=float(principal_fwhms[0]),
+            zyx_pc2_fwhm=float(principal_fwhms[1]),
+            zyx_pc3_fwhm=float(principal_fwhms[2]),
+            zyx_bg_sde=np.nan,
+            zyx_amp_sde=np.nan,
+            zyx_z_mu_sde=np.nan,
+            zyx_y_mu_sde=np.nan,
+            zyx_x_mu_sde=np.nan,
+            zyx_czz_sde=np.nan,
+            zyx_czy_sde=np.nan,
+            zyx_czx_sde=np.nan,
+            zyx_cyy_sde=np.nan,
+            zyx_cyx_sde=np.nan,
+            zyx_cxx_sde=np.nan,
+        )
@@ -10,7 +10,8 @@ from psf_analysis_CFIM.error_widget.error_display_widget import ErrorDisplayWidg
 
 # TODO: Rewrite this to a class
 # TODO: A whole section for analysing quality after finding beads
-def analyze_image(img_layer, widget_settings: Dict[str, any], num_bins=8):
+def analyze_image(img_layer, widget_settings: Dict[str, any], num_bins=8,
+                  report_error=report_validation_error, report_warning=report_validation_warning):
 
     img_data = img_layer.data
     settings = widget_settings
@@ -20,8 +21,10 @@ def analyze_image(img_layer, widget_settings: Dict[str, any], num_bins=8):
 
     if img_data is None:
         raise ValueError("Image data cannot be None")
-    if not isinstance(img_data, np.ndarray):
-        raise TypeError("Image data must be a NumPy array")
+    if not hasattr(img_data, "shape") or not hasattr(img_data, "dtype"):
+        raise TypeError("Image data must be a NumPy or dask array")
+    if not isinstance(img_data, np.ndarray) and img_data.dtype not in (np.uint8, np.uint16):
+        img_data = np.asarray(img_data)
 
     # Determine max intensity value from image data type
     if np.issubdtype(img_data.dtype, np.integer):
@@ -29,20 +32,23 @@ def analyze_image(img_layer, widget_settings: Dict[str, any], num_bins=8):
     else:
         max_val = img_data.max()
 
-    # Calculate pixel counts
-    min_pixels = (img_data == 0).sum()
-    max_pixels = (img_data == max_val).sum()
     total_pixels = img_data.size
 
     if total_pixels == 0:
         raise ValueError("Image contains no pixels to analyze.")
 
+    if img_data.dtype in (np.uint8, np.uint16):
+        min_pixels, max_pixels, hist = _count_intensities(img_data, max_val, num_bins)
+    else:
+        # Calculate pixel counts
+        min_pixels = (img_data == 0).sum()
+        max_pixels = (img_data == max_val).sum()
 
-    # Filter out min and max values
-    img_filtered = img_data[(img_data > 0) & (img_data < max_val)]
+        # Filter out min and max values
+        img_filtered = img_data[(img_data > 0) & (img_data < max_val)]
 
-    # Compute histogram
-    hist, bin_edges = np.histogram(img_filtered, bins=num_bins, range=(0, max_val))
+        # Compute histogram
+        hist, bin_edges = np.histogram(img_filtered, bins=num_bins, range=(0, max_val))
 
     # Compute percentages
     percentages = (hist / total_pixels) * 100
@@ -50,17 +56,39 @@ def analyze_image(img_layer, widget_settings: Dict[str, any], num_bins=8):
     max_percentage = max_pixels / total_pixels * 100
 
     # Error handling
-    error_handling_intensity(min_percentage, max_percentage, max_val, settings["intensity_settings"],channel)
+    error_handling_intensity(min_percentage, max_percentage, max_val, settings["intensity_settings"],channel,
+                             report_error=report_error, report_warning=report_warning)
     # report_noise(img_data, error_widget, settings["noise_settings"]) # TODO: Make this work better before enabling
 
     try:
-        expected_z_spacing = report_z_spacing(img_layer, widget_settings, channel)
+        expected_z_spacing = report_z_spacing(img_layer, widget_settings, channel,
+                                              report_error=report_error, report_warning=report_warning)
     except ValueError as e:
         print(f"Error calculating expected z spacing: {e}")
         expected_z_spacing = None
     return expected_z_spacing
 
-def error_handling_intensity(min_percentage, max_percentage, max_val, settings, channel):
+def _count_intensities(img_data: np.ndarray, max_val: int, num_bins: int, chunk_size: int = 2 ** 22):
+    """
+    Zero count, saturated count and histogram of an unsigned integer image in one pass.
+
+    Every intensity is counted with `np.bincount`, chunk by chunk, so no
+    filtered copy of the image is made. The histogram of the values between
+    0 and max_val is then binned from those counts and equals
+    `np.histogram(img_data[(img_data > 0) & (img_data < max_val)], bins=num_bins, range=(0, max_val))`.
+    """
+    counts = np.zeros(int(max_val) + 1, dtype=np.int64)
+    planes_per_chunk = max(1, chunk_size * img_data.shape[0] // img_data.size)
+    for start in range(0, img_data.shape[0], planes_per_chunk):
+        chunk = np.asarray(img_data[start:start + planes_per_chunk])
+        counts += np.bincount(chunk.ravel(), minlength=counts.size)
+
+    hist, _ = np.histogram(np.arange(1, max_val), bins=num_bins, range=(0, max_val), weights=counts[1:max_val])
+    return counts[0], counts[max_val], hist.astype(np.int64)
+
+
+def error_handling_intensity(min_percentage, max_percentage, max_val, settings, channel,
+                             report_error=report_validation_error, report_warning=report_validation_warning):
     # TODO: make constants dependent on config file
     lower_warning_percent = settings["lower_warning_percent"]
     lower_error_percent = settings["lower_error_percent"]
@@ -69,14 +97,14 @@ def error_handling_intensity(min_percentage, max_percentage, max_val, settings,
 
     # Cast warnings / errors based on constants
     if min_percentage > lower_error_percent:
-        report_validation_error(f"Too many pixels with min intensity | {round(min_percentage, 4)}% of pixels",channel)
+        report_error(f"Too many pixels with min intensity | {round(min_percentage, 4)}% of pixels",channel)
     elif min_percentage > lower_warning_percent:
-        report_validation_warning(f"Many pixels with min intensity | {round(min_percentage, 4)}% of pixels",channel)
+        report_warning(f"Many pixels with min intensity | {round(min_percentage, 4)}% of pixels",channel)
 
     if max_percentage > upper_error_percent:
-        report_validation_error(f"Too many pixels with max intensity ({max_val}) | {round(max_percentage, 4)}% of pixels",channel)
+        report_error(f"Too many pixels with max intensity ({max_val}) | {round(max_percentage, 4)}% of pixels",channel)
     elif max_percentage > upper_warning_percent:
-        report_validation_warning(f"Many pixels with max intensity ({max_val}) | {round(max_percentage, 4)}% of pixels",channel)
+        report_warning(f"Many pixels with max intensity ({max_val}) | {round(max_percentage, 4)}% of pixels",channel)
 
 
 
@@ -95,7 +123,8 @@ def report_noise(img_data, error_widget, settings):
     elif standard_deviation > high_noise_threshold:
             error_widget.add_error(f"High noise detected, image might be unusable | Standard deviation: {standard_deviation:.2f}")
 
-def report_z_spacing(img_layer, widget_settings: Dict[str, any], channel=0):
+def report_z_spacing(img_layer, widget_settings: Dict[str, any], channel=0,
+                     report_error=report_validation_error, report_warning=report_validation_warning):
     """
     Calculate the expected bead z size and compare it to the z-spacing of the image.
 
@@ -120,15 +149,25 @@ def report_z_spacing(img_layer, widget_settings: Dict[str, any], channel=0):
     if None in (reflective_index, emission, numeric_aparature):
         raise ValueError(f"Missing required settings for calculating expected bead z size. \n reflective index | emission | numeric aparature\nGot: {widget_settings}")
 
-    expected_bead_z_size = (2 * reflective_index * emission) / numeric_aparature ** 2
+    expected_bead_z_size = get_expected_bead_z_size(reflective_index, emission, numeric_aparature)
 
     if z_spacing > expected_bead_z_size / 2.5:
-        report_validation_error(f"Z-spacing is too large | Z-spacing: {z_spacing:.2f} nm", int(channel))
+        report_error(f"Z-spacing is too large | Z-spacing: {z_spacing:.2f} nm", int(channel))
     elif z_spacing > expected_bead_z_size / 3.5:
-        report_validation_warning(f"Z-spacing is larger than expected | Z-spacing: {z_spacing:.2f} nm", int(channel))
+        report_warning(f"Z-spacing is larger than expected | Z-spacing: {z_spacing:.2f} nm", int(channel))
     return expected_bead_z_size
 
 
+def get_expected_bead_z_size(reflective_index: float, emission: float, numeric_aparature: float) -> float:
+    """Expected axial bead size in nm: (2 * RI * λ) / NA^2."""
+    return (2 * reflective_index * emission) / numeric_aparature ** 2
+
+
+def get_expected_bead_yx_size(emission: float, numeric_aparature: float) -> float:
+    """Expected lateral bead size (FWHM) in nm: 0.51 * λ / NA."""
+    return 0.51 * emission / numeric_aparature
+
+
 def _calculate_snr(img_data: np.ndarray) -> float:
     """Calculate the Signal-to-Noise Ratio (SNR) of an image."""
     signal_power = np.mean(img_data ** 2)
@@ -0,0 +1,123 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from napari.qt.threading import thread_worker
+
+from psf_analysis_CFIM.error_widget.error_display_widget import (
+    report_validation_error,
+    report_validation_warning,
+)
+from psf_analysis_CFIM.psf_analysis.image_analysis import analyze_image
+
+
+def _settings_key(widget_settings: dict) -> str:
+    return repr(sorted(widget_settings.items()))
+
+
+class ImageQCService:
+    """
+    Runs image QC (`analyze_image`) off the Qt thread and caches it per layer.
+
+    The checks of a selection run in a napari `thread_worker`. Their errors
+    and warnings are collected there and only reported, through the
+    validation emitter, once the worker returns, so they reach the
+    `ErrorDisplayWidget` on the Qt thread. Results are cached per layer and
+    settings, and a cached layer is reported again without being read.
+    Only the newest validation reports; results of an outdated one are just
+    cached.
+    """
+
+    def __init__(self):
+        self._cache: Dict[int, Tuple[object, object, str, dict]] = {}
+        self._generation = 0
+        self._worker = None
+
+    def validate(
+        self,
+        layers: List[object],
+        widget_settings: Dict[int, dict],
+        on_done: Callable[[Optional[float]], None],
+    ):
+        """
+        Validate image layers and report their errors and warnings.
+
+        Parameters
+        ----------
+        layers :
+            Image layers to check
+        widget_settings :
+            `analyze_image` settings of each layer, keyed by `id(layer)`
+        on_done :
+            Called on the Qt thread with the largest expected bead z size of
+            the layers, or None if none could be computed.
+        """
+        self._generation += 1
+        generation = self._generation
+        results = {}
+        pending = []
+        for layer in layers:
+            cached = self._get_cached(layer, widget_settings[id(layer)])
+            if cached is None:
+                pending.append(layer)
+            else:
+                results[id(layer)] = cached
+
+        def _finish(computed):
+            for layer in pending:
+                if id(layer) in computed:
+                    self._cache[id(layer)] = (layer, layer.data, _settings_key(widget_settings[id(layer)]), computed[id(layer)])
+            if generation != self._generation:
+                return
+            results.update(computed)
+            self._report([results[id(layer)] for layer in layers if id(layer) in results], on_done)
+
+        if not pending:
+            _finish({})
+            return
+
+        @thread_worker
+        def _run_qc():
+            return {id(layer): self._analyze(layer, widget_settings[id(layer)]) for layer in pending}
+
+        self._worker = _run_qc()
+        self._worker.returned.connect(_finish)
+        self._worker.errored.connect(lambda e: print(f"Error in image analysis: {e}"))
+        self._worker.start()
+
+    def evict(self, layer):
+        self._cache.pop(id(layer), None)
+
+    def _get_cached(self, layer, settings: dict) -> Optional[dict]:
+        entry = self._cache.get(id(layer))
+        if entry is None:
+            return None
+        cached_layer, data, settings_key, result = entry
+        if cached_layer is layer and data is layer.data and settings_key == _settings_key(settings):
+            return result
+        return None
+
+    @staticmethod
+    def _analyze(layer, settings: dict) -> dict:
+        """Run QC on one layer, collecting its messages instead of reporting them."""
+        messages = []
+        try:
+            expected_z_spacing = analyze_image(
+                layer,
+                settings,
+                report_error=lambda message, channel: messages.append(("error", message, int(channel))),
+                report_warning=lambda message, channel: messages.append(("warning", message, int(channel))),
+            )
+        except Exception as e:
+            print(f"Error in image analysis of {layer}: {e}")
+            expected_z_spacing = None
+        return {"expected_z_spacing": expected_z_spacing, "messages": messages}
+
+    @staticmethod
+    def _report(results: List[dict], on_done: Callable[[Optional[float]], None]):
+        for result in results:
+            for kind, message, channel in result["messages"]:
+                if kind == "error":
+                    report_validation_error(message, channel)
+                else:
+                    report_validation_warning(message, channel)
+        spacings = [r["expected_z_spacing"] for r in results if r["expected_z_spacing"] is not None]
+        on_done(max(spacings) if spacings else None)
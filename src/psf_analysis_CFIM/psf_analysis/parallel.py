@@ -0,0 +1,37 @@
+from typing import Optional, Tuple
+
+from numpy._typing import ArrayLike
+
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.psf import PSF
+from psf_analysis_CFIM.psf_analysis.records import PSFRecord
+
+
+def analyze_bead(
+    data: ArrayLike,
+    spacing: Tuple[float, float, float],
+    offset: Tuple[int, int, int],
+    psf_settings: dict,
+) -> Optional[PSFRecord]:
+    """
+    Fit one bead crop.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    The summary figure is rendered later, from the returned record.
+
+    Parameters
+    ----------
+    data : bead crop
+    spacing : pixel spacing of the crop
+    offset : position of the crop in the whole image, in pixels
+    psf_settings : settings passed on to `PSF`
+
+    Returns
+    -------
+    The fitted record of the bead, or None if the fit failed.
+    """
+    psf = PSF(image=Calibrated3DImage(data=data, spacing=spacing, offset=offset), psf_settings=psf_settings)
+    psf.analyze()
+    if psf.error:
+        return None
+    return psf.get_record()
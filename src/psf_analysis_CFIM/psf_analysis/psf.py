@@ -9,7 +9,15 @@ from mpl_toolkits.mplot3d.axis3d import Axis
 from numpy._typing import ArrayLike
 from pydantic import ValidationError
 
-from psf_analysis_CFIM.psf_analysis.fit.fitter import YXFitter, ZFitter, ZYXFitter
+from psf_analysis_CFIM.psf_analysis.fit.estimator import BeadStatistics
+from psf_analysis_CFIM.psf_analysis.fit.fitter import (
+    YXFitter,
+    ZFitter,
+    ZYXFitter,
+    passes_quality_gates,
+    zyx_bounds_from_records,
+    zyx_initial_parameters_from_records,
+)
 from psf_analysis_CFIM.psf_analysis.image import Calibrated2DImage, Calibrated3DImage
 from psf_analysis_CFIM.psf_analysis.records import (
     PSFRecord,
@@ -17,7 +25,7 @@ from psf_analysis_CFIM.psf_analysis.records import (
     ZFitRecord,
     ZYXFitRecord,
 )
-from psf_analysis_CFIM.psf_analysis.sample import YXSample
+from psf_analysis_CFIM.psf_analysis.sample import YXSample, get_coordinate_grid
 
 # Patch matplotlib to render ticks in 3D correctly.
 # See: https://stackoverflow.com/a/16496436
@@ -40,6 +48,7 @@ class PSFRenderEngine:
         "covariance_ellipsoid": False,
         "coordinate_annotation": False,
     }
+    figure_size: Tuple[float, float] = (10, 10)
     psf_image: Calibrated3DImage = None
     psf_record: PSFRecord = None
     _figure: Figure = None
@@ -63,7 +72,7 @@ class PSFRenderEngine:
 
     def _build_layout(self, dpi: int = 300) -> None:
 
-        self._figure = plt.figure(figsize=(10, 10), dpi=dpi)
+        self._figure = plt.figure(figsize=self.figure_size, dpi=dpi)
         self._add_axes()
 
     def _add_axes(self):
@@ -253,12 +262,11 @@ class PSFRenderEngine:
         )
 
     def _get_target_points(self, num_samples: int):
-        yy, xx = np.meshgrid(
-            np.arange(num_samples) * 4000 / num_samples - 2000,
-            np.arange(num_samples) * 4000 / num_samples - 2000,
-            indexing="ij",
+        return get_coordinate_grid(
+            shape=(num_samples, num_samples),
+            spacing=(4000 / num_samples,) * 2,
+            origin=(-2000, -2000),
         )
-        return np.stack([yy.ravel(), xx.ravel()], axis=-1)
 
     def _estimate_number_of_samples(self, spacing: Tuple[float, float], dpi: int):
         num_samples = int(np.min(spacing) * 10)
@@ -889,14 +897,53 @@ class PSF:
         self.image = image
         self.settings = psf_settings
 
-    def analyze(self) -> None:
-        z_fitter = ZFitter(image=self.image)
-        yx_fitter = YXFitter(image=self.image)
-        zyx_fitter = ZYXFitter(image=self.image)
+    def analyze(self, zyx_fit_record: ZYXFitRecord = None) -> None:
+        """
+        Fit the Z, YX and ZYX models to the bead.
+
+        Parameters
+        ----------
+        zyx_fit_record : Optional ZYX result fitted elsewhere, e.g. by the
+            batched fitter. The ZYX fit is skipped when it is given.
+
+        With `fit_settings.zyx_warm_start` the ZYX fit starts from the Z and YX
+        results, and `fit_settings.quality_gates` marks the bead as failed
+        without a ZYX fit when the Z/YX fits look unusable.
+        `fit_settings.support_mask` restricts the YX and ZYX fits to the voxels
+        around the signal and a sparse background sample.
+        """
+        fit_settings = self.settings.get("fit_settings", {})
+        statistics = BeadStatistics(image=self.image)
+        support = {}
+        if fit_settings.get("support_mask", False):
+            support = {
+                "support_sigma": fit_settings.get("support_sigma", 3.0),
+                "background_stride": fit_settings.get("support_background_stride", 8),
+            }
+        z_fitter = ZFitter(image=self.image, statistics=statistics)
+        yx_fitter = YXFitter(image=self.image, statistics=statistics, **support)
         try:
             z_fit_record: ZFitRecord = z_fitter.fit()
             yx_fit_record: YXFitRecord = yx_fitter.fit()
-            zyx_fit_record: ZYXFitRecord = zyx_fitter.fit()
+            if fit_settings.get("quality_gates", False) and not passes_quality_gates(
+                self.image, z_fit_record, yx_fit_record
+            ):
+                raise RuntimeError("Z/YX fits failed the quality gates")
+            if zyx_fit_record is None:
+                initial_parameters, bounds = None, None
+                if fit_settings.get("zyx_warm_start", False):
+                    initial_parameters = zyx_initial_parameters_from_records(z_fit_record, yx_fit_record)
+                    if fit_settings.get("zyx_warm_start_bounds", False):
+                        bounds = zyx_bounds_from_records(self.image, z_fit_record, yx_fit_record)
+                zyx_fitter = ZYXFitter(
+                    image=self.image,
+                    parameterization=fit_settings.get("zyx_parameterization", "covariance"),
+                    initial_parameters=initial_parameters,
+                    bounds=bounds,
+                    statistics=statistics,
+                    **support,
+                )
+                zyx_fit_record = zyx_fitter.fit()
         except RuntimeError as e:
             print(f"Runtime error fitting point: {self.image.get_corner_coordinates()}")
             self.error = True
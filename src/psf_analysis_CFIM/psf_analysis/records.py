@@ -1,6 +1,6 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
-from pydantic import BaseModel, NonNegativeFloat, PositiveFloat, PositiveInt
+from pydantic import BaseModel, NonNegativeFloat, NonNegativeInt, PositiveFloat, PositiveInt
 
 
 class ZFitRecord(BaseModel):
@@ -13,6 +13,11 @@ class ZFitRecord(BaseModel):
     z_amp_sde: NonNegativeFloat
     z_mu_sde: NonNegativeFloat
     z_sigma_sde: NonNegativeFloat
+    z_nfev: Optional[NonNegativeInt] = None
+    z_fit_time: Optional[NonNegativeFloat] = None
+    z_cost: Optional[NonNegativeFloat] = None
+    z_status: Optional[int] = None
+    z_retries: Optional[NonNegativeInt] = None
 
 
 class YXFitRecord(BaseModel):
@@ -34,6 +39,11 @@ class YXFitRecord(BaseModel):
     yx_cyy_sde: NonNegativeFloat
     yx_cyx_sde: NonNegativeFloat
     yx_cxx_sde: NonNegativeFloat
+    yx_nfev: Optional[NonNegativeInt] = None
+    yx_fit_time: Optional[NonNegativeFloat] = None
+    yx_cost: Optional[NonNegativeFloat] = None
+    yx_status: Optional[int] = None
+    yx_retries: Optional[NonNegativeInt] = None
 
 
 class ZYXFitRecord(BaseModel):
@@ -65,6 +75,11 @@ class ZYXFitRecord(BaseModel):
     zyx_cyy_sde: NonNegativeFloat
     zyx_cyx_sde: NonNegativeFloat
     zyx_cxx_sde: NonNegativeFloat
+    zyx_nfev: Optional[NonNegativeInt] = None
+    zyx_fit_time: Optional[NonNegativeFloat] = None
+    zyx_cost: Optional[NonNegativeFloat] = None
+    zyx_status: Optional[int] = None
+    zyx_retries: Optional[NonNegativeInt] = None
 
 
 class PSFRecord(BaseModel):
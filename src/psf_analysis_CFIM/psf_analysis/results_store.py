@@ -0,0 +1,68 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy._typing import ArrayLike
+
+
+class ResultsStore:
+    """
+    Preallocated, column oriented table of per-bead results.
+
+    Numeric columns share one (columns, rows) float64 array, so every column
+    is contiguous and the whole block becomes a DataFrame without a copy.
+    Missing numeric values are NaN. Text and other non-numeric columns are
+    kept in object arrays.
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str], object_columns: Sequence[str] = ()):
+        self._columns: List[str] = list(columns)
+        self._numeric_columns: List[str] = [c for c in self._columns if c not in object_columns]
+        self._numeric_index: Dict[str, int] = {c: i for i, c in enumerate(self._numeric_columns)}
+        self._numeric = np.full((len(self._numeric_columns), max(capacity, 1)), np.nan)
+        self._objects: Dict[str, ArrayLike] = {
+            c: np.empty(max(capacity, 1), dtype=object) for c in self._columns if c in object_columns
+        }
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_row(self, values: Dict[str, object]) -> None:
+        """Write one row. Columns missing from `values` stay empty."""
+        if self._size == self._numeric.shape[1]:
+            self._grow()
+
+        row = self._size
+        for column, value in values.items():
+            if column in self._numeric_index:
+                self._numeric[self._numeric_index[column], row] = np.nan if value is None else value
+            else:
+                self._objects[column][row] = value
+        self._size += 1
+
+    def column(self, name: str) -> ArrayLike:
+        """View of the filled rows of one column."""
+        if name in self._numeric_index:
+            return self._numeric[self._numeric_index[name], : self._size]
+        return self._objects[name][: self._size]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Wrap the store in a DataFrame; the numeric columns aren't copied."""
+        dataframe = pd.DataFrame(
+            self._numeric[:, : self._size].T, columns=self._numeric_columns, copy=False
+        )
+        for position, column in enumerate(self._columns):
+            if column in self._objects:
+                dataframe.insert(position, column, self._objects[column][: self._size].tolist())
+        return dataframe
+
+    def _grow(self) -> None:
+        capacity = 2 * self._numeric.shape[1]
+        numeric = np.full((self._numeric.shape[0], capacity), np.nan)
+        numeric[:, : self._size] = self._numeric[:, : self._size]
+        self._numeric = numeric
+        for column, values in self._objects.items():
+            grown = np.empty(capacity, dtype=object)
+            grown[: self._size] = values[: self._size]
+            self._objects[column] = grown
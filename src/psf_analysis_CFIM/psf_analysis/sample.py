@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Tuple
 
 import numpy as np
 from numpy._typing import ArrayLike
@@ -11,6 +13,84 @@ from psf_analysis_CFIM.psf_analysis.image import (
 )
 
 
+def get_coordinate_grid(
+    shape: Tuple[int, ...],
+    spacing: Tuple[float, ...],
+    origin: Tuple[float, ...] = None,
+) -> ArrayLike:
+    """Ravelled, calibrated coordinates of every pixel of an n-D grid.
+
+    Grids are cached by (shape, spacing, origin) and shared between all
+    callers, so the returned array is read-only.
+
+    Parameters
+    ----------
+    shape :
+        Grid shape
+    spacing :
+        Pixel spacing along each axis
+    origin :
+        Coordinate of the first pixel, zero by default.
+
+    Returns
+    -------
+    ArrayLike
+        Read-only array of shape (prod(shape), len(shape))
+    """
+    if origin is None:
+        origin = (0.0,) * len(shape)
+    return _cached_coordinate_grid(
+        tuple(int(s) for s in shape),
+        tuple(float(s) for s in spacing),
+        tuple(float(o) for o in origin),
+    )
+
+
+@lru_cache(maxsize=16)
+def _cached_coordinate_grid(
+    shape: Tuple[int, ...], spacing: Tuple[float, ...], origin: Tuple[float, ...]
+) -> ArrayLike:
+    axes = [np.arange(size) * s + o for size, s, o in zip(shape, spacing, origin)]
+    grids = np.meshgrid(*axes, indexing="ij")
+    coords = np.stack([g.ravel() for g in grids], -1)
+    coords.flags.writeable = False
+    return coords
+
+
+def get_support_mask(
+    coordinates: ArrayLike,
+    centroid: Tuple[float, ...],
+    sigmas: Tuple[float, ...],
+    support_sigma: float = 3.0,
+    background_stride: int = 8,
+) -> ArrayLike:
+    """Mask of the coordinates that carry signal, plus a sparse background.
+
+    Parameters
+    ----------
+    coordinates :
+        (N, D) ravelled coordinates
+    centroid :
+        Center of the signal
+    sigmas :
+        Extent of the signal along each axis
+    support_sigma :
+        Coordinates within this many sigmas of `centroid` are kept.
+    background_stride :
+        Every `background_stride`-th coordinate is kept too, so the fit still
+        sees the background of the whole crop.
+
+    Returns
+    -------
+    ArrayLike
+        Boolean mask of shape (N,)
+    """
+    normalized = (coordinates - np.asarray(centroid)) / np.asarray(sigmas)
+    mask = np.sum(normalized**2, axis=1) <= support_sigma**2
+    mask[::background_stride] = True
+    return mask
+
+
 class Sample(ABC):
     image: CalibratedImage = None
 
@@ -36,10 +116,7 @@ class YXSample(Sample):
         self.image = image
 
     def get_ravelled_coordinates(self) -> ArrayLike:
-        yy = np.arange(self.image.data.shape[0]) * self.image.spacing[0]
-        xx = np.arange(self.image.data.shape[1]) * self.image.spacing[1]
-        y, x = np.meshgrid(yy, xx, indexing="ij")
-        return np.stack([y.ravel(), x.ravel()], -1)
+        return get_coordinate_grid(self.image.data.shape, self.image.spacing)
 
 
 class ZYXSample(Sample):
@@ -49,8 +126,4 @@ class ZYXSample(Sample):
         self.image = image
 
     def get_ravelled_coordinates(self) -> ArrayLike:
-        zz = np.arange(self.image.data.shape[0]) * self.image.spacing[0]
-        yy = np.arange(self.image.data.shape[1]) * self.image.spacing[1]
-        xx = np.arange(self.image.data.shape[2]) * self.image.spacing[2]
-        z, y, x = np.meshgrid(zz, yy, xx, indexing="ij")
-        return np.stack([z.ravel(), y.ravel(), x.ravel()], -1)
+        return get_coordinate_grid(self.image.data.shape, self.image.spacing)
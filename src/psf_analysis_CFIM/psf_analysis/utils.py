@@ -2,8 +2,11 @@ from typing import Tuple
 
 import numpy as np
 from numpy._typing import ArrayLike
+from scipy.stats import chi2
 from skimage.measure import centroid
 
+from psf_analysis_CFIM.psf_analysis.sample import get_coordinate_grid
+
 
 def sigma(fwhm: float) -> float:
     """Compute sigma from full width half maximum.
@@ -57,11 +60,7 @@ def compute_cov_matrix(img_data: ArrayLike, spacing: Tuple[float, ...]) -> Array
     -------
         The covariance matrix of the image data weighted by the intensity.
     """
-    extends = [np.arange(dim_size) * s for dim_size, s in zip(img_data.shape, spacing)]
-
-    grids = np.meshgrid(*extends, indexing="ij")
-
-    m = np.stack([g.ravel() for g in grids])
+    m = get_coordinate_grid(img_data.shape, spacing).T
 
     return np.cov(m, fweights=img_data.ravel())
 
@@ -110,3 +109,87 @@ def estimate_from_data(
     else:
         sigma = np.sqrt(np.diag(cov_matrix))
     return bg, amp, mu, sigma
+
+
+def estimate_from_data_batch(
+    samples: ArrayLike,
+    data: ArrayLike,
+    sample_spacing: Tuple[float, ...],
+    noise_threshold: float = 3.0,
+    support_sigmas: float = 3.0,
+    iterations: int = 3,
+) -> Tuple[ArrayLike, ArrayLike, ArrayLike, ArrayLike]:
+    """Estimate Gaussian parameters for a stack of samples at once.
+
+    Vectorized version of `estimate_from_data`, where the first axis of
+    `samples` and `data` runs over beads. All samples share one coordinate
+    grid. Background subtraction is done in floating point.
+
+    Background noise would widen the moments, so the first estimate only
+    weights pixels more than `noise_threshold` times the noise (from the
+    median absolute deviation) above the background. It is then refined
+    `iterations` times on the signal support, the pixels within
+    `support_sigmas` of the current estimate. The covariance is corrected
+    for the Gaussian tails cut off by the support.
+
+    Parameters
+    ----------
+    samples :
+        (N, ...) subsets of data for which the estimates are computed.
+    data :
+        (N, ...) whole data of every bead, used for the background.
+    sample_spacing :
+        Pixel spacing of one sample.
+    noise_threshold :
+        Threshold of the first estimate, in units of the background noise.
+    support_sigmas :
+        Radius of the signal support, in standard deviations.
+    iterations :
+        Number of estimates on the signal support.
+
+    Returns
+    -------
+    background:
+        (N,) estimated backgrounds
+    amplitude:
+        (N,) estimated Gaussian amplitudes
+    mu:
+        (N, D) weighted centroids of the background subtracted samples
+    cov_matrix:
+        (N, D, D) weighted covariance matrices of the background subtracted
+        samples
+    """
+    n_samples = samples.shape[0]
+    flat_samples = samples.reshape(n_samples, -1).astype(np.float64)
+    flat_data = data.reshape(n_samples, -1).astype(np.float64)
+
+    bg = np.median(flat_data, axis=1).astype(np.uint16)
+    amp = flat_samples.max(axis=1) - bg
+
+    noise = 1.4826 * np.median(np.abs(flat_data - bg[:, np.newaxis]), axis=1)
+    signal = np.clip(flat_samples - bg[:, np.newaxis], 0, flat_data.max(axis=1)[:, np.newaxis])
+    coordinates = get_coordinate_grid(samples.shape[1:], sample_spacing)
+
+    weights = np.where(signal > noise_threshold * noise[:, np.newaxis], signal, 0)
+    mu, centered, cov_matrix = _weighted_moments(weights, coordinates)
+
+    n_dims = coordinates.shape[1]
+    truncation = chi2.cdf(support_sigmas**2, n_dims + 2) / chi2.cdf(support_sigmas**2, n_dims)
+    for _ in range(iterations):
+        precision = np.linalg.pinv(np.where(np.isfinite(cov_matrix), cov_matrix, 0))
+        distances = np.einsum("nmi,nij,nmj->nm", centered, precision, centered)
+        weights = np.where(distances <= support_sigmas**2, signal, 0)
+        mu, centered, cov_matrix = _weighted_moments(weights, coordinates)
+        cov_matrix /= truncation
+    return bg, amp, mu, cov_matrix
+
+
+def _weighted_moments(weights: ArrayLike, coordinates: ArrayLike) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+    """Centroids, centered coordinates and covariances of (N, M) weights on (M, D) coordinates."""
+    total = weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = weights @ coordinates / total[:, np.newaxis]
+        centered = coordinates[np.newaxis] - mu[:, np.newaxis]
+        cov_matrix = (centered * weights[..., np.newaxis]).transpose(0, 2, 1) @ centered
+        cov_matrix /= (total - 1)[:, np.newaxis, np.newaxis]
+    return mu, centered, cov_matrix
@@ -0,0 +1,15 @@
+# File: tests/fake_bead.py
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+
+
+# A synthetic bead crop to test fitters with.
+def make_bead(rng, shape=(13, 31, 31), spacing=(200.0, 65.0, 65.0)):
+    """Poisson noisy, slightly off-center Gaussian bead."""
+    grids = np.meshgrid(*[np.arange(s) * sp for s, sp in zip(shape, spacing)], indexing="ij")
+    center = [(s // 2 + rng.uniform(-0.5, 0.5)) * sp for s, sp in zip(shape, spacing)]
+    sigmas = (rng.uniform(400, 500), rng.uniform(120, 150), rng.uniform(120, 150))
+    exponent = sum(((g - c) / s) ** 2 for g, c, s in zip(grids, center, sigmas))
+    data = rng.poisson(100 + rng.uniform(2000, 4000) * np.exp(-0.5 * exponent))
+    return Calibrated3DImage(data=data.astype(np.uint16), spacing=spacing)
@@ -0,0 +1,185 @@
+# File: tests/test_analyzer.py
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from unittest import mock
+
+import numpy as np
+
+from psf_analysis_CFIM.config.settings_model import AnalyzerSettings
+from psf_analysis_CFIM.psf_analysis import analyzer as analyzer_module
+from psf_analysis_CFIM.psf_analysis.analyzer import Analyzer
+from psf_analysis_CFIM.psf_analysis.parallel import analyze_bead
+from psf_analysis_CFIM.psf_analysis.parameters import PSFAnalysisInputs
+
+SPACING = (200.0, 65.0, 65.0)
+
+
+def make_plate(rng, shape=(40, 120, 200)):
+    """Noisy image with five beads in a row, and their points."""
+    grids = np.meshgrid(*[np.arange(s) * sp for s, sp in zip(shape, SPACING)], indexing="ij")
+    image = np.full(shape, 100.0)
+    points = []
+    for x in (30, 65, 100, 135, 170):
+        point = (rng.integers(16, 24), 40 + rng.integers(-2, 3), x)
+        exponent = sum(((g - p * sp) / s) ** 2 for g, p, sp, s in zip(grids, point, SPACING, (450, 130, 140)))
+        image += rng.uniform(2000, 4000) * np.exp(-0.5 * exponent)
+        points.append(point)
+    return rng.poisson(image).astype(np.uint16), np.array(points)
+
+
+def make_inputs(image, points):
+    return PSFAnalysisInputs(
+        microscope="Test",
+        magnification=100,
+        na=1.4,
+        spacing=SPACING,
+        patch_size=(2500, 2000, 2000),
+        name="plate",
+        img_data=image,
+        point_data=points,
+        dpi=96,
+        date="2024-01-01",
+        version="test",
+    )
+
+
+def analyze(image, points, settings):
+    analyzer = Analyzer(make_inputs(image, points), AnalyzerSettings(**settings).model_dump())
+    for _ in analyzer:
+        pass
+    return analyzer
+
+
+@contextmanager
+def in_thread_pool(analyze_bead_function):
+    """Run the parallel mode in threads, so the worker function can be replaced."""
+    with mock.patch.object(analyzer_module, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)), \
+            mock.patch.object(analyzer_module, "analyze_bead", analyze_bead_function):
+        yield
+
+
+class TestResultTable(unittest.TestCase):
+
+    def test_extended_columns_are_opt_in(self):
+        image, points = make_plate(np.random.default_rng(6))
+
+        results = analyze(image, points[:2], {}).get_results()
+        extended = analyze(image, points[:2], {"extended_results": True}).get_results()
+
+        self.assertNotIn("AnalysisMode", results.columns)
+        self.assertNotIn("fit_status_3D_XYZ", results.columns)
+        self.assertEqual(list(extended.columns[: len(results.columns)]), list(results.columns))
+        self.assertEqual(list(extended["AnalysisMode"]), ["fit", "fit"])
+        self.assertFalse(np.allclose(results["sde_cov_yz_3D"], results["sde_cov_xz_3D"]))
+
+    def test_moment_estimates_are_marked_by_default(self):
+        image, points = make_plate(np.random.default_rng(6))
+
+        results = analyze(image, points[:2], {"analysis_mode": "moments"}).get_results()
+
+        self.assertEqual(list(results["AnalysisMode"]), ["moments", "moments"])
+        self.assertNotIn("fit_status_3D_XYZ", results.columns)
+
+
+class TestCheckpointLifecycle(unittest.TestCase):
+
+    def setUp(self):
+        self.image, points = make_plate(np.random.default_rng(6))
+        self.points = points[:3]
+        self.folder = tempfile.mkdtemp()
+
+    def start(self, resume):
+        settings = AnalyzerSettings(checkpoint=True, resume=resume).model_dump()
+        return Analyzer(make_inputs(self.image, self.points), settings, checkpoint_folder=self.folder)
+
+    def interrupt(self, resume=False):
+        analyzer = self.start(resume)
+        next(analyzer)
+        next(analyzer)
+        return analyzer._checkpoint.path
+
+    def test_fresh_run_clears_the_log(self):
+        path = self.interrupt()
+        self.interrupt()
+
+        with open(path) as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+    def test_finished_run_removes_the_log(self):
+        path = self.interrupt()
+        analyzer = self.start(resume=True)
+        self.assertEqual(len(analyzer._checkpointed), 2)
+
+        for _ in analyzer:
+            pass
+
+        self.assertEqual(len(analyzer.get_results()), 3)
+        self.assertFalse(os.path.exists(path))
+
+
+class TestParallelAnalyzer(unittest.TestCase):
+
+    def test_matches_sequential_rows(self):
+        image, points = make_plate(np.random.default_rng(6))
+
+        def analyze_without_times(settings):
+            analyzer = analyze(image, points, {"extended_results": True, **settings})
+            results = analyzer.get_results()
+            return results.drop(columns=[c for c in results.columns if c.startswith("fit_time")]), analyzer
+
+        expected, sequential = analyze_without_times({})
+        results, parallel = analyze_without_times({"analysis_mode": "parallel", "workers": 2})
+
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(parallel._invalid_beads_index, sequential._invalid_beads_index)
+        self.assertEqual(list(results["PSF_path"]), list(expected["PSF_path"]))
+        numeric = expected.select_dtypes("number").columns
+        np.testing.assert_allclose(results[numeric].to_numpy(float), expected[numeric].to_numpy(float), rtol=1e-6)
+        self.assertIsNone(parallel._executor)
+
+    def test_failed_bead_is_discarded(self):
+        image, points = make_plate(np.random.default_rng(6))
+
+        def fail_third_bead(data, spacing, offset, psf_settings):
+            if tuple(offset) == tuple(self.offsets[2]):
+                raise RuntimeError("Optimal parameters not found")
+            return analyze_bead(data, spacing, offset, psf_settings)
+
+        with in_thread_pool(fail_third_bead), mock.patch.object(analyzer_module, "report_error") as report:
+            analyzer = Analyzer(make_inputs(image, points), AnalyzerSettings(analysis_mode="parallel", workers=1).model_dump())
+            self.offsets = [bead.offset for bead in analyzer._beads]
+            for _ in analyzer:
+                pass
+
+        self.assertEqual(analyzer._invalid_beads_index, [2])
+        self.assertEqual(len(analyzer.get_results()), 4)
+        report.assert_called_once()
+
+    def test_unexpected_worker_errors_propagate(self):
+        image, points = make_plate(np.random.default_rng(6))
+        for error in (BrokenProcessPool("A worker died"), ZeroDivisionError("division by zero")):
+            def fail(data, spacing, offset, psf_settings):
+                raise error
+
+            with in_thread_pool(fail), self.assertRaises(type(error)):
+                analyze(image, points[:2], {"analysis_mode": "parallel", "workers": 1})
+
+    def test_close_stops_the_pool(self):
+        image, points = make_plate(np.random.default_rng(6))
+        settings = AnalyzerSettings(analysis_mode="parallel", workers=1).model_dump()
+        analyzer = Analyzer(make_inputs(image, points), settings)
+
+        next(analyzer)
+        self.assertLessEqual(len(analyzer._parallel_results), 2)
+
+        analyzer.close()
+        self.assertIsNone(analyzer._executor)
+        self.assertEqual(analyzer._parallel_results, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
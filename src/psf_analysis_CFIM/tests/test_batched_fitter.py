@@ -0,0 +1,54 @@
+# File: tests/test_batched_fitter.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.fit.batched_fitter import BatchedZYXFitter
+from psf_analysis_CFIM.psf_analysis.fit.fitter import ZYXFitter
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.tests.fake_bead import make_bead
+
+
+class TestBatchedZYXFitter(unittest.TestCase):
+
+    def test_matches_single_bead_fits(self):
+        rng = np.random.default_rng(7)
+        beads = [make_bead(rng) for _ in range(6)]
+
+        batched_records = BatchedZYXFitter(images=beads).fit()
+
+        for bead, batched in zip(beads, batched_records):
+            self.assertIsNotNone(batched)
+            single = ZYXFitter(image=bead).fit()
+            for field in ("zyx_z_mu", "zyx_y_mu", "zyx_x_mu", "zyx_z_fwhm", "zyx_y_fwhm", "zyx_x_fwhm"):
+                self.assertAlmostEqual(getattr(batched, field), getattr(single, field), delta=1e-3)
+            for field in ("zyx_z_mu_sde", "zyx_czz_sde", "zyx_cxx_sde"):
+                self.assertAlmostEqual(getattr(batched, field), getattr(single, field), delta=1e-3 * getattr(single, field))
+
+    def test_records_full_telemetry(self):
+        rng = np.random.default_rng(7)
+        records = BatchedZYXFitter(images=[make_bead(rng) for _ in range(3)]).fit()
+
+        for record in records:
+            self.assertIn(record.zyx_status, (1, 2))
+            self.assertGreater(record.zyx_fit_time, 0)
+            self.assertGreater(record.zyx_nfev, 1)
+            self.assertEqual(record.zyx_retries, 0)
+
+    def test_rejects_mixed_shapes(self):
+        rng = np.random.default_rng(7)
+        with self.assertRaises(ValueError):
+            BatchedZYXFitter(images=[make_bead(rng), make_bead(rng, shape=(11, 31, 31))])
+
+    def test_flat_crop_is_reported_as_failed(self):
+        rng = np.random.default_rng(7)
+        flat = Calibrated3DImage(data=np.zeros((13, 31, 31), dtype=np.uint16), spacing=(200.0, 65.0, 65.0))
+
+        records = BatchedZYXFitter(images=[make_bead(rng), flat]).fit()
+
+        self.assertIsNotNone(records[0])
+        self.assertIsNone(records[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# File: tests/test_bead_averager.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.bead_averager import BeadAverager
+
+SHAPE = (15, 21, 21)
+SPACING = (200.0, 65.0, 65.0)
+
+
+def gaussian_crop(center):
+    """Smooth bead with its center at `center`, in pixels."""
+    grids = np.meshgrid(*[np.arange(s) for s in SHAPE], indexing="ij")
+    exponent = sum(((g - c) / s) ** 2 for g, c, s in zip(grids, center, (2.0, 2.5, 2.5)))
+    return 100 + 3000 * np.exp(-0.5 * exponent)
+
+
+class TestBeadAverager(unittest.TestCase):
+
+    def test_unregistered_average_is_the_mean(self):
+        rng = np.random.default_rng(3)
+        crops = [rng.integers(0, 4000, SHAPE).astype(np.uint16) for _ in range(5)]
+        averager = BeadAverager(SHAPE, SPACING, batch_size=2)
+        for crop in crops:
+            averager.add(crop, center=(0.0, 0.0, 0.0))
+
+        expected = np.mean(crops, axis=0).astype(np.uint16)
+        np.testing.assert_array_equal(averager.get_average().data, expected)
+
+    def test_registration_aligns_sub_pixel_centers(self):
+        rng = np.random.default_rng(3)
+        centers = np.array(SHAPE) // 2 + rng.uniform(-0.5, 0.5, size=(7, 3))
+        averager = BeadAverager(SHAPE, SPACING, register=True, batch_size=3)
+        for center in centers:
+            averager.add(gaussian_crop(center), center=tuple(center * SPACING))
+
+        expected = gaussian_crop(np.array(SHAPE) // 2)
+        np.testing.assert_allclose(averager.get_average().data, expected, atol=15)
+
+    def test_empty_average(self):
+        self.assertIsNone(BeadAverager(SHAPE, SPACING).get_average())
+
+
+if __name__ == "__main__":
+    unittest.main()
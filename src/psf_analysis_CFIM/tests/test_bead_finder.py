@@ -0,0 +1,218 @@
+# File: tests/test_bead_finder.py
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from napari.layers import Image
+from scipy.ndimage import median_filter
+
+from psf_analysis_CFIM.bead_finder_CFIM import BeadFinder, BeadFinderCache
+
+
+def pairwise_neighbour_filter(beads, half_box):
+    """The original O(n²) neighbour filter, kept as reference."""
+    discarded_beads = []
+    valid_beads = []
+    for bead in beads:
+        is_valid = True
+        for neighbour in beads:
+            if bead == neighbour:
+                continue
+            if (bead[0] - half_box[0] <= neighbour[0] <= bead[0] + half_box[0] and
+                    bead[1] - half_box[1] <= neighbour[1] <= bead[1] + half_box[1] and
+                    bead[2] - half_box[2] <= neighbour[2] <= bead[2] + half_box[2]):
+                is_valid = False
+                break
+        if is_valid:
+            valid_beads.append(bead)
+        else:
+            discarded_beads.append(bead)
+    return valid_beads, discarded_beads
+
+
+class TestNeighbourFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.finder = BeadFinder(
+            image_layers=[],
+            scale=(200.0, 65.0, 65.0),
+            bounding_box=(2500, 2000, 2000),
+            bead_finder_settings={},
+        )
+
+    def random_beads(self, rng, count, shape):
+        # Unique yx positions like peak_local_max, z from an argmax.
+        flat = rng.choice(shape[1] * shape[2], size=count, replace=False)
+        ys, xs = np.unravel_index(flat, shape[1:])
+        zs = rng.integers(0, shape[0], size=count)
+        return [(z, y, x) for z, y, x in zip(zs, ys, xs)]
+
+    def test_matches_pairwise_filter(self):
+        rng = np.random.default_rng(11)
+        half_box = self.finder.bounding_box_px / 2.0
+        for count, shape in ((0, (40, 300, 300)), (1, (40, 300, 300)), (60, (40, 300, 300)), (800, (60, 600, 600))):
+            beads = self.random_beads(rng, count, shape)
+
+            expected = pairwise_neighbour_filter(beads, half_box)
+            valid, discarded = self.finder.filter_beads_by_neighbour_distance(beads, ["ignored"])
+
+            self.assertEqual(valid, expected[0])
+            self.assertEqual(discarded, expected[1])
+
+    def test_box_edges_are_inclusive(self):
+        half_box = self.finder.bounding_box_px / 2.0
+        edge = int(np.floor(half_box[1]))
+        beads = [(20, 100, 100), (20, 100 + edge, 100), (20, 200, 200), (20, 200 + edge + 1, 200)]
+
+        valid, discarded = self.finder.filter_beads_by_neighbour_distance(beads, [])
+
+        self.assertEqual(valid, beads[2:])
+        self.assertEqual(discarded, beads[:2])
+
+
+class TestChunkedBeadFinding(unittest.TestCase):
+
+    def test_matches_in_memory_result(self):
+        rng = np.random.default_rng(5)
+        image = rng.poisson(100, (20, 300, 340)).astype(np.uint16)
+        zz, yy, xx = np.mgrid[-4:5, -6:7, -6:7]
+        bead = np.exp(-0.5 * ((zz / 2) ** 2 + (yy / 1.5) ** 2 + (xx / 1.5) ** 2))
+        for _ in range(80):
+            z, y, x = rng.integers(5, 15), rng.integers(7, 293), rng.integers(7, 333)
+            image[z - 4:z + 5, y - 6:y + 7, x - 6:x + 7] += (rng.uniform(500, 3000) * bead).astype(np.uint16)
+
+        def find(settings):
+            finder = BeadFinder([], (200.0, 65.0, 65.0), (2500, 1000, 1000), settings)
+            return finder.find_beads_for_channel(image)
+
+        expected = find({})
+        for tile_size in (64, 100, 1024):
+            self.assertEqual(find({"chunked": True, "tile_size": tile_size}), expected)
+
+
+def looped_z_positions(image, xy_beads):
+    """The original per-bead z localization, kept as reference."""
+    return [np.argmax(median_filter(image[:, y, x], size=2)) for y, x in xy_beads]
+
+
+class TestZPositions(unittest.TestCase):
+
+    def test_matches_per_bead_filter(self):
+        rng = np.random.default_rng(8)
+        image = rng.poisson(100, (24, 120, 120)).astype(np.uint16)
+        # Beads at the top and bottom z edges, in the middle, and one spanning a single plane
+        xy_beads = [(10, 10), (10, 60), (60, 10), (60, 60), (100, 100), (30, 90)]
+        planted_z = [0, 23, 1, 22, 12, 5]
+        for (y, x), z in zip(xy_beads, planted_z):
+            image[max(z - 2, 0):z + 3, y - 1:y + 2, x - 1:x + 2] += np.uint16(rng.integers(1000, 3000))
+        image[5, 30, 90] += 5000
+        # Background profiles, including flat ones, exercise the argmax ties
+        image[:, 0, :5] = 100
+        xy_beads += [(int(y), int(x)) for y, x in rng.integers(0, 120, (200, 2))] + [(0, x) for x in range(5)]
+
+        expected = looped_z_positions(image, xy_beads)
+        for settings in ({}, {"chunked": True, "tile_size": 50}):
+            finder = BeadFinder([], (200.0, 65.0, 65.0), (2500, 1000, 1000), settings)
+            np.testing.assert_array_equal(finder._z_positions(image, xy_beads), expected)
+
+        np.testing.assert_array_less(np.abs(np.subtract(expected[:6], planted_z)), 3)
+
+
+class TestParallelChannels(unittest.TestCase):
+
+    def test_matches_sequential_channel_order(self):
+        rng = np.random.default_rng(9)
+        layers = []
+        for wavelength in (520, 610, 700):
+            image = rng.poisson(100, (20, 200, 200)).astype(np.uint16)
+            for _ in range(15):
+                z, y, x = rng.integers(4, 16), rng.integers(4, 196), rng.integers(4, 196)
+                image[z - 1:z + 2, y - 2:y + 3, x - 2:x + 3] += np.uint16(rng.integers(1000, 3000))
+            layers.append(SimpleNamespace(data=image, metadata={"EmissionWavelength": wavelength}))
+
+        def find(settings):
+            finder = BeadFinder(layers, (200.0, 65.0, 65.0), (2500, 1000, 1000), {"debug": True, **settings})
+            return finder.find_beads(), finder.passed_bead_count, finder.discarded_bead_count
+
+        self.assertEqual(find({"parallel_channels": True}), find({}))
+
+
+class TestBeadFinderCache(unittest.TestCase):
+
+    def test_cached_runs_match_fresh_runs(self):
+        rng = np.random.default_rng(2)
+        image = rng.poisson(100, (20, 200, 220)).astype(np.uint16)
+        for _ in range(40):
+            z, y, x = rng.integers(4, 16), rng.integers(4, 196), rng.integers(4, 216)
+            image[z - 1:z + 2, y - 2:y + 3, x - 2:x + 3] += np.uint16(rng.integers(300, 3000))
+        layer = SimpleNamespace(data=image, metadata={"EmissionWavelength": 520})
+        cache = BeadFinderCache()
+
+        for maxima_rel in (0.3, 0.6, 0.1, 0.6):
+            settings = {"maxima_rel": maxima_rel}
+            expected = BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), settings).find_beads()
+            cached = BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), settings, cache=cache).find_beads()
+            self.assertEqual(cached, expected)
+
+        layer.data = image[:, :150]
+        expected = BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), {}).find_beads()
+        self.assertEqual(BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), {}, cache=cache).find_beads(), expected)
+
+        cache.evict(layer)
+        self.assertEqual(len(cache), 0)
+
+    def test_in_place_edits_invalidate_the_entry(self):
+        rng = np.random.default_rng(3)
+        image = rng.poisson(100, (20, 200, 220)).astype(np.uint16)
+        layer = SimpleNamespace(data=image, metadata={"EmissionWavelength": 520})
+        cache = BeadFinderCache()
+
+        def find(cache=None):
+            return BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), {}, cache=cache).find_beads()
+
+        before = find(cache)
+        layer.data[8:11, 98:103, 98:103] += np.uint16(5000)
+
+        self.assertIsNone(cache.get(layer))
+        self.assertEqual(find(cache), find())
+        self.assertNotEqual(find(cache), before)
+
+    def test_layer_data_event_drops_the_entry(self):
+        image = np.random.default_rng(3).poisson(100, (20, 100, 100)).astype(np.uint16)
+        layer = Image(image, metadata={"EmissionWavelength": 520})
+        cache = BeadFinderCache()
+
+        BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), {}, cache=cache).find_beads()
+        self.assertEqual(len(cache), 1)
+
+        layer.data = image.copy()
+        self.assertEqual(len(cache), 0)
+
+        cache.put(layer, {})
+        cache.evict(layer)
+        layer.data = image
+        self.assertEqual(len(cache), 0)
+
+
+class TestDoGDetector(unittest.TestCase):
+
+    def test_separates_beads_stacked_in_z(self):
+        rng = np.random.default_rng(4)
+        image = np.full((50, 120, 120), 200.0)
+        zz, yy, xx = np.mgrid[-8:9, -6:7, -6:7]
+        bead = 1500 * np.exp(-0.5 * ((zz / 1.6) ** 2 + (yy / 1.3) ** 2 + (xx / 1.3) ** 2))
+        truth = [(15, 40, 40), (35, 40, 40), (25, 80, 70)]
+        for z, y, x in truth:
+            image[z - 8:z + 9, y - 6:y + 7, x - 6:x + 7] += bead
+        layer = SimpleNamespace(data=rng.poisson(image).astype(np.uint16), metadata={"EmissionWavelength": 520})
+
+        finder = BeadFinder([layer], (200.0, 65.0, 65.0), (2500, 1000, 1000), {"detector": "dog"},
+                            optics={"NA": 1.4, "RI_mounting_medium": 1.4})
+        channel = finder.find_beads()[0]
+
+        found = sorted(tuple(int(c) for c in bead) for bead in channel["points"] + channel["discarded"])
+        self.assertEqual(found, sorted(truth))
+
+
+if __name__ == "__main__":
+    unittest.main()
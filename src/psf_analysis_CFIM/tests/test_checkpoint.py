@@ -0,0 +1,50 @@
+# File: tests/test_checkpoint.py
+import tempfile
+import unittest
+
+from psf_analysis_CFIM.psf_analysis.checkpoint import AnalysisCheckpoint
+from psf_analysis_CFIM.psf_analysis.records import (
+    PSFRecord,
+    YXFitRecord,
+    ZFitRecord,
+    ZYXFitRecord,
+)
+
+
+class TestAnalysisCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.settings = {"analysis_mode": "sequential", "spacing": (200.0, 65.0, 65.0)}
+
+    def test_round_trip_skips_torn_lines(self):
+        record = PSFRecord.model_construct(
+            z_fit=ZFitRecord.model_construct(z_mu=1200.0, z_mu_sde=float("nan")),
+            yx_fit=YXFitRecord.model_construct(y_mu=900.0),
+            zyx_fit=ZYXFitRecord.model_construct(zyx_nfev=4),
+        )
+        checkpoint = AnalysisCheckpoint(self.folder, "plate 1/green", self.settings)
+        checkpoint.append((3, 10, 20), record)
+        checkpoint.append((3, 40, 50), None)
+        with open(checkpoint.path, "a") as file:
+            file.write('{"offset": [3, 70')
+
+        finished = AnalysisCheckpoint(self.folder, "plate 1/green", self.settings).load()
+
+        self.assertEqual(set(finished), {(3, 10, 20), (3, 40, 50)})
+        self.assertIsNone(finished[(3, 40, 50)])
+        self.assertEqual(finished[(3, 10, 20)].z_fit.z_mu, 1200.0)
+        self.assertEqual(finished[(3, 10, 20)].zyx_fit.zyx_nfev, 4)
+
+    def test_other_settings_use_another_file(self):
+        checkpoint = AnalysisCheckpoint(self.folder, "plate", self.settings)
+        checkpoint.append((0, 0, 0), None)
+
+        other = AnalysisCheckpoint(self.folder, "plate", {**self.settings, "analysis_mode": "moments"})
+
+        self.assertNotEqual(checkpoint.path, other.path)
+        self.assertEqual(other.load(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
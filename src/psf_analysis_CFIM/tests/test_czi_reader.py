@@ -0,0 +1,131 @@
+# File: tests/test_czi_reader.py
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+from types import ModuleType, SimpleNamespace
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+
+from psf_analysis_CFIM.czi_reader import czi_reader_CFIM
+from psf_analysis_CFIM.czi_reader.czi_reader_CFIM import read_czi
+from psf_analysis_CFIM.czi_reader.czi_roi_reader import CziROIArray
+
+DATA = np.random.default_rng(0).integers(0, 4000, (2, 5, 16, 20)).astype(np.uint16)
+
+
+class FakeCziReader:
+    """Stands in for `aicsimageio.readers.CziReader` over a small two channel stack."""
+
+    chunk_dims = []
+
+    def __init__(self, path, chunk_dims=None):
+        FakeCziReader.chunk_dims.append(chunk_dims)
+        self.dims = SimpleNamespace(C=DATA.shape[0])
+        self.physical_pixel_sizes = SimpleNamespace(Z=0.2, Y=0.065, X=0.065)
+        self.metadata = ET.fromstring(
+            "<Metadata><DefaultScalingUnit>µm</DefaultScalingUnit><LensNA>1.4</LensNA>"
+            "<EmissionWavelength>520</EmissionWavelength><EmissionWavelength>610</EmissionWavelength></Metadata>"
+        )
+
+    def get_image_data(self, dims, T, C):
+        return DATA[C]
+
+    def get_image_dask_data(self, dims, T, C):
+        return da.from_array(DATA[C], chunks=(1, *DATA.shape[2:]))
+
+
+class FakeCziFile:
+    """Stands in for `aicspylibczi.CziFile` over the same stack, as a mosaic or as one subblock per plane."""
+
+    mosaic = False
+    regions = []
+
+    def __init__(self, path):
+        pass
+
+    def get_dims_shape(self):
+        dims = {"C": (0, DATA.shape[0]), "Z": (0, DATA.shape[1]), "T": (0, 1)}
+        if self.mosaic:
+            return [{**dims, "M": (0, 4), "Y": (0, 8), "X": (0, 10)}]
+        return [{**dims, "Y": (0, DATA.shape[2]), "X": (0, DATA.shape[3])}]
+
+    def is_mosaic(self):
+        return self.mosaic
+
+    def get_mosaic_bounding_box(self):
+        return SimpleNamespace(x=-40, y=25, w=DATA.shape[3], h=DATA.shape[2])
+
+    def read_mosaic(self, region, scale_factor, C, Z, T):
+        FakeCziFile.regions.append(region)
+        x, y, w, h = region
+        return DATA[C, Z, y - 25:y - 25 + h, x + 40:x + 40 + w][np.newaxis]
+
+    def read_image(self, C, Z, T):
+        return DATA[C, Z][np.newaxis, np.newaxis], [("C", 1), ("Z", 1), ("Y", DATA.shape[2]), ("X", DATA.shape[3])]
+
+
+class TestReadCzi(unittest.TestCase):
+
+    def setUp(self):
+        readers = ModuleType("aicsimageio.readers")
+        readers.CziReader = FakeCziReader
+        libczi = ModuleType("aicspylibczi")
+        libczi.CziFile = FakeCziFile
+        patcher = mock.patch.dict(sys.modules, {
+            "aicsimageio": ModuleType("aicsimageio"),
+            "aicsimageio.readers": readers,
+            "aicspylibczi": libczi,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lazy_layers_match_eager_layers(self):
+        eager = read_czi("plate.czi", lazy=False, roi=False)()
+        lazy = read_czi("plate.czi", lazy=True, roi=False)()
+
+        self.assertEqual(FakeCziReader.chunk_dims[-2:], [None, ["Y", "X"]])
+        self.assertEqual(len(lazy), len(eager))
+        for (lazy_data, lazy_metadata, lazy_type), (data, metadata, layer_type) in zip(lazy, eager):
+            self.assertIsInstance(lazy_data, da.Array)
+            self.assertEqual(lazy_data.chunksize, (1, *data.shape[1:]))
+            self.assertEqual((lazy_data.shape, lazy_data.dtype), (data.shape, data.dtype))
+            np.testing.assert_array_equal(lazy_data.compute(), data)
+            self.assertEqual(lazy_metadata, metadata)
+            self.assertEqual(lazy_type, layer_type)
+
+    def test_roi_layers_index_like_eager_layers(self):
+        eager = read_czi("plate.czi", lazy=False, roi=False)()
+        for mosaic in (False, True):
+            with mock.patch.object(FakeCziFile, "mosaic", mosaic):
+                roi = read_czi("plate.czi", roi=True)()
+
+            for (roi_data, roi_metadata, _), (data, metadata, _) in zip(roi, eager):
+                self.assertIsInstance(roi_data, CziROIArray)
+                self.assertEqual((roi_data.shape, roi_data.dtype, roi_data.size), (data.shape, data.dtype, data.size))
+                self.assertEqual(roi_metadata, metadata)
+                for key in ((1, slice(2, 9), slice(3, 15)), (slice(None, None, 2),), (Ellipsis, -1), (slice(4, 1, -1), 0)):
+                    np.testing.assert_array_equal(roi_data[key], data[key])
+                np.testing.assert_array_equal(np.asarray(roi_data), data)
+
+    def test_roi_crops_of_mosaics_read_only_their_region(self):
+        with mock.patch.object(FakeCziFile, "mosaic", True):
+            data, _, _ = read_czi("plate.czi", roi=True)()[1]
+            FakeCziFile.regions.clear()
+
+            crop = data[1:4, 5:11, 12:19]
+
+        np.testing.assert_array_equal(crop, DATA[1, 1:4, 5:11, 12:19])
+        self.assertEqual(FakeCziFile.regions, [(-40 + 12, 25 + 5, 7, 6)] * 3)
+
+    def test_lazy_mode_is_read_from_the_settings(self):
+        settings = {"reader_settings": {"lazy": True, "roi": False}}
+        with mock.patch.object(czi_reader_CFIM, "read_plugin_settings", return_value=settings):
+            data, _, _ = read_czi("plate.czi")()[0]
+
+        self.assertIsInstance(data, da.Array)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# File: tests/test_estimator.py
+import unittest
+
+import numpy as np
+from skimage.measure import centroid
+
+from psf_analysis_CFIM.psf_analysis.fit.estimator import BeadStatistics
+from psf_analysis_CFIM.psf_analysis.fit.fitter import YXFitter, ZFitter, ZYXFitter
+from psf_analysis_CFIM.psf_analysis.utils import compute_cov_matrix
+from psf_analysis_CFIM.tests.fake_bead import make_bead
+
+
+def moment_estimates(data, spacing):
+    """Background, amplitude, centroid and sigmas the estimators computed before sharing statistics."""
+    background = np.median(data).astype(np.uint16)
+    cov_matrix = np.atleast_2d(compute_cov_matrix(img_data=data, spacing=spacing))
+    return (
+        background,
+        data.max() - background,
+        centroid(data) * np.array(spacing),
+        np.abs(np.sqrt(np.diag(cov_matrix))),
+    )
+
+
+class TestBeadStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.bead = make_bead(np.random.default_rng(8))
+        self.statistics = BeadStatistics(self.bead)
+
+    def test_matches_skimage_and_compute_cov_matrix(self):
+        data, spacing = self.bead.data, self.bead.spacing
+
+        self.assertEqual(self.statistics.get_background(), np.median(data).astype(np.uint16))
+        self.assertEqual(self.statistics.get_maximum(), data.max())
+        np.testing.assert_allclose(self.statistics.get_centroid(), centroid(data) * np.array(spacing), rtol=1e-12)
+        np.testing.assert_allclose(
+            self.statistics.get_covariance(), compute_cov_matrix(img_data=data, spacing=spacing), rtol=1e-9
+        )
+
+    def test_shared_estimators_keep_their_initial_parameters(self):
+        data, spacing = self.bead.data, self.bead.spacing
+        z_fitter = ZFitter(image=self.bead, statistics=self.statistics)
+        yx_fitter = YXFitter(image=self.bead, statistics=self.statistics)
+        zyx_fitter = ZYXFitter(image=self.bead, statistics=self.statistics)
+
+        for fitter in (z_fitter, yx_fitter, zyx_fitter):
+            self.assertIs(fitter._estimator.statistics, self.statistics)
+
+        z_column = data[:, data.shape[1] // 2, data.shape[2] // 2]
+        background, amplitude, mu, sigma = moment_estimates(z_column, spacing[:1])
+        z_estimator = z_fitter._estimator
+        self.assertEqual(z_estimator.get_background(), np.median(data).astype(np.uint16))
+        self.assertEqual(z_estimator.get_amplitude(), z_column.max() - np.median(data).astype(np.uint16))
+        self.assertAlmostEqual(z_estimator.get_centroid(), mu[0])
+        self.assertAlmostEqual(float(z_estimator.get_sigma()), sigma[0])
+
+        yx_plane = data[data.shape[0] // 2]
+        _, _, mu, sigmas = moment_estimates(yx_plane, spacing[1:])
+        yx_estimator = yx_fitter._estimator
+        self.assertEqual(yx_estimator.get_amplitude(), yx_plane.max() - np.median(data).astype(np.uint16))
+        np.testing.assert_allclose(yx_estimator.get_centroid(), mu, rtol=1e-12)
+        np.testing.assert_allclose(yx_estimator.get_sigmas(), sigmas, rtol=1e-12)
+
+        background, amplitude, mu, sigmas = moment_estimates(data, spacing)
+        expected = [background, amplitude, *mu, sigmas[0] ** 2, 0, 0, sigmas[1] ** 2, 0, sigmas[2] ** 2]
+        np.testing.assert_allclose(zyx_fitter._get_initial_parameters(), expected, rtol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# File: tests/test_figure_stack.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.figure_stack import SummaryFigureStack
+
+
+class TestSummaryFigureStack(unittest.TestCase):
+
+    def setUp(self):
+        self.rendered = []
+
+        def renderer(value):
+            def render():
+                self.rendered.append(value)
+                return np.full((4, 5, 3), value, dtype=np.uint8)
+            return render
+
+        self.stack = SummaryFigureStack(figure_shape=(4, 5, 3), figures=[renderer(v) for v in (10, 20, 30)])
+
+    def test_renders_on_access_only(self):
+        self.assertEqual(self.stack.shape, (3, 4, 5, 3))
+        self.assertEqual(self.rendered, [])
+
+        self.assertEqual(self.stack[1, 0, 0, 0], 20)
+        self.assertEqual(self.stack[1].shape, (4, 5, 3))
+        self.assertEqual(self.rendered, [20])
+
+        np.testing.assert_array_equal(self.stack[:, 0, 0, 0], [10, 20, 30])
+        self.assertEqual(sorted(self.rendered), [10, 20, 30])
+
+    def test_prepend_and_delete(self):
+        self.stack[2]
+        self.stack.prepend(np.zeros((4, 5, 3), dtype=np.uint8))
+        self.stack.delete(1)
+
+        self.assertEqual(len(self.stack), 3)
+        np.testing.assert_array_equal(np.asarray(self.stack)[:, 0, 0, 0], [0, 20, 30])
+        self.assertEqual(self.rendered, [30, 20])
+
+    def test_spills_beyond_memory_budget(self):
+        stack = SummaryFigureStack(
+            figure_shape=(4, 5, 3),
+            figures=[np.full((4, 5, 3), v, dtype=np.uint8) for v in range(5)],
+            memory_budget=0,
+        )
+        stack.render_all()
+        self.assertEqual(stack.memory_used, 0)
+
+        np.testing.assert_array_equal(stack[:, 0, 0, 0], range(5))
+        stack.delete(0)
+        np.testing.assert_array_equal(stack[:, 3, 4, 2], range(1, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
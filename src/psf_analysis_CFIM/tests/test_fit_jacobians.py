@@ -0,0 +1,99 @@
+# File: tests/test_fit_jacobians.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.fit.fit_1d import (
+    evaluate_1d_gaussian,
+    evaluate_1d_gaussian_jacobian,
+)
+from psf_analysis_CFIM.psf_analysis.fit.fit_2d import (
+    evaluate_2d_gaussian,
+    evaluate_2d_gaussian_jacobian,
+)
+from psf_analysis_CFIM.psf_analysis.fit.fit_3d import (
+    covariance_from_precision_cholesky,
+    evaluate_3d_gaussian,
+    evaluate_3d_gaussian_jacobian,
+    evaluate_3d_gaussian_precision,
+    evaluate_3d_gaussian_precision_jacobian,
+    precision_cholesky_from_covariance,
+)
+
+
+def numerical_jacobian(func, x, params, rel_step=1e-6):
+    """Central finite difference Jacobian of `func(x, *params)`."""
+    params = np.asarray(params, dtype=float)
+    columns = []
+    for i in range(len(params)):
+        step = rel_step * abs(params[i]) if params[i] != 0 else rel_step
+        upper = params.copy()
+        lower = params.copy()
+        upper[i] += step
+        lower[i] -= step
+        columns.append((func(x, *upper) - func(x, *lower)) / (2 * step))
+    return np.stack(columns, axis=-1)
+
+
+class TestFitJacobians(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def assertJacobianMatches(self, func, jac, x, params):
+        analytic = jac(x, *params)
+        numeric = numerical_jacobian(func, x, params)
+        self.assertEqual(analytic.shape, numeric.shape)
+        scale = np.abs(numeric).max(axis=0) + 1e-12
+        np.testing.assert_allclose(analytic / scale, numeric / scale, atol=1e-5)
+
+    def test_1d_jacobian(self):
+        x = np.arange(25) * 200.0
+        params = [100.0, 1500.0, 2350.0, 420.0]
+        self.assertJacobianMatches(evaluate_1d_gaussian, evaluate_1d_gaussian_jacobian, x, params)
+
+    def test_2d_jacobian(self):
+        x = self.rng.uniform(0, 2000, size=(300, 2))
+        params = [100.0, 1500.0, 1010.0, 985.0, 150.0**2, 2000.0, 130.0**2]
+        self.assertJacobianMatches(evaluate_2d_gaussian, evaluate_2d_gaussian_jacobian, x, params)
+
+    def test_3d_jacobian(self):
+        x = self.rng.uniform(0, 2000, size=(500, 3))
+        params = [
+            100.0, 1500.0,
+            1200.0, 1010.0, 985.0,
+            450.0**2, 3000.0, -2500.0,
+            150.0**2, 2000.0,
+            130.0**2,
+        ]
+        self.assertJacobianMatches(evaluate_3d_gaussian, evaluate_3d_gaussian_jacobian, x, params)
+
+    def test_3d_precision_jacobian(self):
+        x = self.rng.uniform(0, 2000, size=(500, 3))
+        cholesky = precision_cholesky_from_covariance(450.0**2, 3000.0, -2500.0, 150.0**2, 2000.0, 130.0**2)
+        params = [100.0, 1500.0, 1200.0, 1010.0, 985.0, *cholesky]
+        self.assertJacobianMatches(
+            evaluate_3d_gaussian_precision, evaluate_3d_gaussian_precision_jacobian, x, params
+        )
+
+    def test_precision_matches_covariance_model(self):
+        x = self.rng.uniform(0, 2000, size=(500, 3))
+        covariance = [450.0**2, 3000.0, -2500.0, 150.0**2, 2000.0, 130.0**2]
+        cholesky = precision_cholesky_from_covariance(*covariance)
+        np.testing.assert_allclose(
+            evaluate_3d_gaussian_precision(x, 100.0, 1500.0, 1200.0, 1010.0, 985.0, *cholesky),
+            evaluate_3d_gaussian(x, 100.0, 1500.0, 1200.0, 1010.0, 985.0, *covariance),
+        )
+
+        round_trip, transform = covariance_from_precision_cholesky(*cholesky)
+        np.testing.assert_allclose(round_trip, covariance, rtol=1e-9, atol=1e-6)
+
+        numeric = numerical_jacobian(
+            lambda _, *params: covariance_from_precision_cholesky(*params)[0], None, cholesky
+        )
+        scale = np.abs(numeric).max(axis=0)
+        np.testing.assert_allclose(transform / scale, numeric / scale, atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
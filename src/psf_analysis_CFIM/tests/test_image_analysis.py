@@ -0,0 +1,54 @@
+# File: tests/test_image_analysis.py
+import unittest
+
+from types import SimpleNamespace
+
+import dask.array as da
+import numpy as np
+
+from psf_analysis_CFIM.config.settings_model import ImageAnalysisSettings
+from psf_analysis_CFIM.psf_analysis.image_analysis import _count_intensities, analyze_image
+
+
+class TestCountIntensities(unittest.TestCase):
+
+    def test_matches_masked_histogram(self):
+        rng = np.random.default_rng(0)
+        for dtype in (np.uint8, np.uint16):
+            max_val = np.iinfo(dtype).max
+            image = rng.integers(0, max_val + 1, size=(7, 40, 30)).astype(dtype)
+            image[:, :3] = 0
+            image[:, 5:7] = max_val
+            # Non-contiguous view, split into several chunks
+            image = image[:, ::2]
+
+            min_pixels, max_pixels, hist = _count_intensities(image, max_val, num_bins=8, chunk_size=1000)
+
+            filtered = image[(image > 0) & (image < max_val)]
+            self.assertEqual(min_pixels, (image == 0).sum())
+            self.assertEqual(max_pixels, (image == max_val).sum())
+            np.testing.assert_array_equal(hist, np.histogram(filtered, bins=8, range=(0, max_val))[0])
+
+
+class TestAnalyzeLazyImage(unittest.TestCase):
+
+    def test_dask_image_reports_like_numpy(self):
+        image = np.full((6, 30, 30), 1000, dtype=np.uint16)
+        image[:, :5] = 0
+        settings = {"RI_mounting_medium": 1.4, "Emission": 520, "NA": 1.4, **ImageAnalysisSettings().model_dump()}
+
+        def analyze(data):
+            messages = []
+            expected = analyze_image(
+                SimpleNamespace(data=data, scale=(200.0, 65.0, 65.0)),
+                settings,
+                report_error=lambda message, channel: messages.append(message),
+                report_warning=lambda message, channel: messages.append(message),
+            )
+            return expected, messages
+
+        self.assertEqual(analyze(da.from_array(image, chunks=(1, 30, 30))), analyze(image))
+
+
+if __name__ == "__main__":
+    unittest.main()
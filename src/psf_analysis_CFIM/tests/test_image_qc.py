@@ -0,0 +1,64 @@
+# File: tests/test_image_qc.py
+import time
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from psf_analysis_CFIM.config.settings_model import ImageAnalysisSettings
+from psf_analysis_CFIM.error_widget.error_display_widget import validation_emitter
+from psf_analysis_CFIM.psf_analysis.image_qc import ImageQCService
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestImageQCService(unittest.TestCase):
+
+    def setUp(self):
+        image = np.full((5, 20, 20), 1000, dtype=np.uint16)
+        image[:, :4] = np.iinfo(np.uint16).max  # 20% saturated
+        self.layer = SimpleNamespace(data=image, scale=(200.0, 65.0, 65.0), metadata={})
+        self.settings = {
+            id(self.layer): {
+                "RI_mounting_medium": 1.4,
+                "Emission": 520,
+                "NA": 1.4,
+                **ImageAnalysisSettings().model_dump(),
+            }
+        }
+        self.errors = []
+        validation_emitter.errorOccurred.connect(self._on_error)
+
+    def tearDown(self):
+        validation_emitter.errorOccurred.disconnect(self._on_error)
+
+    def _on_error(self, message, channel):
+        self.errors.append(message)
+
+    def _validate(self, service):
+        done = []
+        service.validate([self.layer], self.settings, on_done=done.append)
+        deadline = time.time() + 10
+        while not done and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+        return done
+
+    def test_reports_on_the_qt_thread_and_caches(self):
+        service = ImageQCService()
+
+        done = self._validate(service)
+        self.assertEqual(len(done), 1)
+        self.assertAlmostEqual(done[0], 2 * 1.4 * 520 / 1.4 ** 2)
+        self.assertEqual(len(self.errors), 1)
+
+        # A cached layer is reported again without a worker
+        service._analyze = None
+        done = self._validate(service)
+        self.assertEqual(len(done), 1)
+        self.assertEqual(len(self.errors), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# File: tests/test_moment_estimator.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.fit.fitter import YXFitter, ZFitter, ZYXFitter
+from psf_analysis_CFIM.psf_analysis.fit.moment_estimator import MomentEstimator
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.utils import fwhm
+from psf_analysis_CFIM.tests.fake_bead import make_bead
+
+
+def make_noise_free_bead(sigmas, shape=(21, 41, 41), spacing=(200.0, 65.0, 65.0)):
+    grids = np.meshgrid(*[np.arange(s) * sp for s, sp in zip(shape, spacing)], indexing="ij")
+    exponent = sum(((g - (s // 2) * sp) / sigma) ** 2 for g, s, sp, sigma in zip(grids, shape, spacing, sigmas))
+    data = np.round(100 + 3000 * np.exp(-0.5 * exponent))
+    return Calibrated3DImage(data=data.astype(np.uint16), spacing=spacing)
+
+
+class TestMomentEstimator(unittest.TestCase):
+
+    def test_recovers_fwhm_of_noise_free_beads(self):
+        sigmas = [(500.0, 130.0, 150.0), (450.0, 140.0, 120.0)]
+        beads = [make_noise_free_bead(s) for s in sigmas]
+        flat = Calibrated3DImage(data=np.full((21, 41, 41), 100, dtype=np.uint16), spacing=(200.0, 65.0, 65.0))
+
+        records = MomentEstimator(images=[*beads, flat]).estimate()
+
+        for (z_sigma, y_sigma, x_sigma), record in zip(sigmas, records):
+            self.assertAlmostEqual(record.z_fit.z_fwhm, fwhm(z_sigma), delta=0.02 * fwhm(z_sigma))
+            self.assertAlmostEqual(record.yx_fit.y_fwhm, fwhm(y_sigma), delta=0.02 * fwhm(y_sigma))
+            self.assertAlmostEqual(record.zyx_fit.zyx_x_fwhm, fwhm(x_sigma), delta=0.02 * fwhm(x_sigma))
+            self.assertAlmostEqual(record.zyx_fit.zyx_z_mu, 10 * 200.0, delta=1)
+            self.assertTrue(np.isnan(record.zyx_fit.zyx_z_mu_sde))
+        self.assertIsNone(records[2])
+
+    def test_matches_fitted_fwhm_of_noisy_beads(self):
+        rng = np.random.default_rng(1)
+        beads = [make_bead(rng, shape=shape) for shape in ((13, 31, 31),) * 3 + ((21, 41, 41),) * 3]
+
+        records = MomentEstimator(images=beads[:3]).estimate() + MomentEstimator(images=beads[3:]).estimate()
+
+        for bead, record in zip(beads, records):
+            z_fit, yx_fit, zyx_fit = ZFitter(image=bead).fit(), YXFitter(image=bead).fit(), ZYXFitter(image=bead).fit()
+            for moment, fitted in (
+                (record.z_fit.z_fwhm, z_fit.z_fwhm),
+                (record.yx_fit.x_fwhm, yx_fit.x_fwhm),
+                (record.zyx_fit.zyx_z_fwhm, zyx_fit.zyx_z_fwhm),
+                (record.zyx_fit.zyx_y_fwhm, zyx_fit.zyx_y_fwhm),
+                (record.zyx_fit.zyx_x_fwhm, zyx_fit.zyx_x_fwhm),
+            ):
+                self.assertAlmostEqual(moment, fitted, delta=0.05 * fitted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+# File: tests/test_results_store.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.results_store import ResultsStore
+
+
+class TestResultsStore(unittest.TestCase):
+
+    def test_grows_and_keeps_column_order(self):
+        store = ResultsStore(capacity=1, columns=["Name", "A", "B"], object_columns=["Name"])
+        store.add_row({"Name": "first", "A": 1.0, "B": None})
+        store.add_row({"Name": "second", "A": 2.0, "B": 3.0})
+
+        dataframe = store.to_dataframe()
+
+        self.assertEqual(list(dataframe.columns), ["Name", "A", "B"])
+        self.assertEqual(dataframe["Name"].tolist(), ["first", "second"])
+        np.testing.assert_array_equal(dataframe["A"], [1.0, 2.0])
+        self.assertTrue(np.isnan(dataframe["B"][0]))
+        np.testing.assert_array_equal(store.column("A"), [1.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# File: tests/test_sample.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.sample import ZYXSample, get_coordinate_grid
+
+
+class TestCoordinateGrid(unittest.TestCase):
+
+    def test_matches_meshgrid(self):
+        shape, spacing = (4, 5, 6), (200.0, 65.0, 70.0)
+        axes = [np.arange(s) * sp for s, sp in zip(shape, spacing)]
+        z, y, x = np.meshgrid(*axes, indexing="ij")
+
+        grid = get_coordinate_grid(shape, spacing)
+
+        np.testing.assert_array_equal(grid, np.stack([z.ravel(), y.ravel(), x.ravel()], -1))
+        np.testing.assert_array_equal(get_coordinate_grid(shape[1:], spacing[1:], origin=(10.0, 20.0))[-1], (270.0, 370.0))
+
+    def test_grids_are_shared_and_read_only(self):
+        grid = get_coordinate_grid((4, 5, 6), (200.0, 65.0, 70.0))
+        image = Calibrated3DImage(data=np.zeros((4, 5, 6)), spacing=(200, 65, 70))
+
+        self.assertIs(get_coordinate_grid([4, 5, 6], [200, 65, 70]), grid)
+        self.assertIs(ZYXSample(image=image).get_ravelled_coordinates(), grid)
+        self.assertFalse(grid.flags.writeable)
+        with self.assertRaises(ValueError):
+            grid[0, 0] = 1.0
+        with self.assertRaises(ValueError):
+            grid += 1.0
+
+
+if __name__ == "__main__":
+    unittest.main()
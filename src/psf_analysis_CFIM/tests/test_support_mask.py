@@ -0,0 +1,74 @@
+# File: tests/test_support_mask.py
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.fit import fitter
+from psf_analysis_CFIM.psf_analysis.fit.fitter import YXFitter, ZYXFitter, _get_support_data
+from psf_analysis_CFIM.psf_analysis.psf import PSF
+from psf_analysis_CFIM.psf_analysis.sample import ZYXSample, get_coordinate_grid, get_support_mask
+from psf_analysis_CFIM.tests.fake_bead import make_bead
+
+
+class TestSupportMask(unittest.TestCase):
+
+    def test_keeps_the_ellipsoid_and_every_stride_point(self):
+        coordinates = get_coordinate_grid((9, 21, 21), (200.0, 65.0, 65.0))
+        centroid, sigmas = (800.0, 650.0, 650.0), (400.0, 130.0, 130.0)
+        distances = np.sum(((coordinates - centroid) / sigmas) ** 2, axis=1)
+
+        for support_sigma, background_stride in ((3.0, 8), (2.0, 8), (3.0, 3), (1.5, 50)):
+            mask = get_support_mask(coordinates, centroid, sigmas, support_sigma, background_stride)
+
+            expected = distances <= support_sigma**2
+            expected[::background_stride] = True
+            np.testing.assert_array_equal(mask, expected)
+
+    def test_falls_back_to_the_whole_crop_without_enough_support(self):
+        bead = make_bead(np.random.default_rng(4))
+        sample = ZYXSample(image=bead)
+        full = sample.get_ravelled_coordinates()
+        centroid, sigmas = (1200.0, 975.0, 975.0), (450.0, 135.0, 135.0)
+
+        coordinates, data = _get_support_data(sample, centroid, sigmas, 3.0, 8, n_parameters=11)
+        self.assertLess(len(coordinates), len(full))
+        self.assertEqual(len(coordinates), len(data))
+
+        # A tiny support and a sparse background keep far less than 10 points per parameter.
+        coordinates, data = _get_support_data(sample, centroid, sigmas, 0.1, 10_000, n_parameters=11)
+        self.assertIs(coordinates, full)
+        np.testing.assert_array_equal(data, bead.data.ravel())
+
+    def test_psf_passes_the_settings_on(self):
+        bead = make_bead(np.random.default_rng(4))
+        fit_settings = {"support_mask": True, "support_sigma": 2.5, "support_background_stride": 5}
+
+        with mock.patch.object(fitter, "get_support_mask", wraps=get_support_mask) as support_mask:
+            PSF(image=bead, psf_settings={"fit_settings": fit_settings}).analyze()
+
+        self.assertEqual(support_mask.call_count, 2)
+        for call in support_mask.call_args_list:
+            self.assertEqual(call.args[3:], (2.5, 5))
+
+
+class TestMaskedFits(unittest.TestCase):
+
+    def test_match_full_crop_fits(self):
+        rng = np.random.default_rng(12)
+        for bead in (make_bead(rng) for _ in range(3)):
+            full_yx, masked_yx = YXFitter(image=bead).fit(), YXFitter(image=bead, support_sigma=3.0).fit()
+            full_zyx, masked_zyx = ZYXFitter(image=bead).fit(), ZYXFitter(image=bead, support_sigma=3.0).fit()
+
+            for field in ("y_mu", "x_mu"):
+                self.assertAlmostEqual(getattr(masked_yx, field), getattr(full_yx, field), delta=5.0)
+            for field in ("y_fwhm", "x_fwhm"):
+                self.assertAlmostEqual(getattr(masked_yx, field), getattr(full_yx, field), delta=0.03 * getattr(full_yx, field))
+            for field in ("zyx_z_mu", "zyx_y_mu", "zyx_x_mu"):
+                self.assertAlmostEqual(getattr(masked_zyx, field), getattr(full_zyx, field), delta=5.0)
+            for field in ("zyx_z_fwhm", "zyx_y_fwhm", "zyx_x_fwhm"):
+                self.assertAlmostEqual(getattr(masked_zyx, field), getattr(full_zyx, field), delta=0.03 * getattr(full_zyx, field))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# File: tests/test_warm_start.py
+import unittest
+
+import numpy as np
+
+from psf_analysis_CFIM.psf_analysis.fit.fitter import (
+    YXFitter,
+    ZFitter,
+    ZYXFitter,
+    passes_quality_gates,
+    zyx_bounds_from_records,
+    zyx_initial_parameters_from_records,
+)
+from psf_analysis_CFIM.psf_analysis.image import Calibrated3DImage
+from psf_analysis_CFIM.psf_analysis.psf import PSF
+from psf_analysis_CFIM.tests.fake_bead import make_bead
+
+
+class TestWarmStart(unittest.TestCase):
+
+    def setUp(self):
+        self.bead = make_bead(np.random.default_rng(3))
+        self.z_record = ZFitter(image=self.bead).fit()
+        self.yx_record = YXFitter(image=self.bead).fit()
+
+    def test_warm_start_matches_cold_start(self):
+        cold = ZYXFitter(image=self.bead).fit()
+        for parameterization in ("covariance", "precision"):
+            warm = ZYXFitter(
+                image=self.bead,
+                parameterization=parameterization,
+                initial_parameters=zyx_initial_parameters_from_records(self.z_record, self.yx_record),
+                bounds=zyx_bounds_from_records(self.bead, self.z_record, self.yx_record),
+            ).fit()
+            for field in ("zyx_z_mu", "zyx_y_mu", "zyx_x_mu", "zyx_z_fwhm", "zyx_y_fwhm", "zyx_x_fwhm"):
+                self.assertAlmostEqual(getattr(warm, field), getattr(cold, field), delta=1e-3)
+            self.assertLess(warm.zyx_nfev, cold.zyx_nfev)
+            self.assertEqual(warm.zyx_retries, 0)
+
+    def test_quality_gates(self):
+        self.assertTrue(passes_quality_gates(self.bead, self.z_record, self.yx_record))
+        too_wide = self.z_record.model_copy(update={"z_fwhm": 1e6})
+        self.assertFalse(passes_quality_gates(self.bead, too_wide, self.yx_record))
+        outside = self.yx_record.model_copy(update={"x_mu": -10.0})
+        self.assertFalse(passes_quality_gates(self.bead, self.z_record, outside))
+
+    def test_psf_skips_zyx_fit_on_failed_gates(self):
+        # Axially much longer than the crop, so the Z fit can't find a peak.
+        shape, spacing = (13, 31, 31), (200.0, 65.0, 65.0)
+        grids = np.meshgrid(*[np.arange(s) * sp for s, sp in zip(shape, spacing)], indexing="ij")
+        exponent = sum(((g - (s // 2) * sp) / sigma) ** 2 for g, s, sp, sigma in zip(grids, shape, spacing, (2500, 130, 130)))
+        data = np.random.default_rng(0).poisson(100 + 3000 * np.exp(-0.5 * exponent))
+        psf = PSF(
+            image=Calibrated3DImage(data=data.astype(np.uint16), spacing=spacing),
+            psf_settings={"fit_settings": {"quality_gates": True, "zyx_warm_start": True}},
+        )
+        psf.analyze()
+        self.assertTrue(psf.error)
+        self.assertIsNone(psf.psf_record)
+
+
+if __name__ == "__main__":
+    unittest.main()